@@ -3,8 +3,13 @@ import numpy as np
 import mediapipe as mp
 import tensorflow as tf
 import json
+import os
+import sys
 from collections import deque
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from keypoints import NUM_FEATURES, extract_keypoints, hands_present
+
 # ================================
 # CARGAR MODELO Y LABELS
 # ================================
@@ -34,33 +39,8 @@ holistic = mp_holistic.Holistic(
 # ================================
 # EXTRAER KEYPOINTS
 # ================================
-def extract_keypoints(res):
-    out = []
-    pose_map = {"left_shoulder": 11, "right_shoulder": 12, "nose": 0}
-
-    # Pose básica
-    if res.pose_landmarks:
-        for name in pose_map:
-            lm = res.pose_landmarks.landmark[pose_map[name]]
-            out.extend([lm.x, lm.y, lm.z])
-    else:
-        out.extend([0.0] * 9)
-
-    # Mano izquierda
-    if res.left_hand_landmarks:
-        for lm in res.left_hand_landmarks.landmark:
-            out.extend([lm.x, lm.y, lm.z])
-    else:
-        out.extend([0.0] * 63)
-
-    # Mano derecha
-    if res.right_hand_landmarks:
-        for lm in res.right_hand_landmarks.landmark:
-            out.extend([lm.x, lm.y, lm.z])
-    else:
-        out.extend([0.0] * 63)
-
-    return np.array(out, dtype=np.float32)
+# Implementación vectorizada compartida con el backend (backend/keypoints.py):
+# cada frame se escribe directamente en una fila de la ventana preasignada
 
 # ================================
 # AJUSTAR SECUENCIA A 30 FRAMES
@@ -78,22 +58,14 @@ def fix_sequence(seq):
 
     return seq[:NUM_FRAMES]
 
-# ================================
-# DETECTAR MANOS
-# ================================
-def hands_present(res):
-    return (
-        res.left_hand_landmarks is not None or 
-        res.right_hand_landmarks is not None
-    )
-
 # ================================
 # REAL-TIME LOOP
 # ================================
 cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
 
 state = "WAIT_HANDS"
-sequence = []
+sequence = np.zeros((NUM_FRAMES, NUM_FEATURES), dtype=np.float32)
+sequence_len = 0
 predicted_label = ""
 smooth_preds = deque(maxlen=SMOOTHING_WINDOW)
 
@@ -121,7 +93,7 @@ while True:
     # ===============================
     if state == "WAIT_HANDS":
         predicted_label = ""
-        sequence = []
+        sequence_len = 0
         smooth_preds.clear()
 
         if have_hands:
@@ -130,12 +102,12 @@ while True:
     elif state == "RECORDING":
         if not have_hands:
             state = "WAIT_HANDS"
-            sequence = []
+            sequence_len = 0
         else:
-            kp = extract_keypoints(res)
-            sequence.append(kp)
+            extract_keypoints(res, out=sequence[sequence_len])
+            sequence_len += 1
 
-            if len(sequence) == NUM_FRAMES:
+            if sequence_len == NUM_FRAMES:
                 seq30 = fix_sequence(sequence)
                 seq30 = np.expand_dims(seq30, axis=0)
 
@@ -164,7 +136,7 @@ while True:
         if not have_hands:
             predicted_label = ""
             state = "WAIT_HANDS"
-            sequence = []
+            sequence_len = 0
             smooth_preds.clear()
 
     # ===============================
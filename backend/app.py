@@ -1,15 +1,34 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.websockets import WebSocketState
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
 import cv2
 import numpy as np
-import base64
 import json
-from typing import Optional
+from typing import List, Optional
 import asyncio
 import os
+import struct
 from dotenv import load_dotenv
 from sign_detector import SignLanguageDetector
+from avatar_assets import AvatarAssetStore, parse_range
+from keypoint_sequences import LAYOUT_AVATAR, encode_sequence
+from sign_compositor import SignCompositor
+from sentence_cache import SentenceCache
+from gloss_engine import GlossEngine, text_to_glosses
+from llm_provider import create_provider
+from detection_session import DetectionSession, SessionManager
+from inference_engine import InferenceEngine
+from frame_mailbox import LatestFrameMailbox, MailboxClosed
+from frame_protocol import (
+    MSG_IMAGE, MSG_KEYPOINTS, BinaryFrame, FrameProtocolError, KeypointBatch,
+    decode_data_url, decode_image, decode_keypoints, keypoints_from_json, parse_binary_message
+)
+import config
+import logging
+from metrics import REGISTRY, WS_CONNECTIONS, stage_timer
+from structured_logging import DebugFrameSink, LogSampler, get_logger, log_event
 
 # Cargar variables de entorno
 load_dotenv()
@@ -25,15 +44,145 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Caché de oraciones compartida (persistida en SQLite entre reinicios)
+sentence_cache = SentenceCache(
+    max_entries=config.SENTENCE_CACHE_SIZE,
+    ttl_seconds=config.SENTENCE_CACHE_TTL,
+    path=config.SENTENCE_CACHE_PATH or None
+)
+
+# Proveedor LLM compartido (una conexión reutilizable para todas las sesiones)
+llm_provider = create_provider(
+    config.LLM_PROVIDER,
+    model=config.LLM_MODEL,
+    api_key=config.LLM_API_KEY or None,
+    base_url=config.LLM_BASE_URL or None,
+    timeout=config.LLM_TIMEOUT,
+    max_retries=config.LLM_MAX_RETRIES,
+    max_connections=config.LLM_MAX_CONNECTIONS
+)
+
+# Traductor local de glosas: responde sin red las frases conocidas
+gloss_engine = GlossEngine(threshold=config.GLOSS_ENGINE_THRESHOLD) if config.GLOSS_ENGINE_ENABLED else None
+
 # Inicializar el detector de señas
 import os
 model_path = os.path.join(os.path.dirname(__file__), "..", "Traine", "modelo_senas.keras")
-detector = SignLanguageDetector(model_path=model_path)
+detector = SignLanguageDetector(
+    model_path=model_path,
+    holistic_pool_size=config.HOLISTIC_POOL_SIZE,
+    vision_pipeline=config.VISION_PIPELINE,
+    inference_backend=config.INFERENCE_BACKEND,
+    sentence_workers=config.SENTENCE_WORKERS,
+    sentence_cache=sentence_cache,
+    gloss_engine=gloss_engine,
+    incremental_sentences=config.SENTENCE_INCREMENTAL,
+    llm_provider=llm_provider,
+    decision_options={
+        "smoothing": config.DECISION_SMOOTHING,
+        "alpha": config.DECISION_ALPHA,
+        "window": config.DECISION_WINDOW,
+        "enter_threshold": config.DECISION_ENTER_THRESHOLD,
+        "hysteresis": config.DECISION_HYSTERESIS,
+        "min_votes": config.DECISION_MIN_VOTES,
+        "stride": config.PREDICTION_STRIDE
+    },
+    spotter_options={
+        "rest_energy": config.SPOTTER_REST_ENERGY,
+        "rest_frames": config.SPOTTER_REST_FRAMES,
+        "motion_gate": config.MOTION_GATE_ENABLED,
+        "gate_max_skips": config.MOTION_GATE_MAX_SKIPS
+    },
+    frame_gate_options={
+        "threshold": config.FRAME_GATE_THRESHOLD,
+        "max_skips": config.FRAME_GATE_MAX_SKIPS
+    },
+    vision_options={
+        "budget_ms": config.VISION_LATENCY_BUDGET_MS,
+        "min_complexity": config.VISION_MIN_COMPLEXITY,
+        "max_complexity": config.VISION_MAX_COMPLEXITY,
+        "target_size": config.VISION_TARGET_SIZE,
+        "use_roi": config.VISION_ROI_ENABLED,
+        "roi_margin": config.VISION_ROI_MARGIN
+    }
+)
+detector.enable_batching(config.BATCH_WINDOW_MS, config.BATCH_MAX_SIZE)
+if config.RECORDING_ENABLED:
+    detector.enable_recording(
+        config.RECORDING_DIR,
+        dtype=config.RECORDING_DTYPE,
+        chunk_frames=config.RECORDING_CHUNK_FRAMES,
+        gap_frames=config.RECORDING_GAP_FRAMES,
+        min_frames=config.RECORDING_MIN_FRAMES
+    )
+
+# Motor de inferencia: saca MediaPipe y el modelo del event loop
+engine = InferenceEngine(
+    detector,
+    mode=config.INFERENCE_MODE,
+    workers=config.INFERENCE_WORKERS,
+    max_pending=config.INFERENCE_MAX_PENDING
+)
+
+# Sesiones por conexión (estado ligero; MediaPipe y el modelo se comparten)
+sessions = SessionManager(
+    sentence_builder_factory=detector.create_sentence_builder,
+    idle_timeout=config.SESSION_IDLE_TIMEOUT,
+    max_sessions=config.MAX_SESSIONS,
+    spotter_factory=detector.create_spotter,
+    frame_gate_factory=detector.create_frame_gate,
+    vision_factory=detector.create_vision,
+    recorder_factory=detector.create_recorder,
+    on_close=lambda session_id: release_session(session_id)
+)
+
+# Clips del avatar en binario (se regeneran si cambió el JSON de origen)
+avatar_assets = AvatarAssetStore(config.AVATAR_ASSETS_DIR, config.AVATAR_CLIPS_DIR, config.AVATAR_ASSET_DTYPE)
+avatar_assets.refresh()
+# Oraciones completas del avatar a partir de los clips de cada seña
+compositor = SignCompositor(
+    avatar_assets,
+    fps=config.COMPOSER_FPS,
+    blend_frames=config.COMPOSER_BLEND_FRAMES,
+    cache_size=config.COMPOSER_CACHE_SIZE
+)
+
+# Gauges que se leen al consultar /metrics
+REGISTRY.gauge("connectsigns_sessions_active", "Sesiones de detección activas", callback=lambda: len(sessions))
+REGISTRY.gauge(
+    "connectsigns_inference_pending", "Frames en vuelo en el motor de inferencia", callback=lambda: engine.pending
+)
+REGISTRY.gauge(
+    "connectsigns_sentence_cache_entries", "Oraciones en la caché", callback=lambda: len(sentence_cache)
+)
+
+# Logging estructurado: los eventos por frame van muestreados y los frames
+# de depuración se escriben en segundo plano (nada de I/O síncrono por frame)
+logger = get_logger("app")
+frame_log = LogSampler(rate=config.LOG_FRAME_SAMPLE_RATE)
+debug_frames = DebugFrameSink(config.DEBUG_FRAMES_DIR, every=config.DEBUG_FRAMES_EVERY)
+
 
-# Estado de las conexiones WebSocket activas
-active_connections = []
+def release_session(session_id: str):
+    """Liberar lo que queda de una sesión cerrada fuera de DetectionSession"""
+    detector.release_session(session_id)
+    frame_log.forget(session_id)
 
 
+def resolve_session(session_id: Optional[str]) -> Optional[DetectionSession]:
+    """Sesión indicada por session_id o la sesión por defecto si no se indica"""
+    if not session_id:
+        return detector.default_session
+    return sessions.get(session_id)
+
+
+def session_not_found(session_id: str) -> JSONResponse:
+    """Respuesta 404 para sesiones inexistentes o expulsadas"""
+    return JSONResponse(
+        status_code=404,
+        content={"error": f"Sesión no encontrada: {session_id}"}
+    )
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: list[WebSocket] = []
@@ -41,17 +190,59 @@ class ConnectionManager:
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        WS_CONNECTIONS.inc()
 
     def disconnect(self, websocket: WebSocket):
         self.active_connections.remove(websocket)
+        WS_CONNECTIONS.dec()
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
+        with stage_timer("send"):
+            await websocket.send_json(message)
 
 
 manager = ConnectionManager()
 
 
+def sentence_publisher(websocket: WebSocket, loop: asyncio.AbstractEventLoop, message_type: str = "sentence"):
+    """
+    Callback para SentenceBuilder.on_sentence / on_partial: publica la oración
+    en el WebSocket de la sesión apenas está lista (se llama desde otro hilo)
+    """
+    async def push(status: dict):
+        try:
+            await manager.send_personal_message({
+                "type": message_type,
+                "data": status
+            }, websocket)
+        except Exception:
+            pass  # El socket ya se cerró
+    
+    def publish(status: dict):
+        asyncio.run_coroutine_threadsafe(push(status), loop)
+    
+    return publish
+
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    """Lanzar el barrido periódico de sesiones inactivas"""
+    asyncio.create_task(sessions.run_eviction_loop(config.SESSION_SWEEP_INTERVAL))
+
+
+@app.on_event("shutdown")
+async def stop_inference_engine():
+    """Detener los workers de inferencia"""
+    engine.close()
+    # Guardar los segmentos grabados que queden abiertos
+    sessions.close_all()
+    if detector.recording_sink:
+        detector.recording_sink.close()
+    sentence_cache.close()
+    if llm_provider:
+        llm_provider.close()
+
+
 @app.get("/")
 async def root():
     return {"message": "ConnectSigns API está funcionando", "status": "OK"}
@@ -61,89 +252,432 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
-        "model_loaded": detector.model is not None,
-        "mediapipe_ready": detector.holistic is not None,
-        "sentence_builder_ready": detector.sentence_builder is not None
+        "model_loaded": detector.backend is not None,
+        "inference_backend": detector.backend.name if detector.backend else None,
+        "mediapipe_ready": detector.holistic_pool is not None,
+        "sentence_builder_ready": detector.sentence_builder is not None,
+        "active_sessions": len(sessions),
+        "inference": engine.get_status(),
+        "batching": detector.batcher.get_stats() if detector.batcher else None,
+        "llm": llm_provider.get_stats() if llm_provider else None,
+        "motion_gate": sessions.motion_stats(),
+        "recording": detector.recording_sink.get_stats() if detector.recording_sink else None,
+        "avatar_assets": avatar_assets.get_stats(),
+        "compositor": compositor.get_stats()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Métricas en formato de texto de Prometheus
+    """
+    if not REGISTRY.enabled:
+        return JSONResponse(status_code=404, content={"error": "Métricas desactivadas (METRICS_ENABLED=0)"})
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/sessions")
+async def list_sessions():
+    """
+    Listar las sesiones de detección activas
+    """
+    return {
+        "sessions": sessions.list_sessions(),
+        "total": len(sessions)
+    }
+
+
+@app.get("/api/avatar/clips")
+async def list_avatar_clips():
+    """
+    Clips de animación del avatar disponibles (nombre, frames, fps, tamaño)
+    """
+    return {"clips": await engine.run(avatar_assets.manifest)}
+
+
+@app.get("/api/avatar/clips/{name}")
+async def get_avatar_clip(name: str, request: Request):
+    """
+    Clip de animación del avatar en formato .kps (float16)
+    
+    Responde 304 si el ETag coincide con If-None-Match, 206 con Range y
+    comprime con brotli/gzip según Accept-Encoding
+    """
+    # La primera vez lee el archivo y lo comprime (brotli 11 / gzip 9): fuera del event loop
+    asset = await engine.run(avatar_assets.get, name)
+    if asset is None:
+        return JSONResponse(status_code=404, content={"error": f"Clip no encontrado: {name}"})
+    
+    headers = {
+        "ETag": asset.etag,
+        "Cache-Control": f"public, max-age={config.AVATAR_ASSET_MAX_AGE}",
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding"
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if asset.etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    
+    # Range sobre el contenido sin comprimir (If-Range: solo si el clip no cambió)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == asset.etag):
+        size = len(asset.data)
+        try:
+            span = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if span is not None:
+            start, end = span
+            return Response(
+                asset.data[start:end + 1], status_code=206, media_type="application/octet-stream",
+                headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"}
+            )
+    
+    body, encoding = asset.body_for(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/octet-stream", headers=headers)
+
+
+class ComposeRequest(BaseModel):
+    """Oración en español o glosas para animar con el avatar"""
+    text: Optional[str] = None
+    glosses: Optional[List[str]] = None
+    fps: Optional[float] = None
+    speed: float = 1.0
+    format: str = "kps"
+
+
+async def plan_composition(body: ComposeRequest):
+    """
+    Glosas a componer para un pedido de /api/avatar/compose
+
+    Returns:
+        Tupla de (glosas con clip, glosas sin clip, palabras sin seña),
+        o un JSONResponse de error
+    """
+    # Los frames a generar crecen con fps / speed: sin límites un pedido ocupa un worker
+    if body.fps is not None and not 0 < body.fps <= config.COMPOSER_MAX_FPS:
+        return JSONResponse(status_code=400, content={
+            "error": f"fps debe estar entre 0 y {config.COMPOSER_MAX_FPS:g}"
+        })
+    if not config.COMPOSER_MIN_SPEED <= body.speed <= config.COMPOSER_MAX_SPEED:
+        return JSONResponse(status_code=400, content={
+            "error": f"speed debe estar entre {config.COMPOSER_MIN_SPEED:g} y {config.COMPOSER_MAX_SPEED:g}"
+        })
+    unknown = []
+    if body.glosses:
+        requested = body.glosses
+    elif body.text:
+        requested, unknown = text_to_glosses(body.text)
+    else:
+        return JSONResponse(status_code=400, content={"error": "Se requiere text o glosses"})
+    if len(requested) > config.COMPOSER_MAX_GLOSSES:
+        return JSONResponse(status_code=400, content={
+            "error": f"Máximo {config.COMPOSER_MAX_GLOSSES} glosas por pedido (llegaron {len(requested)})"
+        })
+    
+    # Carga de disco los clips que falten: fuera del event loop
+    glosses, missing = await engine.run(compositor.resolve, requested)
+    if not glosses:
+        return JSONResponse(status_code=404, content={
+            "error": "Ninguna seña tiene clip del avatar",
+            "missing": list(missing),
+            "unknown_words": unknown
+        })
+    return glosses, missing, unknown
+
+
+@app.post("/api/avatar/compose")
+async def compose_avatar(body: ComposeRequest):
+    """
+    Animación continua del avatar para una oración o una lista de glosas
+    
+    Une los clips de cada seña con transiciones suaves, al fps pedido.
+    Responde un .kps (como /api/avatar/clips) o JSON con format="json".
+    """
+    plan = await plan_composition(body)
+    if isinstance(plan, JSONResponse):
+        return plan
+    glosses, missing, unknown = plan
+    
+    try:
+        composition = await engine.run(compositor.compose, glosses, body.fps, body.speed)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": f"Error componiendo la animación: {str(e)}"})
+    
+    meta = {
+        "glosses": list(glosses),
+        "missing": list(missing),
+        "unknown_words": unknown,
+        "segments": composition.segments
+    }
+    if body.format == "json":
+        return {
+            **meta,
+            "fps": composition.fps,
+            "frames": composition.frames.round(5).tolist()
+        }
+    data = encode_sequence(
+        composition.frames, fps=composition.fps, layout=LAYOUT_AVATAR, label=" ".join(glosses),
+        dtype=config.AVATAR_ASSET_DTYPE, **meta
+    )
+    return Response(data, media_type="application/octet-stream")
+
+
+@app.post("/api/avatar/compose/stream")
+async def compose_avatar_stream(body: ComposeRequest):
+    """
+    Igual que /api/avatar/compose, pero por partes para oraciones largas
+    
+    El cuerpo es una serie de .kps, cada uno precedido por su largo
+    (uint32 little-endian). Cada parte trae las señas que empiezan en ella;
+    la primera además trae glosses, missing y unknown_words.
+    """
+    plan = await plan_composition(body)
+    if isinstance(plan, JSONResponse):
+        return plan
+    glosses, missing, unknown = plan
+    fps = body.fps or compositor.fps
+    
+    # Generador síncrono: Starlette lo recorre en su pool de hilos
+    def chunks():
+        for chunk in compositor.stream(glosses, fps, body.speed):
+            meta = {"chunk": chunk.index, "offset": chunk.offset, "segments": chunk.segments}
+            if chunk.index == 0:
+                meta.update(glosses=list(glosses), missing=list(missing), unknown_words=unknown)
+            data = encode_sequence(
+                chunk.frames, fps=fps, layout=LAYOUT_AVATAR, label=" ".join(glosses),
+                dtype=config.AVATAR_ASSET_DTYPE, **meta
+            )
+            yield struct.pack("<I", len(data)) + data
+    
+    return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+
+@app.get("/api/glosses")
+async def get_glosses(session_id: Optional[str] = None, limit: int = 20):
+    """
+    Stream de glosas segmentadas de una sesión (seña, confianza, inicio y fin)
+    """
+    session = resolve_session(session_id)
+    if session is None:
+        return session_not_found(session_id)
+    return {
+        "success": True,
+        "glosses": session.spotter.recent(limit),
+        "stats": session.spotter.get_stats()
+    }
+
+
+async def process_frames(websocket: WebSocket, session: DetectionSession, mailbox: LatestFrameMailbox):
+    """
+    Consumidor del buzón: procesa siempre el frame más reciente de la conexión
+    """
+    frame_count = 0
+    
+    async def send_to_client(message: dict):
+        # Un socket ya cerrado termina el procesador; cualquier otro error sigue su curso
+        if websocket.client_state != WebSocketState.CONNECTED:
+            raise WebSocketDisconnect(1000)
+        try:
+            await manager.send_personal_message(message, websocket)
+        except RuntimeError as e:
+            raise WebSocketDisconnect(1006) from e
+    
+    while True:
+        try:
+            message = await mailbox.get()
+        except MailboxClosed:
+            return
+        
+        frame_count += 1
+        
+        try:
+            # Keypoints calculados en el cliente (ya decodificados y juntados): directo a la máquina de estados
+            if isinstance(message, KeypointBatch):
+                frame_meta = {"seq": message.seq, "timestamp": message.timestamp}
+                result = await engine.detect_keypoints(message.keypoints, session)
+                mailbox.mark_processed()
+                result["frames"] = mailbox.get_stats()
+                await send_to_client({
+                    "type": "detection",
+                    **frame_meta,
+                    "data": result
+                })
+                continue
+            
+            # Decodificar la imagen: binaria (sin base64) o data URL del protocolo JSON
+            if isinstance(message, BinaryFrame):
+                frame_meta = {"seq": message.seq, "timestamp": message.timestamp}
+                if message.msg_type != MSG_IMAGE:
+                    raise FrameProtocolError(f"Tipo de mensaje binario no soportado: {message.msg_type}")
+                payload_size = len(message.payload)
+                with stage_timer("decode"):
+                    frame = decode_image(message.payload)
+            else:
+                frame_meta = {"seq": message.get("seq"), "timestamp": message.get("timestamp")}
+                payload_size = len(message.get("image", ""))
+                with stage_timer("decode"):
+                    frame = decode_data_url(message.get("image", ""))
+            
+            if frame is not None:
+                # Frame de muestra para debugging (lo escribe un hilo de fondo)
+                debug_frames.maybe_submit(frame, frame_count, prefix=f"{session.session_id}_frame")
+                
+                # Procesar el frame y detectar señas
+                result = await engine.detect(frame, session)
+                mailbox.mark_processed()
+                frame_log.log(
+                    logger, logging.DEBUG, session.session_id, "Frame procesado",
+                    session=session.session_id, frame=frame_count, payload_bytes=payload_size,
+                    shape=frame.shape, hand_detected=result.get("hand_detected"),
+                    sign=result.get("sign"), confidence=result.get("confidence")
+                )
+                
+                # Enviar resultado al cliente junto con los contadores de frames
+                result["frames"] = mailbox.get_stats()
+                await send_to_client({
+                    "type": "detection",
+                    **frame_meta,
+                    "data": result
+                })
+            else:
+                frame_log.log(
+                    logger, logging.WARNING, f"{session.session_id}:decode", "No se pudo decodificar el frame",
+                    session=session.session_id, frame=frame_count, payload_bytes=payload_size
+                )
+                await send_to_client({
+                    "type": "error",
+                    "message": "No se pudo decodificar el frame"
+                })
+                
+        except WebSocketDisconnect:
+            # El socket se cerró mientras se procesaba: el receptor se encarga
+            return
+        except Exception as e:
+            logger.exception(
+                "Error procesando frame",
+                extra={"fields": {"session": session.session_id, "frame": frame_count}}
+            )
+            try:
+                await manager.send_personal_message({
+                    "type": "error",
+                    "message": f"Error procesando imagen: {str(e)}"
+                }, websocket)
+            except Exception:
+                return
+
+
 @app.websocket("/ws/detect")
 async def websocket_detect_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint para detección en tiempo real de lenguaje de señas
+    
+    El socket se drena continuamente hacia un buzón de un solo frame:
+    si el servidor va más lento que la cámara, los frames viejos se descartan
     """
     await manager.connect(websocket)
-    print("Cliente conectado al WebSocket")
-    frame_count = 0
+    session = sessions.create()
+    log_event(logger, logging.INFO, "Cliente conectado al WebSocket", session=session.session_id)
+    
+    # Las oraciones se generan en segundo plano y llegan como mensaje "sentence";
+    # las traducciones parciales mientras se seña, como "sentence_partial"
+    if session.sentence_builder:
+        loop = asyncio.get_running_loop()
+        session.sentence_builder.on_sentence = sentence_publisher(websocket, loop)
+        session.sentence_builder.on_partial = sentence_publisher(websocket, loop, "sentence_partial")
+    
+    # Informar al cliente su sesión para usarla en la API REST
+    await manager.send_personal_message({
+        "type": "session",
+        "session_id": session.session_id
+    }, websocket)
+    
+    mailbox = LatestFrameMailbox()
+    processor = asyncio.create_task(process_frames(websocket, session, mailbox))
     
     try:
         while True:
-            # Recibir datos del cliente
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            # Recibir datos del cliente (texto JSON o binario)
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code", 1000))
+            sessions.touch(session)
+            if session.closed:
+                # La sesión fue expulsada (inactividad o límite de sesiones)
+                log_event(logger, logging.INFO, "Sesión expulsada, cerrando WebSocket", session=session.session_id)
+                await manager.send_personal_message({
+                    "type": "error",
+                    "message": "Sesión expirada, vuelve a conectarte"
+                }, websocket)
+                await websocket.close(code=1001)
+                break
+            
+            if raw.get("bytes") is not None:
+                try:
+                    frame = parse_binary_message(raw["bytes"])
+                    if frame.msg_type == MSG_KEYPOINTS:
+                        # Los keypoints se decodifican aquí (son baratos) para que el buzón junte los lotes
+                        frame = KeypointBatch(decode_keypoints(frame.payload), frame.seq, frame.timestamp)
+                    mailbox.put(frame)
+                except FrameProtocolError as e:
+                    await manager.send_personal_message({
+                        "type": "error",
+                        "message": str(e)
+                    }, websocket)
+                continue
+            
+            message = json.loads(raw.get("text") or "{}")
             
             if message.get("type") == "frame":
-                frame_count += 1
-                print(f"\n[Frame {frame_count}] Recibido")
-                
-                # Decodificar la imagen base64
-                image_data = message.get("image", "").split(",")[1] if "," in message.get("image", "") else message.get("image", "")
-                print(f"[Frame {frame_count}] Tamaño de datos base64: {len(image_data)} caracteres")
-                
+                mailbox.put(message)
+            
+            elif message.get("type") == "keypoints":
                 try:
-                    # Convertir base64 a imagen
-                    image_bytes = base64.b64decode(image_data)
-                    nparr = np.frombuffer(image_bytes, np.uint8)
-                    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    
-                    if frame is not None:
-                        print(f"[Frame {frame_count}] Frame decodificado: {frame.shape}")
-                        
-                        # Guardar frame de muestra cada 100 frames para debugging
-                        if frame_count % 100 == 0:
-                            import os
-                            debug_dir = os.path.join(os.path.dirname(__file__), "debug_frames")
-                            os.makedirs(debug_dir, exist_ok=True)
-                            debug_path = os.path.join(debug_dir, f"frame_{frame_count}.jpg")
-                            cv2.imwrite(debug_path, frame)
-                            print(f"[DEBUG] Frame guardado en: {debug_path}")
-                        
-                        # Procesar el frame y detectar señas
-                        result = detector.detect_sign(frame)
-                        print(f"[Frame {frame_count}] Resultado: hand_detected={result.get('hand_detected')}, sign={result.get('sign')}, confidence={result.get('confidence')}")
-                        
-                        # Enviar resultado al cliente
-                        await manager.send_personal_message({
-                            "type": "detection",
-                            "data": result
-                        }, websocket)
-                    else:
-                        print(f"[Frame {frame_count}] ERROR: No se pudo decodificar el frame")
-                        await manager.send_personal_message({
-                            "type": "error",
-                            "message": "No se pudo decodificar el frame"
-                        }, websocket)
-                        
-                except Exception as e:
-                    print(f"[Frame {frame_count}] ERROR procesando frame: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    mailbox.put(KeypointBatch(
+                        keypoints_from_json(message.get("keypoints")), message.get("seq"), message.get("timestamp")
+                    ))
+                except FrameProtocolError as e:
                     await manager.send_personal_message({
                         "type": "error",
-                        "message": f"Error procesando imagen: {str(e)}"
+                        "message": str(e)
                     }, websocket)
             
+            elif message.get("type") == "recording":
+                # Etiquetar lo que se grabe desde ahora (p. ej. para juntar ejemplos de una seña)
+                # (se aplica en el próximo frame, sin bloquear el event loop con session.lock)
+                label = message.get("label") or None
+                if session.recorder is not None:
+                    session.queue_label(label)
+                await manager.send_personal_message({
+                    "type": "recording",
+                    "enabled": session.recorder is not None,
+                    "label": label if session.recorder is not None else None
+                }, websocket)
+            
             elif message.get("type") == "ping":
                 await manager.send_personal_message({
                     "type": "pong"
                 }, websocket)
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
-        print("Cliente desconectado del WebSocket")
+        log_event(logger, logging.INFO, "Cliente desconectado del WebSocket", session=session.session_id)
     except Exception as e:
-        print(f"Error en WebSocket: {str(e)}")
+        log_event(logger, logging.ERROR, "Error en WebSocket", session=session.session_id, error=str(e))
+    finally:
+        mailbox.close()
+        processor.cancel()
+        if session.sentence_builder:
+            session.sentence_builder.on_sentence = None
+            session.sentence_builder.on_partial = None
         manager.disconnect(websocket)
+        sessions.close(session.session_id)
+        log_event(logger, logging.INFO, "Sesión cerrada", session=session.session_id, **mailbox.get_stats())
 
 
 @app.post("/api/detect-image")
@@ -154,8 +688,7 @@ async def detect_sign_from_image(file: UploadFile = File(...)):
     try:
         # Leer la imagen
         contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        frame = decode_image(contents)
         
         if frame is None:
             return JSONResponse(
@@ -163,8 +696,8 @@ async def detect_sign_from_image(file: UploadFile = File(...)):
                 content={"error": "No se pudo decodificar la imagen"}
             )
         
-        # Detectar seña
-        result = detector.detect_sign(frame)
+        # Detectar seña (fuera del event loop)
+        result = await engine.detect(frame, detector.default_session)
         
         return JSONResponse(content=result)
         
@@ -187,12 +720,15 @@ async def get_available_signs():
 
 
 @app.post("/api/continuous-mode")
-async def set_continuous_mode(enabled: bool = True):
+async def set_continuous_mode(enabled: bool = True, session_id: Optional[str] = None):
     """
     Habilitar/deshabilitar modo de traducción continua
     """
+    session = resolve_session(session_id)
+    if session is None:
+        return session_not_found(session_id)
     try:
-        detector.set_continuous_mode(enabled)
+        detector.set_continuous_mode(enabled, session)
         return {
             "success": True,
             "continuous_mode": enabled,
@@ -208,13 +744,16 @@ async def set_continuous_mode(enabled: bool = True):
 # ====== ENDPOINTS PARA CONSTRUCCIÓN DE ORACIONES ======
 
 @app.get("/api/sentence")
-async def get_sentence_status():
+async def get_sentence_status(session_id: Optional[str] = None):
     """
     Obtener el estado actual del constructor de oraciones
     """
+    session = resolve_session(session_id)
+    if session is None:
+        return session_not_found(session_id)
     try:
-        if detector.sentence_builder:
-            status = detector.sentence_builder._get_status()
+        if session.sentence_builder:
+            status = session.sentence_builder._get_status()
             return {
                 "success": True,
                 "data": status
@@ -232,17 +771,20 @@ async def get_sentence_status():
 
 
 @app.post("/api/sentence/build")
-async def force_build_sentence():
+async def force_build_sentence(session_id: Optional[str] = None):
     """
     Forzar la construcción de una oración con las señas actuales
     """
+    session = resolve_session(session_id)
+    if session is None:
+        return session_not_found(session_id)
     try:
-        if detector.sentence_builder:
-            sentence = detector.sentence_builder.force_build_sentence()
+        if session.sentence_builder:
+            sentence = await engine.run(session.sentence_builder.force_build_sentence)
             return {
                 "success": True,
                 "sentence": sentence,
-                "data": detector.sentence_builder._get_status()
+                "data": session.sentence_builder._get_status()
             }
         else:
             return {
@@ -257,13 +799,16 @@ async def force_build_sentence():
 
 
 @app.post("/api/sentence/clear")
-async def clear_sentence_buffer():
+async def clear_sentence_buffer(session_id: Optional[str] = None):
     """
     Limpiar el buffer de señas y la oración actual
     """
+    session = resolve_session(session_id)
+    if session is None:
+        return session_not_found(session_id)
     try:
-        if detector.sentence_builder:
-            detector.sentence_builder.clear_buffer()
+        if session.sentence_builder:
+            session.sentence_builder.clear_buffer()
             return {
                 "success": True,
                 "message": "Buffer limpiado correctamente"
@@ -281,13 +826,16 @@ async def clear_sentence_buffer():
 
 
 @app.delete("/api/sentence/last")
-async def remove_last_sign():
+async def remove_last_sign(session_id: Optional[str] = None):
     """
     Eliminar la última seña del buffer
     """
+    session = resolve_session(session_id)
+    if session is None:
+        return session_not_found(session_id)
     try:
-        if detector.sentence_builder:
-            status = detector.sentence_builder.remove_last_sign()
+        if session.sentence_builder:
+            status = session.sentence_builder.remove_last_sign()
             return {
                 "success": True,
                 "data": status
@@ -304,9 +852,32 @@ async def remove_last_sign():
         )
 
 
+
+@app.get("/api/sentence/cache")
+async def get_sentence_cache_stats():
+    """
+    Estadísticas de la caché de oraciones (aciertos, fallos, ocupación)
+    """
+    return {
+        "success": True,
+        "data": sentence_cache.get_stats()
+    }
+
+
+@app.delete("/api/sentence/cache")
+async def clear_sentence_cache():
+    """
+    Vaciar la caché de oraciones (por ejemplo tras cambiar el prompt)
+    """
+    sentence_cache.clear()
+    return {
+        "success": True,
+        "data": sentence_cache.get_stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     print("Iniciando servidor ConnectSigns...")
-    print("Modelo cargado:", detector.model is not None)
+    print("Modelo cargado:", detector.backend is not None)
     # Usar string de importación para permitir reload
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,290 @@
+"""
+Clips de animación del avatar como assets binarios
+Los clips de src/components/avatar/animaciones/*.json (50 frames x 153 floats
+en JSON indentado, ~220 KB cada uno) se convierten a secuencias .kps en
+float16 (~15 KB) y se sirven bajo demanda desde /api/avatar/clips/<seña>.
+
+- Build: los .kps se regeneran si el JSON es más reciente (también al
+  arrancar el servidor), o a mano con `python avatar_assets.py`
+- Cada clip se carga de disco la primera vez que se pide y queda en memoria
+  junto con sus versiones comprimidas (gzip y, si está instalado, brotli)
+- El ETag es un hash del contenido, así que el navegador revalida con
+  If-None-Match y recibe 304 si el clip no cambió
+- Range (bytes=inicio-fin) se atiende sobre el contenido sin comprimir
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from keypoint_sequences import EXTENSION, LAYOUT_AVATAR, KeypointSequence, read_header, read_sequence, write_sequence
+
+# Brotli es opcional: sin él se ofrece solo gzip
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+MANIFEST_NAME = "manifest.json"
+
+
+def convert_clip(json_path: str, asset_path: str, dtype: str = "float16") -> Dict:
+    """
+    Convertir un clip JSON del avatar ({"name", "fps", "frames": [{"pose": [...]}]}) a .kps
+
+    Returns:
+        Encabezado escrito
+    """
+    with open(json_path, encoding="utf-8") as f:
+        clip = json.load(f)
+    name = os.path.splitext(os.path.basename(json_path))[0]
+    frames = np.asarray([frame["pose"] for frame in clip.get("frames", [])], dtype=np.float32)
+    if frames.ndim != 2:
+        raise ValueError(f"Clip sin frames o con poses de distinto largo: {json_path}")
+    write_sequence(
+        asset_path, frames, fps=clip.get("fps", 30), layout=LAYOUT_AVATAR, label=clip.get("name", name),
+        dtype=dtype, source=os.path.basename(json_path)
+    )
+    return read_header(asset_path)
+
+
+def build_assets(source_dir: str, assets_dir: str, dtype: str = "float16", force: bool = False) -> List[str]:
+    """
+    Convertir los clips JSON que no tengan un .kps al día
+
+    Args:
+        source_dir: Carpeta con los clips JSON
+        assets_dir: Carpeta de los .kps generados
+        dtype: float16 o float32
+        force: Regenerar todos aunque estén al día
+
+    Returns:
+        Nombres de los clips convertidos
+    """
+    if not os.path.isdir(source_dir):
+        return []
+    os.makedirs(assets_dir, exist_ok=True)
+    converted = []
+    for filename in sorted(os.listdir(source_dir)):
+        if not filename.endswith(".json"):
+            continue
+        name = os.path.splitext(filename)[0]
+        json_path = os.path.join(source_dir, filename)
+        asset_path = os.path.join(assets_dir, name + EXTENSION)
+        if not force and os.path.exists(asset_path) and os.path.getmtime(asset_path) >= os.path.getmtime(json_path):
+            continue
+        try:
+            convert_clip(json_path, asset_path, dtype)
+            converted.append(name)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ No se pudo convertir el clip {filename}: {e}")
+    return converted
+
+
+class AvatarAsset:
+    """
+    Un clip listo para servir: bytes, ETag y versiones comprimidas
+    """
+
+    def __init__(self, name: str, data: bytes, meta: Dict):
+        self.name = name
+        self.data = data
+        self.meta = meta
+        self.etag = '"' + hashlib.sha1(data).hexdigest()[:20] + '"'
+        self.encoded: Dict[str, bytes] = {"gzip": gzip.compress(data, compresslevel=9)}
+        if BROTLI_AVAILABLE:
+            self.encoded["br"] = brotli.compress(data, quality=11)
+
+    def body_for(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Cuerpo más chico que acepte el cliente
+
+        Returns:
+            Tupla de (bytes, Content-Encoding o None)
+        """
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in (accept_encoding or "").split(",")
+            if not part.strip().endswith("q=0")
+        }
+        for encoding in ("br", "gzip"):
+            body = self.encoded.get(encoding)
+            if encoding in accepted and body is not None and len(body) < len(self.data):
+                return body, encoding
+        return self.data, None
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpretar un encabezado Range de un solo rango
+
+    Args:
+        header: Valor de Range (bytes=inicio-fin, bytes=inicio- o bytes=-sufijo)
+        size: Tamaño del contenido
+
+    Returns:
+        (inicio, fin) inclusivos, o None si el encabezado no se entiende
+        (se responde el contenido completo)
+
+    Raises:
+        ValueError: Si el rango no se puede satisfacer (416)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, dash, end_text = spec.strip().partition("-")
+    try:
+        start = int(start_text) if start_text else None
+        end = int(end_text) if end_text else None
+    except ValueError:
+        return None
+    if not dash or (start is None and end is None):
+        return None
+
+    if start is None:
+        # bytes=-N: los últimos N bytes
+        if end <= 0 or size == 0:
+            raise ValueError(f"Rango vacío: {header}")
+        return max(0, size - end), size - 1
+    end = size - 1 if end is None else min(end, size - 1)
+    if start >= size or end < start:
+        raise ValueError(f"Rango fuera del contenido: {header}")
+    return start, end
+
+
+class AvatarAssetStore:
+    """
+    Clips del avatar en .kps, cargados bajo demanda
+    """
+
+    def __init__(self, assets_dir: str, source_dir: Optional[str] = None, dtype: str = "float16"):
+        """
+        Args:
+            assets_dir: Carpeta de los .kps
+            source_dir: Carpeta de los clips JSON (se convierten los que falten o cambiaron)
+            dtype: float16 o float32 para los clips convertidos
+        """
+        self.assets_dir = assets_dir
+        self.source_dir = source_dir
+        self.dtype = dtype
+        self._assets: Dict[str, AvatarAsset] = {}
+        self._sequences: Dict[str, KeypointSequence] = {}
+        self._manifest: Optional[List[Dict]] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> List[str]:
+        """Regenerar los clips desactualizados y olvidar los cargados"""
+        converted = build_assets(self.source_dir, self.assets_dir, self.dtype) if self.source_dir else []
+        with self._lock:
+            self._assets.clear()
+            self._sequences.clear()
+            self._manifest = None
+        if converted:
+            print(f"🎞️ Clips del avatar convertidos: {', '.join(converted)}")
+        return converted
+
+    def _path(self, name: str) -> Optional[str]:
+        # Solo nombres simples: nada de rutas
+        if not name or name != os.path.basename(name) or name.startswith("."):
+            return None
+        path = os.path.join(self.assets_dir, name + EXTENSION)
+        return path if os.path.isfile(path) else None
+
+    def manifest(self) -> List[Dict]:
+        """Clips disponibles (solo lee los encabezados)"""
+        with self._lock:
+            if self._manifest is not None:
+                return self._manifest
+        clips = []
+        if os.path.isdir(self.assets_dir):
+            for filename in sorted(os.listdir(self.assets_dir)):
+                if not filename.endswith(EXTENSION):
+                    continue
+                path = os.path.join(self.assets_dir, filename)
+                try:
+                    header = read_header(path)
+                except (OSError, ValueError):
+                    continue
+                clips.append({
+                    "name": filename[:-len(EXTENSION)],
+                    "frames": header["frames"],
+                    "fps": header["fps"],
+                    "features": header["features"],
+                    "dtype": header["dtype"],
+                    "bytes": os.path.getsize(path)
+                })
+        with self._lock:
+            self._manifest = clips
+        return clips
+
+    def get(self, name: str) -> Optional[AvatarAsset]:
+        """Clip por nombre (None si no existe); se lee de disco la primera vez"""
+        with self._lock:
+            asset = self._assets.get(name)
+        if asset is not None:
+            return asset
+        path = self._path(name)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        asset = AvatarAsset(name, data, read_header(path))
+        with self._lock:
+            return self._assets.setdefault(name, asset)
+
+    def sequence(self, name: str) -> Optional[KeypointSequence]:
+        """Frames de un clip para componer animaciones (None si no existe)"""
+        with self._lock:
+            sequence = self._sequences.get(name)
+        if sequence is not None:
+            return sequence
+        path = self._path(name)
+        if path is None:
+            return None
+        sequence = read_sequence(path, mmap=False)
+        sequence.keypoints = sequence.as_float32()
+        with self._lock:
+            return self._sequences.setdefault(name, sequence)
+
+    def write_manifest(self) -> str:
+        """Guardar manifest.json junto a los assets (para servirlos como estáticos)"""
+        path = os.path.join(self.assets_dir, MANIFEST_NAME)
+        # Copias: no agregar etag a las entradas cacheadas de manifest()
+        clips = [dict(clip) for clip in self.manifest()]
+        for clip in clips:
+            clip["etag"] = self.get(clip["name"]).etag.strip('"')
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"clips": clips}, f, indent=2, ensure_ascii=False)
+        return path
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            loaded = len(self._assets)
+        return {"clips": len(self.manifest()), "loaded": loaded, "brotli": BROTLI_AVAILABLE}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import config
+
+    parser = argparse.ArgumentParser(description="Convertir los clips JSON del avatar a .kps")
+    parser.add_argument("--source", default=config.AVATAR_CLIPS_DIR, help="Carpeta de los clips JSON")
+    parser.add_argument("--output", default=config.AVATAR_ASSETS_DIR, help="Carpeta de los .kps")
+    parser.add_argument("--dtype", default=config.AVATAR_ASSET_DTYPE, help="float16 o float32")
+    parser.add_argument("--force", action="store_true", help="Regenerar todos los clips")
+    args = parser.parse_args()
+
+    converted = build_assets(args.source, args.output, args.dtype, force=args.force)
+    store = AvatarAssetStore(args.output)
+    manifest_path = store.write_manifest()
+    total = sum(clip["bytes"] for clip in store.manifest())
+    source = sum(os.path.getsize(os.path.join(args.source, f)) for f in os.listdir(args.source) if f.endswith(".json"))
+    print(f"{len(converted)} clips convertidos, {len(store.manifest())} en {args.output}")
+    print(f"{source / 1024:.0f} KB de JSON -> {total / 1024:.0f} KB de .kps ({manifest_path})")
@@ -0,0 +1,153 @@
+"""
+Planificador de micro-batches para el modelo de señas
+Junta las secuencias pendientes de todas las sesiones durante una ventana
+corta y hace una sola pasada del modelo, devolviendo cada resultado a su sesión
+
+Quien llama a predict() queda bloqueado hasta tener su resultado, así que un
+batch nunca tiene más secuencias que hilos activos. Los hilos que están
+avanzando una sesión se anotan con active(); el planificador solo espera
+dentro de la ventana mientras alguno de ellos todavía no envió su secuencia.
+Con una sola sesión la predicción sale sin esperar.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class PredictionBatcher:
+    """
+    Agrupa predicciones individuales en batches con latencia acotada
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        window_ms: float = 8.0,
+        max_batch_size: int = 32
+    ):
+        """
+        Args:
+            predict_fn: Función batch (B, frames, features) -> (B, clases)
+            window_ms: Tiempo máximo que espera una secuencia a que se llene el batch
+            max_batch_size: Tamaño máximo de batch
+        """
+        self.predict_fn = predict_fn
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: Deque[Tuple[Optional[np.ndarray], Optional[Future]]] = deque()
+        self._cond = threading.Condition()
+        self._active = 0
+        self._closed = False
+
+        # Estadísticas
+        self.batches = 0
+        self.items = 0
+        self.max_seen_batch = 0
+
+        self._thread = threading.Thread(target=self._run, name="prediction-batcher", daemon=True)
+        self._thread.start()
+        print(f"✅ Micro-batching activo (ventana={window_ms}ms, batch máx={self.max_batch_size})")
+
+    def submit(self, seq: np.ndarray) -> Future:
+        """
+        Encolar una secuencia (frames, features) para el próximo batch
+
+        Returns:
+            Future que se resuelve con el vector de probabilidades
+        """
+        future: Future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("El planificador de batches está cerrado"))
+            return future
+        with self._cond:
+            self._queue.append((seq, future))
+            self._cond.notify_all()
+        return future
+
+    def predict(self, seq: np.ndarray) -> np.ndarray:
+        """Predicción bloqueante de una secuencia a través del batch compartido"""
+        return self.submit(seq).result()
+
+    @contextmanager
+    def active(self) -> Iterator[None]:
+        """
+        Marcar al hilo actual como posible emisor de una secuencia
+
+        Mientras haya hilos activos que no enviaron la suya, el batch espera
+        (hasta la ventana); cuando salen sin enviar nada, deja de esperar.
+        """
+        with self._cond:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def _collect(self) -> List[Tuple[Optional[np.ndarray], Optional[Future]]]:
+        """Esperar la primera secuencia y juntar las de los demás hilos activos"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue)
+            pending = [self._queue.popleft()]
+            deadline = time.perf_counter() + self.window
+
+            while len(pending) < self.max_batch_size:
+                if self._queue:
+                    pending.append(self._queue.popleft())
+                    continue
+                # Todos los hilos activos ya están en el batch: no hay a quién esperar
+                if self._active <= len(pending):
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+        return pending
+
+    def _run(self):
+        """Bucle del hilo planificador"""
+        while not (self._closed and not self._queue):
+            # Descartar el marcador de cierre y los futures cancelados
+            batch = [
+                (seq, future) for seq, future in self._collect()
+                if future is not None and future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+
+            try:
+                probs = self.predict_fn(np.stack([seq for seq, _ in batch]))
+                for (_, future), row in zip(batch, probs):
+                    future.set_result(row)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+            self.batches += 1
+            self.items += len(batch)
+            self.max_seen_batch = max(self.max_seen_batch, len(batch))
+
+    def get_stats(self) -> Dict:
+        """Estadísticas de batching"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_seen_batch,
+            "window_ms": self.window * 1000.0
+        }
+
+    def close(self):
+        """Detener el planificador (despierta al hilo con un marcador vacío)"""
+        with self._cond:
+            self._closed = True
+            self._queue.append((None, None))
+            self._cond.notify_all()
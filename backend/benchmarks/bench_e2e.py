@@ -0,0 +1,477 @@
+"""
+Benchmark de extremo a extremo con sesiones grabadas
+
+Reproduce una grabación (video, secuencia de imágenes o keypoints .kps/.npy)
+desde N clientes simulados en paralelo, a través de:
+
+- detect:    SignLanguageDetector.detect_sign (visión + sesión + modelo)
+- keypoints: SignLanguageDetector.detect_keypoints (sin visión)
+- predict:   SignLanguageDetector.predict_sign sobre ventanas de 30 frames
+- ws:        el WebSocket /ws/detect de un servidor en marcha (protocolo binario)
+
+Reporta throughput, latencia (media, p50, p95, p99, máx), CPU y RSS, y guarda
+un JSON con el commit, la configuración y la máquina en benchmarks/results/.
+Con --compare se compara contra un resultado anterior y sale con código 1
+si el throughput o el p95 empeoran más que --tolerance.
+
+Cada cliente tiene su propia sesión y reproduce la grabación completa
+(desfasada para que no vayan todos en el mismo frame). Los primeros
+--warmup frames de cada cliente no se miden.
+
+Uso (desde backend/):
+    python benchmarks/bench_e2e.py detect --video grabacion.mp4 --clients 4
+    python benchmarks/bench_e2e.py keypoints --keypoints recordings/<sesión>/<archivo>.kps --clients 16
+    python benchmarks/bench_e2e.py predict --video grabacion.mp4 --clients 8
+    python benchmarks/bench_e2e.py ws --frames-dir frames/ --clients 4 --fps 30 \\
+        --url ws://127.0.0.1:8000/ws/detect --server-pid $(pgrep -f "uvicorn app:app")
+    python benchmarks/bench_e2e.py detect --video grabacion.mp4 --compare results/detect-abc123.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import (  # noqa: E402
+    BACKEND_DIR, cpu_seconds, environment, git_revision, load_images, load_video,
+    peak_rss_mb, percentiles, rss_mb, save_results
+)
+
+sys.path.insert(0, BACKEND_DIR)
+from keypoint_sequences import read_sequence  # noqa: E402
+
+MODES = ("detect", "keypoints", "predict", "ws")
+DEFAULT_MODEL = os.path.join(BACKEND_DIR, "..", "Traine", "modelo_senas.keras")
+
+
+# ====== Grabaciones ======
+
+def load_recording(args) -> Dict:
+    """
+    Cargar la grabación en memoria antes de medir
+
+    Returns:
+        {"frames": [BGR] o None, "keypoints": (N, 135) o None, "source": descripción}
+    """
+    frames = keypoints = None
+    if args.keypoints:
+        keypoints = read_sequence(args.keypoints).as_float32()
+        if args.frames:
+            keypoints = keypoints[:args.frames]
+        source = args.keypoints
+    elif args.video:
+        frames = load_video(args.video, args.frames)
+        source = args.video
+    elif args.frames_dir:
+        frames = load_images(args.frames_dir, args.frames)
+        source = args.frames_dir
+    else:
+        raise SystemExit("Indicar --video, --frames-dir o --keypoints")
+
+    if (frames is not None and not frames) or (keypoints is not None and not len(keypoints)):
+        raise SystemExit(f"La grabación está vacía: {source}")
+    return {"frames": frames, "keypoints": keypoints, "source": source}
+
+
+def extract_recording_keypoints(detector, frames: List[np.ndarray]) -> np.ndarray:
+    """Pasar los frames por MediaPipe una vez (para keypoints/predict con un video)"""
+    keypoints = np.zeros((len(frames), 135), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        kp, have_hands = detector.process_frame(frame)
+        if have_hands and kp is not None:
+            keypoints[i] = kp
+    return keypoints
+
+
+# ====== Clientes en proceso ======
+
+def create_detector(args):
+    """Detector sin LLM, configurado como el servidor (mismas variables de entorno)"""
+    import config
+    from sign_detector import SignLanguageDetector
+
+    detector = SignLanguageDetector(
+        model_path=args.model,
+        holistic_pool_size=args.pool_size or args.clients,
+        vision_pipeline=args.pipeline or config.VISION_PIPELINE,
+        inference_backend=args.backend or config.INFERENCE_BACKEND,
+        sentence_workers=1,
+        decision_options={
+            "smoothing": config.DECISION_SMOOTHING,
+            "alpha": config.DECISION_ALPHA,
+            "window": config.DECISION_WINDOW,
+            "enter_threshold": config.DECISION_ENTER_THRESHOLD,
+            "hysteresis": config.DECISION_HYSTERESIS,
+            "min_votes": config.DECISION_MIN_VOTES,
+            "stride": config.PREDICTION_STRIDE
+        },
+        spotter_options={
+            "rest_energy": config.SPOTTER_REST_ENERGY,
+            "rest_frames": config.SPOTTER_REST_FRAMES,
+            "motion_gate": config.MOTION_GATE_ENABLED,
+            "gate_max_skips": config.MOTION_GATE_MAX_SKIPS
+        },
+        frame_gate_options={
+            "threshold": config.FRAME_GATE_THRESHOLD,
+            "max_skips": config.FRAME_GATE_MAX_SKIPS
+        },
+        vision_options={
+            "budget_ms": config.VISION_LATENCY_BUDGET_MS,
+            "min_complexity": config.VISION_MIN_COMPLEXITY,
+            "max_complexity": config.VISION_MAX_COMPLEXITY,
+            "target_size": config.VISION_TARGET_SIZE,
+            "use_roi": config.VISION_ROI_ENABLED,
+            "roi_margin": config.VISION_ROI_MARGIN
+        }
+    )
+    if detector.backend is None:
+        raise SystemExit(f"No se pudo cargar el modelo: {args.model}")
+    detector.enable_batching(config.BATCH_WINDOW_MS if args.batch_window_ms is None else args.batch_window_ms,
+                             config.BATCH_MAX_SIZE)
+    return detector
+
+
+def run_threads(clients: int, make_step: Callable[[int], Callable[[int], None]], length: int, args) -> Dict:
+    """
+    N hilos, cada uno llamando a su step(i) por cada frame de la grabación
+
+    Returns:
+        Latencias medidas y tiempos de la corrida
+    """
+    latencies: List[List[float]] = [[] for _ in range(clients)]
+    errors = [0] * clients
+    barrier = threading.Barrier(clients + 1)
+    total = args.iterations * length
+
+    def client(index: int):
+        step = make_step(index)
+        offset = (index * length) // clients
+        interval = 1.0 / args.fps if args.fps else 0.0
+        barrier.wait()
+        next_time = time.perf_counter()
+        for n in range(total):
+            if interval:
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_time += interval
+            start = time.perf_counter()
+            try:
+                step((offset + n) % length)
+            except Exception:
+                errors[index] += 1
+                continue
+            if n >= args.warmup:
+                latencies[index].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+
+    return {
+        "latencies": [value for values in latencies for value in values],
+        "errors": sum(errors),
+        "wall": wall,
+        "cpu": cpu
+    }
+
+
+def bench_in_process(args, recording: Dict) -> Dict:
+    """detect / keypoints / predict con el detector en este proceso"""
+    from detection_session import SessionManager
+    from sequence_buffer import MODEL_FRAMES
+
+    detector = create_detector(args)
+    sessions = SessionManager(
+        max_sessions=args.clients,
+        spotter_factory=detector.create_spotter,
+        frame_gate_factory=detector.create_frame_gate,
+        vision_factory=detector.create_vision
+    )
+    client_sessions = [sessions.create(f"bench-{i}") for i in range(args.clients)]
+
+    if args.mode == "detect":
+        if recording["frames"] is None:
+            raise SystemExit("El modo detect necesita --video o --frames-dir")
+        frames = recording["frames"]
+        length = len(frames)
+
+        def make_step(index):
+            session = client_sessions[index]
+            return lambda i: detector.detect_sign(frames[i], session)
+    else:
+        keypoints = recording["keypoints"]
+        if keypoints is None:
+            keypoints = extract_recording_keypoints(detector, recording["frames"])
+
+        if args.mode == "keypoints":
+            length = len(keypoints)
+            batches = [keypoints[i:i + 1] for i in range(length)]
+
+            def make_step(index):
+                session = client_sessions[index]
+                return lambda i: detector.detect_keypoints(batches[i], session)
+        else:
+            if len(keypoints) < MODEL_FRAMES:
+                raise SystemExit(f"El modo predict necesita al menos {MODEL_FRAMES} frames")
+            windows = [keypoints[i:i + MODEL_FRAMES] for i in range(len(keypoints) - MODEL_FRAMES + 1)]
+            length = len(windows)
+
+            def make_step(index):
+                return lambda i: detector.predict_sign(windows[i])
+
+    result = run_threads(args.clients, make_step, length, args)
+    result["rss_mb"] = round(rss_mb(), 1)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    result["batching"] = detector.batcher.get_stats() if detector.batcher else None
+    if detector.batcher:
+        detector.batcher.close()
+    return result
+
+
+# ====== Clientes WebSocket ======
+
+def encode_recording(recording: Dict, quality: int) -> List[bytes]:
+    """Payloads binarios de /ws/detect (JPEG o keypoints) sin cabecera"""
+    if recording["keypoints"] is not None:
+        return [row.astype("<f4").tobytes() for row in recording["keypoints"]]
+    import cv2
+    return [cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+            for frame in recording["frames"]]
+
+
+async def ws_client(args, index: int, payloads: List[bytes], msg_type: int, fmt: int, start_event, stats: Dict):
+    """Cliente simulado: envía a ritmo --fps y mide el tiempo hasta el resultado de cada seq"""
+    import websockets
+    from frame_protocol import pack_binary_message
+
+    length = len(payloads)
+    total = args.iterations * length
+    offset = (index * length) // args.clients
+    sent: Dict[int, float] = {}
+    done = asyncio.Event()
+
+    async with websockets.connect(args.url, max_size=None) as ws:
+        session = json.loads(await ws.recv())  # {"type": "session", ...}
+        stats["sessions"].append(session.get("session_id"))
+
+        async def receive():
+            while True:
+                message = json.loads(await ws.recv())
+                if message.get("type") != "detection":
+                    continue
+                seq = message.get("seq")
+                started = sent.pop(seq, None)
+                if started is not None and seq >= args.warmup:
+                    stats["latencies"].append((time.perf_counter() - started) * 1000)
+                stats["received"] += 1
+                if seq == total - 1:
+                    done.set()
+
+        receiver = asyncio.create_task(receive())
+        await start_event.wait()
+        interval = 1.0 / args.fps if args.fps else 0.0
+        next_time = time.perf_counter()
+        for n in range(total):
+            if interval:
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_time += interval
+            sent[n] = time.perf_counter()
+            await ws.send(pack_binary_message(msg_type, payloads[(offset + n) % length], seq=n,
+                                              timestamp=time.time() * 1000, fmt=fmt))
+            stats["sent"] += 1
+            if not interval:
+                await asyncio.sleep(0)
+
+        # Esperar el último resultado (o abandonar los frames que el servidor descartó)
+        try:
+            await asyncio.wait_for(done.wait(), timeout=args.drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        receiver.cancel()
+
+
+async def bench_ws_async(args, recording: Dict) -> Dict:
+    from frame_protocol import FORMAT_JPEG, MSG_IMAGE, MSG_KEYPOINTS
+
+    payloads = encode_recording(recording, args.jpeg_quality)
+    if recording["keypoints"] is not None:
+        msg_type, fmt = MSG_KEYPOINTS, 0
+    else:
+        msg_type, fmt = MSG_IMAGE, FORMAT_JPEG
+
+    stats = {"latencies": [], "sent": 0, "received": 0, "sessions": []}
+    start_event = asyncio.Event()
+    tasks = [asyncio.create_task(ws_client(args, i, payloads, msg_type, fmt, start_event, stats))
+             for i in range(args.clients)]
+    # Dar tiempo a que todos se conecten antes de empezar a medir
+    while len(stats["sessions"]) < args.clients and not any(t.done() for t in tasks):
+        await asyncio.sleep(0.05)
+
+    cpu_start = cpu_seconds(args.server_pid) if args.server_pid else None
+    wall_start = time.perf_counter()
+    start_event.set()
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    wall = time.perf_counter() - wall_start
+
+    result = {
+        "latencies": stats["latencies"],
+        "errors": sum(1 for outcome in outcomes if isinstance(outcome, Exception)),
+        "wall": wall,
+        "sent": stats["sent"],
+        "received": stats["received"],
+        "dropped": stats["sent"] - stats["received"]
+    }
+    if args.server_pid:
+        result["cpu"] = cpu_seconds(args.server_pid) - cpu_start
+        result["rss_mb"] = round(rss_mb(args.server_pid), 1)
+    return result
+
+
+def bench_ws(args, recording: Dict) -> Dict:
+    """ws: N conexiones a un servidor en marcha"""
+    return asyncio.run(bench_ws_async(args, recording))
+
+
+# ====== Resultados ======
+
+def summarize(args, recording: Dict, raw: Dict) -> Dict:
+    """Armar el JSON de resultados"""
+    measured = len(raw["latencies"])
+    summary = {
+        "throughput_fps": round(measured / raw["wall"], 2) if raw["wall"] else 0.0,
+        "latency_ms": percentiles(raw["latencies"]),
+        "measured": measured,
+        "errors": raw["errors"],
+        "wall_seconds": round(raw["wall"], 3)
+    }
+    if raw.get("cpu") is not None:
+        summary["cpu_seconds"] = round(raw["cpu"], 3)
+        summary["cpu_cores"] = round(raw["cpu"] / raw["wall"], 2) if raw["wall"] else 0.0
+    for key in ("rss_mb", "peak_rss_mb", "sent", "received", "dropped", "batching"):
+        if key in raw:
+            summary[key] = raw[key]
+
+    return {
+        "benchmark": args.mode,
+        "git": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "config": {
+            "source": recording["source"],
+            "frames": len(recording["frames"]) if recording["frames"] is not None else len(recording["keypoints"]),
+            "clients": args.clients,
+            "fps": args.fps,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "pool_size": args.pool_size,
+            "pipeline": args.pipeline,
+            "backend": args.backend,
+            "batch_window_ms": args.batch_window_ms,
+            "url": args.url if args.mode == "ws" else None
+        },
+        "results": summary
+    }
+
+
+def print_summary(results: Dict):
+    r = results["results"]
+    lat = r["latency_ms"]
+    print(f"\n{results['benchmark']} · {results['config']['clients']} clientes · {r['measured']} frames medidos")
+    print(f"  throughput  {r['throughput_fps']:.1f} frames/s")
+    print(f"  latencia    media {lat['mean']:.2f}  p50 {lat['p50']:.2f}  p95 {lat['p95']:.2f}  "
+          f"p99 {lat['p99']:.2f}  máx {lat['max']:.2f} ms")
+    if "cpu_cores" in r:
+        print(f"  CPU         {r['cpu_seconds']:.2f} s ({r['cpu_cores']:.2f} núcleos)")
+    if "rss_mb" in r:
+        peak = f" (pico {r['peak_rss_mb']:.1f})" if "peak_rss_mb" in r else ""
+        print(f"  RSS         {r['rss_mb']:.1f} MB{peak}")
+    if "dropped" in r:
+        print(f"  frames      {r['sent']} enviados, {r['received']} respondidos, {r['dropped']} descartados")
+    if r["errors"]:
+        print(f"  errores     {r['errors']}")
+
+
+def compare(results: Dict, baseline_path: str, tolerance: float) -> bool:
+    """
+    Comparar contra un resultado anterior
+
+    Returns:
+        True si no hay regresión de throughput ni de p95 mayor a tolerance
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old, new = baseline["results"], results["results"]
+    checks = (
+        ("throughput_fps", old["throughput_fps"], new["throughput_fps"], True),
+        ("p95_ms", old["latency_ms"]["p95"], new["latency_ms"]["p95"], False),
+        ("p99_ms", old["latency_ms"]["p99"], new["latency_ms"]["p99"], False)
+    )
+    ok = True
+    print(f"\nComparación con {baseline_path} (commit {baseline.get('git')})")
+    for name, before, after, higher_is_better in checks:
+        change = (after - before) / before if before else 0.0
+        worse = -change if higher_is_better else change
+        regressed = name != "p99_ms" and worse > tolerance
+        ok &= not regressed
+        mark = "❌" if regressed else "  "
+        print(f"{mark} {name:<15} {before:>10.2f} -> {after:>10.2f}  ({change:+.1%})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=MODES, help="Qué camino medir")
+    parser.add_argument("--video", help="Grabación en video")
+    parser.add_argument("--frames-dir", help="Directorio con una secuencia de imágenes JPEG/PNG")
+    parser.add_argument("--keypoints", help="Keypoints grabados (.kps o .npy de (N, 135))")
+    parser.add_argument("--frames", type=int, default=0, help="Frames de la grabación a usar (0 = todos)")
+    parser.add_argument("--clients", type=int, default=1, help="Clientes simulados en paralelo")
+    parser.add_argument("--fps", type=float, default=0.0, help="Frames por segundo por cliente (0 = sin pausa)")
+    parser.add_argument("--iterations", type=int, default=1, help="Veces que cada cliente reproduce la grabación")
+    parser.add_argument("--warmup", type=int, default=10, help="Frames iniciales de cada cliente que no se miden")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Modelo .keras (modos en proceso)")
+    parser.add_argument("--backend", help="Backend de inferencia (default: INFERENCE_BACKEND)")
+    parser.add_argument("--pipeline", help="Pipeline de visión (default: VISION_PIPELINE)")
+    parser.add_argument("--pool-size", type=int, default=0, help="Instancias de MediaPipe (0 = una por cliente)")
+    parser.add_argument("--batch-window-ms", type=float, help="Ventana de micro-batching (default: BATCH_WINDOW_MS)")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/detect", help="WebSocket del servidor (modo ws)")
+    parser.add_argument("--server-pid", type=int, help="PID del servidor para medir su CPU y RSS (modo ws, Linux)")
+    parser.add_argument("--jpeg-quality", type=int, default=80, help="Calidad JPEG de los frames enviados (modo ws)")
+    parser.add_argument("--drain-timeout", type=float, default=5.0, help="Espera del último resultado (modo ws)")
+    parser.add_argument("--output", help="Archivo JSON de resultados (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="Resultado anterior para detectar regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Regresión máxima aceptada con --compare")
+    args = parser.parse_args()
+    args.clients = max(1, args.clients)
+    args.iterations = max(1, args.iterations)
+
+    recording = load_recording(args)
+    raw = bench_ws(args, recording) if args.mode == "ws" else bench_in_process(args, recording)
+
+    results = summarize(args, recording, raw)
+    print_summary(results)
+    path = save_results(results, args.output)
+    print(f"\nResultados guardados en {path}")
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark y paridad de los pipelines de visión (holistic vs hands)
+
+Procesa los mismos frames de una grabación con cada pipeline, cada uno en
+su propio proceso para que la memoria no se mezcle, y reporta:
+
+- Latencia por frame (visión + extract_keypoints): media, p50 y p95
+- Memoria: RSS que agrega crear el pipeline y pico del proceso
+- Paridad de keypoints: acuerdo en presencia de manos y error medio por grupo
+- Paridad del clasificador (con --model): acuerdo del top-1 sobre ventanas
+  deslizantes de NUM_FRAMES frames, igual que en las sesiones
+
+Uso (desde backend/):
+    python benchmarks/bench_vision_pipelines.py --video grabacion.mp4 [--frames 300]
+    python benchmarks/bench_vision_pipelines.py --video grabacion.mp4 \\
+        --model ../Traine/modelo_senas.keras --check   # sale con código 1 si no hay paridad
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import BACKEND_DIR, load_video, peak_rss_mb, rss_mb  # noqa: E402
+
+sys.path.insert(0, BACKEND_DIR)
+from keypoints import LEFT_HAND_SLICE, NUM_FEATURES, POSE_SLICE, RIGHT_HAND_SLICE  # noqa: E402
+from sequence_buffer import MODEL_FRAMES, resample_indices  # noqa: E402
+
+
+def run_pipeline(name: str, frames, complexity: int, queue):
+    """Proceso hijo: crear el pipeline, procesar los frames y devolver keypoints y tiempos"""
+    sys.path.insert(0, BACKEND_DIR)
+    import cv2
+    from keypoints import extract_keypoints, hands_present
+    from sign_detector import HOLISTIC_CONFIG
+    from vision_pipelines import create_pipeline
+
+    base_rss = rss_mb()
+    pipeline = create_pipeline(name, HOLISTIC_CONFIG, complexity)
+    loaded_rss = rss_mb()
+
+    keypoints = np.zeros((len(frames), NUM_FEATURES), dtype=np.float32)
+    have_hands = np.zeros(len(frames), dtype=bool)
+    timings = np.zeros(len(frames))
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        results = pipeline.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        have_hands[i] = hands_present(results)
+        if have_hands[i]:
+            extract_keypoints(results, out=keypoints[i])
+        timings[i] = (time.perf_counter() - start) * 1000
+    pipeline.close()
+
+    queue.put({
+        "keypoints": keypoints,
+        "have_hands": have_hands,
+        "timings": timings,
+        "model_mb": loaded_rss - base_rss,
+        "peak_mb": peak_rss_mb()
+    })
+
+
+def measure(name: str, frames, complexity: int):
+    """Correr un pipeline en un proceso aparte"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=run_pipeline, args=(name, frames, complexity, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def group_error(a: np.ndarray, b: np.ndarray, group: slice) -> float:
+    """Error absoluto medio de un grupo en los frames donde ambos lo detectaron"""
+    both = a[:, group].any(axis=1) & b[:, group].any(axis=1)
+    if not both.any():
+        return float("nan")
+    return float(np.abs(a[both, group] - b[both, group]).mean())
+
+
+def classifier_agreement(model_path: str, ref: dict, other: dict, window: int, backend: str) -> float:
+    """Acuerdo del top-1 sobre ventanas deslizantes con manos en todos sus frames"""
+    from inference_backends import create_backend
+
+    model = create_backend(backend, model_path)
+    idxs = resample_indices(window, MODEL_FRAMES, window=window)
+    batches = {"ref": [], "other": []}
+    for end in range(window, len(ref["keypoints"]) + 1):
+        span = slice(end - window, end)
+        if ref["have_hands"][span].all() and other["have_hands"][span].all():
+            batches["ref"].append(ref["keypoints"][span][idxs])
+            batches["other"].append(other["keypoints"][span][idxs])
+    if not batches["ref"]:
+        return float("nan")
+    top_ref = model.predict_batch(np.stack(batches["ref"])).argmax(axis=1)
+    top_other = model.predict_batch(np.stack(batches["other"])).argmax(axis=1)
+    return float((top_ref == top_other).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", required=True, help="Grabación a procesar")
+    parser.add_argument("--frames", type=int, default=300, help="Frames como máximo")
+    parser.add_argument("--complexity", type=int, default=1, help="model_complexity de ambos pipelines")
+    parser.add_argument("--model", help="Modelo .keras para medir la paridad del clasificador")
+    parser.add_argument("--backend", default="tf_function", help="Backend de inferencia del clasificador")
+    parser.add_argument("--window", type=int, default=10, help="Frames por ventana (NUM_FRAMES de la sesión)")
+    parser.add_argument("--check", action="store_true", help="Salir con código 1 si no hay paridad")
+    parser.add_argument("--min-agreement", type=float, default=0.95, help="Acuerdo mínimo para --check")
+    args = parser.parse_args()
+
+    frames = load_video(args.video, args.frames)
+    if not frames:
+        raise SystemExit(f"No se pudieron leer frames de {args.video}")
+    print(f"{len(frames)} frames de {args.video} ({frames[0].shape[1]}x{frames[0].shape[0]})\n")
+
+    results = {name: measure(name, frames, args.complexity) for name in ("holistic", "hands")}
+
+    print(f"{'pipeline':<10}{'media':>9}{'p50':>9}{'p95':>9}{'modelo MB':>12}{'pico MB':>10}  (ms/frame)")
+    for name, r in results.items():
+        t = r["timings"]
+        print(f"{name:<10}{t.mean():>9.2f}{np.percentile(t, 50):>9.2f}{np.percentile(t, 95):>9.2f}"
+              f"{r['model_mb']:>12.1f}{r['peak_mb']:>10.1f}")
+
+    ref, other = results["holistic"], results["hands"]
+    presence = float((ref["have_hands"] == other["have_hands"]).mean())
+    print(f"\nAcuerdo en presencia de manos: {presence:.1%}")
+    for label, group in (("pose", POSE_SLICE), ("mano izquierda", LEFT_HAND_SLICE), ("mano derecha", RIGHT_HAND_SLICE)):
+        print(f"Error medio {label:<15} {group_error(ref['keypoints'], other['keypoints'], group):.4f}")
+
+    agreement = presence
+    if args.model:
+        agreement = classifier_agreement(args.model, ref, other, args.window, args.backend)
+        print(f"Acuerdo del top-1 del clasificador: {agreement:.1%}")
+
+    if args.check and not agreement >= args.min_agreement:
+        print(f"\n❌ Sin paridad: {agreement:.1%} < {args.min_agreement:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Utilidades compartidas por los benchmarks: carga de grabaciones, memoria,
+CPU, percentiles y resultados en JSON
+"""
+
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, "..")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+
+
+def rss_mb(pid: Optional[int] = None) -> float:
+    """RSS actual de un proceso en MB (por defecto este)"""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_rss_mb() if pid is None else float("nan")
+
+
+def peak_rss_mb() -> float:
+    """Pico de RSS del proceso en MB (ru_maxrss está en KB en Linux y en bytes en macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def cpu_seconds(pid: Optional[int] = None) -> float:
+    """Tiempo de CPU (usuario + sistema) de un proceso"""
+    if pid is None:
+        return time.process_time()
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return float("nan")
+
+
+def load_video(path: str, limit: int = 0) -> List[np.ndarray]:
+    """Leer los frames BGR de un video (limit=0: todos)"""
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while not limit or len(frames) < limit:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def list_images(directory: str) -> List[str]:
+    """Imágenes de un directorio en orden de nombre"""
+    paths = []
+    for pattern in IMAGE_PATTERNS:
+        paths.extend(glob.glob(os.path.join(directory, pattern)))
+    return sorted(paths)
+
+
+def load_images(directory: str, limit: int = 0) -> List[np.ndarray]:
+    """Leer una secuencia de imágenes (JPEG/PNG/WebP) como frames BGR"""
+    import cv2
+
+    paths = list_images(directory)
+    if limit:
+        paths = paths[:limit]
+    return [frame for frame in (cv2.imread(p) for p in paths) if frame is not None]
+
+
+def percentiles(values_ms, points=(50, 95, 99)) -> Dict[str, float]:
+    """Media, percentiles y máximo de una lista de latencias en ms"""
+    if len(values_ms) == 0:
+        return {"mean": float("nan"), **{f"p{p}": float("nan") for p in points}, "max": float("nan")}
+    values = np.asarray(values_ms, dtype=np.float64)
+    stats = {"mean": round(float(values.mean()), 3)}
+    stats.update({f"p{p}": round(float(np.percentile(values, p)), 3) for p in points})
+    stats["max"] = round(float(values.max()), 3)
+    return stats
+
+
+def git_revision() -> Optional[str]:
+    """Commit actual del repositorio (None si no es un checkout de git)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    """Datos de la máquina para comparar resultados entre corridas"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+
+def save_results(results: Dict, path: Optional[str] = None) -> str:
+    """Guardar los resultados en JSON (por defecto en benchmarks/results/)"""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        name = f"{results['benchmark']}-{results.get('git') or 'nogit'}-{stamp}.json"
+        path = os.path.join(RESULTS_DIR, name)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    return path
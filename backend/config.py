@@ -0,0 +1,199 @@
+"""
+Configuración del backend leída desde variables de entorno
+Todos los valores tienen un default razonable para desarrollo local
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Cargar variables de entorno (.env) antes de leer la configuración
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    """Leer un entero del entorno, usando el default si no es válido"""
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Leer un float del entorno, usando el default si no es válido"""
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Leer un booleano del entorno (1/true/yes/on)"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_str(name: str, default: str) -> str:
+    """Leer un texto del entorno"""
+    return os.environ.get(name, default)
+
+
+# ====== SESIONES ======
+# Segundos sin actividad antes de expulsar una sesión
+SESSION_IDLE_TIMEOUT = _env_float("SESSION_IDLE_TIMEOUT", 300.0)
+# Intervalo del barrido de sesiones inactivas
+SESSION_SWEEP_INTERVAL = _env_float("SESSION_SWEEP_INTERVAL", 30.0)
+# Máximo de sesiones simultáneas en un proceso
+MAX_SESSIONS = _env_int("MAX_SESSIONS", 100)
+
+# ====== MOTOR DE INFERENCIA ======
+# "thread": visión y modelo en hilos / "process": visión en procesos separados
+INFERENCE_MODE = _env_str("INFERENCE_MODE", "thread")
+# Workers del pool de ejecución
+INFERENCE_WORKERS = _env_int("INFERENCE_WORKERS", min(4, os.cpu_count() or 1))
+# Frames en vuelo como máximo antes de aplicar backpressure
+INFERENCE_MAX_PENDING = _env_int("INFERENCE_MAX_PENDING", 2 * INFERENCE_WORKERS)
+
+# Backend del clasificador: keras, tf_function, tflite u onnx
+INFERENCE_BACKEND = _env_str("INFERENCE_BACKEND", "tf_function")
+# Ventana de micro-batching de predicciones entre sesiones (0 = desactivado)
+BATCH_WINDOW_MS = _env_float("BATCH_WINDOW_MS", 8.0)
+# Tamaño máximo de cada batch
+BATCH_MAX_SIZE = _env_int("BATCH_MAX_SIZE", 32)
+
+# Hilos que generan oraciones con el LLM en segundo plano
+SENTENCE_WORKERS = _env_int("SENTENCE_WORKERS", 2)
+# Traducción parcial en cada seña nueva (mensajes sentence_partial)
+SENTENCE_INCREMENTAL = _env_bool("SENTENCE_INCREMENTAL", True)
+
+# ====== DECISIÓN DE SEÑAS ======
+# Frames entre predicciones del clasificador (el suavizado evita el parpadeo)
+PREDICTION_STRIDE = _env_int("PREDICTION_STRIDE", 2)
+# Suavizado de las probabilidades: "ema" (media exponencial) o "window" (media móvil)
+DECISION_SMOOTHING = _env_str("DECISION_SMOOTHING", "ema")
+# Peso de la predicción nueva en la EMA
+DECISION_ALPHA = _env_float("DECISION_ALPHA", 0.5)
+# Predicciones de la media móvil y de la votación
+DECISION_WINDOW = _env_int("DECISION_WINDOW", 4)
+# Votos (argmax crudos) que necesita una seña en la ventana para confirmarse
+DECISION_MIN_VOTES = _env_int("DECISION_MIN_VOTES", 2)
+# Probabilidad suavizada para confirmar una seña y margen para soltarla (histéresis)
+DECISION_ENTER_THRESHOLD = _env_float("DECISION_ENTER_THRESHOLD", 0.60)
+DECISION_HYSTERESIS = _env_float("DECISION_HYSTERESIS", 0.20)
+# Energía de movimiento de las manos (desplazamiento medio por frame) bajo la
+# cual se consideran quietas, y frames quietos que cierran la seña en curso
+SPOTTER_REST_ENERGY = _env_float("SPOTTER_REST_ENERGY", 0.004)
+SPOTTER_REST_FRAMES = _env_int("SPOTTER_REST_FRAMES", 3)
+
+# ====== COMPUERTAS DE MOVIMIENTO ======
+# No llamar al clasificador con las manos quietas (se mantiene la última decisión)
+MOTION_GATE_ENABLED = _env_bool("MOTION_GATE_ENABLED", True)
+# Ventanas seguidas que se pueden saltar antes de puntuar una igual
+MOTION_GATE_MAX_SKIPS = _env_int("MOTION_GATE_MAX_SKIPS", 10)
+# Diferencia media de la imagen (0-255) bajo la cual se reutiliza la salida de MediaPipe (0 = desactivado)
+FRAME_GATE_THRESHOLD = _env_float("FRAME_GATE_THRESHOLD", 2.0)
+# Frames seguidos que se pueden reutilizar antes de volver a pasar por MediaPipe
+FRAME_GATE_MAX_SKIPS = _env_int("FRAME_GATE_MAX_SKIPS", 5)
+
+# ====== LLM ======
+# Proveedor: "groq" (SDK), "openai" (API compatible con OpenAI vía httpx) o "none"
+LLM_PROVIDER = _env_str("LLM_PROVIDER", "groq")
+LLM_MODEL = _env_str("LLM_MODEL", "llama-3.1-8b-instant")
+# URL base para "openai" (p. ej. http://127.0.0.1:8100/v1 con mock_llm_server.py)
+LLM_BASE_URL = _env_str("LLM_BASE_URL", "")
+# API key (por defecto GROQ_API_KEY)
+LLM_API_KEY = _env_str("LLM_API_KEY", "")
+# Timeout por llamada en segundos y reintentos ante errores de red, 429 y 5xx
+LLM_TIMEOUT = _env_float("LLM_TIMEOUT", 10.0)
+LLM_MAX_RETRIES = _env_int("LLM_MAX_RETRIES", 2)
+# Conexiones keep-alive en el pool del proveedor
+LLM_MAX_CONNECTIONS = _env_int("LLM_MAX_CONNECTIONS", 10)
+
+# ====== MOTOR LOCAL DE ORACIONES ======
+# Traducir localmente las frases conocidas antes de consultar al LLM
+GLOSS_ENGINE_ENABLED = _env_bool("GLOSS_ENGINE_ENABLED", True)
+# Confianza mínima de la traducción local para no escalar al LLM
+GLOSS_ENGINE_THRESHOLD = _env_float("GLOSS_ENGINE_THRESHOLD", 0.75)
+
+# ====== CACHÉ DE ORACIONES ======
+# Oraciones en memoria como máximo (LRU)
+SENTENCE_CACHE_SIZE = _env_int("SENTENCE_CACHE_SIZE", 1024)
+# Vida de cada oración en segundos (0 = sin vencimiento)
+SENTENCE_CACHE_TTL = _env_float("SENTENCE_CACHE_TTL", 30 * 24 * 3600.0)
+# Archivo SQLite para persistir la caché ("" = solo memoria)
+SENTENCE_CACHE_PATH = _env_str("SENTENCE_CACHE_PATH", os.path.join(os.path.dirname(__file__), "sentence_cache.db"))
+
+# ====== RECURSOS COMPARTIDOS ======
+# Instancias de MediaPipe Holistic compartidas entre sesiones (una por worker)
+HOLISTIC_POOL_SIZE = _env_int("HOLISTIC_POOL_SIZE", INFERENCE_WORKERS)
+
+# ====== ETAPA DE VISIÓN ======
+# Pipeline de MediaPipe: "holistic" o "hands" (Hands + Pose lite, sin malla de la cara)
+VISION_PIPELINE = _env_str("VISION_PIPELINE", "holistic")
+# Tiempo de visión objetivo por frame y sesión; model_complexity se ajusta para cumplirlo (0 = fija en 1)
+VISION_LATENCY_BUDGET_MS = _env_float("VISION_LATENCY_BUDGET_MS", 40.0)
+# Rango de model_complexity (0, 1 o 2) que puede elegir cada sesión
+VISION_MIN_COMPLEXITY = _env_int("VISION_MIN_COMPLEXITY", 0)
+VISION_MAX_COMPLEXITY = _env_int("VISION_MAX_COMPLEXITY", 2)
+# Lado mayor máximo en píxeles de la imagen que entra a Holistic (0 = sin reescalar)
+VISION_TARGET_SIZE = _env_int("VISION_TARGET_SIZE", 480)
+# Recortar alrededor de los hombros y las manos del frame anterior
+VISION_ROI_ENABLED = _env_bool("VISION_ROI_ENABLED", True)
+# Margen del recorte como fracción del tamaño de la caja
+VISION_ROI_MARGIN = _env_float("VISION_ROI_MARGIN", 0.3)
+
+# ====== GRABACIÓN DE KEYPOINTS ======
+# Guardar el stream de keypoints de cada sesión en formato .kps
+RECORDING_ENABLED = _env_bool("RECORDING_ENABLED", False)
+RECORDING_DIR = _env_str("RECORDING_DIR", os.path.join(os.path.dirname(__file__), "recordings"))
+# float16 (la mitad de espacio) o float32
+RECORDING_DTYPE = _env_str("RECORDING_DTYPE", "float16")
+# Frames por archivo como máximo y frames seguidos sin manos que cierran un segmento
+RECORDING_CHUNK_FRAMES = _env_int("RECORDING_CHUNK_FRAMES", 900)
+RECORDING_GAP_FRAMES = _env_int("RECORDING_GAP_FRAMES", 15)
+# Frames con manos mínimos para guardar un segmento
+RECORDING_MIN_FRAMES = _env_int("RECORDING_MIN_FRAMES", 30)
+
+# ====== CLIPS DEL AVATAR ======
+# Clips JSON de origen y carpeta de los .kps que se sirven en /api/avatar/clips
+AVATAR_CLIPS_DIR = _env_str(
+    "AVATAR_CLIPS_DIR", os.path.join(os.path.dirname(__file__), "..", "src", "components", "avatar", "animaciones")
+)
+AVATAR_ASSETS_DIR = _env_str("AVATAR_ASSETS_DIR", os.path.join(os.path.dirname(__file__), "avatar_assets"))
+# float16 (la mitad de espacio) o float32
+AVATAR_ASSET_DTYPE = _env_str("AVATAR_ASSET_DTYPE", "float16")
+# Cache-Control de los clips (el navegador revalida con el ETag al vencer)
+AVATAR_ASSET_MAX_AGE = _env_int("AVATAR_ASSET_MAX_AGE", 3600)
+
+# ====== COMPOSICIÓN DE SEÑAS ======
+# fps de las animaciones compuestas en /api/avatar/compose
+COMPOSER_FPS = _env_float("COMPOSER_FPS", 30.0)
+# Frames de mezcla entre una seña y la siguiente (0 = corte directo)
+COMPOSER_BLEND_FRAMES = _env_int("COMPOSER_BLEND_FRAMES", 6)
+# Composiciones en caché por secuencia de glosas (0 = sin caché)
+COMPOSER_CACHE_SIZE = _env_int("COMPOSER_CACHE_SIZE", 128)
+# Límites de cada pedido (fuera de rango: 400)
+COMPOSER_MAX_FPS = _env_float("COMPOSER_MAX_FPS", 120.0)
+COMPOSER_MIN_SPEED = _env_float("COMPOSER_MIN_SPEED", 0.25)
+COMPOSER_MAX_SPEED = _env_float("COMPOSER_MAX_SPEED", 4.0)
+COMPOSER_MAX_GLOSSES = _env_int("COMPOSER_MAX_GLOSSES", 32)
+
+# ====== MÉTRICAS ======
+# Contadores e histogramas por etapa expuestos en /metrics (formato Prometheus)
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+
+# ====== LOGGING ======
+# Entorno: "development" o "production" (define los defaults de abajo)
+APP_ENV = _env_str("APP_ENV", "development")
+_PRODUCTION = APP_ENV == "production"
+# Nivel de log (DEBUG incluye los eventos por frame, muestreados)
+LOG_LEVEL = _env_str("LOG_LEVEL", "INFO" if _PRODUCTION else "DEBUG")
+# Formato: "text" (legible) o "json" (una línea JSON por evento)
+LOG_FORMAT = _env_str("LOG_FORMAT", "json" if _PRODUCTION else "text")
+# Eventos por frame registrados por segundo y por sesión como máximo
+LOG_FRAME_SAMPLE_RATE = _env_float("LOG_FRAME_SAMPLE_RATE", 1.0)
+# Guardar uno de cada N frames en DEBUG_FRAMES_DIR (0 = desactivado)
+DEBUG_FRAMES_EVERY = _env_int("DEBUG_FRAMES_EVERY", 0 if _PRODUCTION else 100)
+DEBUG_FRAMES_DIR = _env_str("DEBUG_FRAMES_DIR", os.path.join(os.path.dirname(__file__), "debug_frames"))
@@ -0,0 +1,180 @@
+"""
+Motor de decisión de señas
+Convierte la serie de vectores softmax del clasificador en señas confirmadas,
+sin el parpadeo de tomar el argmax de cada predicción suelta:
+
+- Suavizado temporal de las probabilidades: media exponencial (EMA) o
+  media de las últimas N predicciones
+- Votación: la seña tiene que ganar la mayoría de las últimas predicciones
+  crudas (como el deque de Traine/Senia.py)
+- Histéresis: una seña se confirma al superar enter_threshold y sigue activa
+  hasta caer por debajo de exit_threshold, así que no se repite ni parpadea
+  mientras se mantiene y puede volver a confirmarse después de soltarla
+- Confianza real: la probabilidad suavizada de la seña
+
+release() termina la seña activa antes de tiempo (p. ej. cuando sign_spotter.py
+detecta que las manos se detuvieron). La seña queda bloqueada hasta que su
+probabilidad baja, así que mantener la pose no la repite.
+"""
+
+from collections import deque
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+SMOOTHING_MODES = ("ema", "window")
+
+
+class Decision(NamedTuple):
+    """Resultado de una actualización del motor"""
+    index: Optional[int]       # Seña activa (None si no hay ninguna)
+    confidence: float          # Probabilidad suavizada de la seña activa (o de la mejor)
+    is_new: bool = False       # La seña se acaba de confirmar
+    released: bool = False     # La seña activa anterior se acaba de soltar
+
+
+class DecisionEngine:
+    """
+    Suavizado + votación + histéresis sobre las probabilidades de una sesión
+    """
+
+    def __init__(
+        self,
+        smoothing: str = "ema",
+        alpha: float = 0.5,
+        window: int = 4,
+        enter_threshold: float = 0.60,
+        hysteresis: float = 0.20,
+        min_votes: int = 2,
+        stride: int = 2
+    ):
+        """
+        Args:
+            smoothing: "ema" (media exponencial) o "window" (media de las últimas `window`)
+            alpha: Peso de la predicción nueva en la EMA (1 = sin suavizado)
+            window: Predicciones que se promedian (modo window) y que votan
+            enter_threshold: Probabilidad suavizada para confirmar una seña
+            hysteresis: Margen bajo enter_threshold para soltar la seña activa
+            min_votes: Votos (argmax crudos) que necesita una seña para confirmarse
+            stride: Frames entre predicciones
+        """
+        if smoothing not in SMOOTHING_MODES:
+            raise ValueError(f"Suavizado desconocido: {smoothing} (opciones: {', '.join(SMOOTHING_MODES)})")
+        self.smoothing = smoothing
+        self.alpha = min(1.0, max(0.01, alpha))
+        self.window = max(1, window)
+        self.enter_threshold = enter_threshold
+        self.hysteresis = max(0.0, hysteresis)
+        self.min_votes = min(max(1, min_votes), self.window)
+        self.stride = max(1, stride)
+
+        self._votes: deque = deque(maxlen=self.window)
+        self._history: deque = deque(maxlen=self.window)
+        self._sum: Optional[np.ndarray] = None
+        self._smoothed: Optional[np.ndarray] = None
+        self.active: Optional[int] = None
+        self._blocked: Optional[int] = None
+
+        # Estadísticas
+        self.updates = 0
+        self.commits = 0
+        self.releases = 0
+
+    @property
+    def exit_threshold(self) -> float:
+        """Probabilidad suavizada por debajo de la cual se suelta la seña activa"""
+        return max(0.0, self.enter_threshold - self.hysteresis)
+
+    def _smooth(self, probs: np.ndarray) -> np.ndarray:
+        """Incorporar una predicción a la media"""
+        if self.smoothing == "ema":
+            if self._smoothed is None or self._smoothed.shape != probs.shape:
+                self._smoothed = probs.copy()
+            else:
+                self._smoothed *= 1.0 - self.alpha
+                self._smoothed += self.alpha * probs
+            return self._smoothed
+
+        # Media móvil con suma acumulada (sin recorrer la ventana en cada paso)
+        if self._sum is None or self._sum.shape != probs.shape:
+            self._sum = np.zeros_like(probs)
+            self._history.clear()
+        if len(self._history) == self.window:
+            self._sum -= self._history[0]
+        self._history.append(probs)
+        self._sum += probs
+        self._smoothed = self._sum / len(self._history)
+        return self._smoothed
+
+    def update(self, probs: np.ndarray) -> Decision:
+        """
+        Avanzar con el vector de probabilidades de una predicción
+
+        Args:
+            probs: Salida softmax del clasificador (clases,)
+
+        Returns:
+            Decision con la seña activa y su confianza suavizada
+        """
+        probs = np.asarray(probs, dtype=np.float32).ravel()
+        self.updates += 1
+        self._votes.append(int(np.argmax(probs)))
+        smoothed = self._smooth(probs)
+
+        if self._blocked is not None and smoothed[self._blocked] < self.exit_threshold:
+            self._blocked = None
+
+        released = False
+        if self.active is not None:
+            confidence = float(smoothed[self.active])
+            if confidence >= self.exit_threshold:
+                return Decision(self.active, confidence)
+            # La seña activa se desvaneció: queda libre para la siguiente (o la misma)
+            self.active = None
+            self.releases += 1
+            released = True
+
+        best = int(np.argmax(smoothed))
+        confidence = float(smoothed[best])
+        if (best != self._blocked and confidence >= self.enter_threshold and
+                self._votes.count(best) >= self.min_votes):
+            self.active = best
+            self.commits += 1
+            return Decision(best, confidence, is_new=True, released=released)
+
+        return Decision(None, confidence, released=released)
+
+    def release(self) -> Optional[int]:
+        """
+        Soltar la seña activa sin esperar a que baje su probabilidad
+
+        Returns:
+            Índice de la seña soltada (None si no había)
+        """
+        released = self.active
+        if released is not None:
+            self.active = None
+            self._blocked = released
+            self.releases += 1
+        return released
+
+    def reset(self):
+        """Olvidar el historial (p. ej. al bajar las manos)"""
+        self._votes.clear()
+        self._history.clear()
+        self._sum = None
+        self._smoothed = None
+        self.active = None
+        self._blocked = None
+
+    def get_stats(self) -> Dict:
+        """Configuración y contadores"""
+        return {
+            "smoothing": self.smoothing,
+            "stride": self.stride,
+            "enter_threshold": self.enter_threshold,
+            "exit_threshold": round(self.exit_threshold, 4),
+            "updates": self.updates,
+            "commits": self.commits,
+            "releases": self.releases
+        }
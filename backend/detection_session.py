@@ -0,0 +1,351 @@
+"""
+Sesiones de detección por conexión
+Cada cliente tiene su propio estado ligero (secuencia, cooldowns, oración)
+mientras que MediaPipe y el modelo se comparten desde SignLanguageDetector
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from decision_engine import DecisionEngine
+from keypoints import NUM_FEATURES
+from motion_gate import FrameGate
+from sequence_buffer import MODEL_FRAMES, KeypointRingBuffer
+from sign_spotter import SignSpotter
+from vision_stage import AdaptiveVision
+
+# El modo preciso exige este margen por encima del umbral configurado
+PRECISE_THRESHOLD_DELTA = 0.10
+
+
+class DetectionSession:
+    """
+    Estado de detección de un único cliente
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        sentence_builder=None,
+        spotter: Optional[SignSpotter] = None,
+        frame_gate: Optional[FrameGate] = None,
+        vision: Optional[AdaptiveVision] = None,
+        recorder=None
+    ):
+        """
+        Inicializar el estado de la sesión
+
+        Args:
+            session_id: Identificador único de la sesión
+            sentence_builder: SentenceBuilder propio de la sesión (opcional)
+            spotter: Segmentador propio de la sesión (por defecto uno con la configuración base)
+            frame_gate: Compuerta de movimiento de la etapa de visión (por defecto la configuración base)
+            vision: ROI, reescalado y complejidad de MediaPipe de la sesión (por defecto la configuración base)
+            recorder: KeypointRecorder que guarda el stream de keypoints (None = sin grabar)
+        """
+        self.session_id = session_id
+
+        # Configuración del sistema (optimizada para flujo continuo)
+        self.NUM_FRAMES = 10  # Frames por secuencia (más rápido)
+
+        # Ventanas superpuestas, suavizado e histéresis sobre las probabilidades del modelo
+        self.spotter = spotter or SignSpotter(DecisionEngine())
+        self.spotter.resize(self.NUM_FRAMES)
+        self.decision = self.spotter.decision
+        self.CONFIDENCE_THRESHOLD = self.decision.enter_threshold
+
+        # Umbral configurado (DECISION_ENTER_THRESHOLD): base de ambos modos
+        self.base_threshold = self.decision.enter_threshold
+
+        # Reutiliza la salida de MediaPipe mientras la imagen no cambia
+        self.frame_gate = frame_gate or FrameGate()
+
+        # Etapa de visión adaptativa (recorte alrededor de las manos y presupuesto de latencia)
+        self.vision = vision or AdaptiveVision()
+
+        # Estados del sistema
+        self.state = "WAIT_HANDS"
+        self.sequence = KeypointRingBuffer(self.NUM_FRAMES)
+        self.predicted_label = ""
+        self.predicted_confidence = 0.0
+
+        # Entrada del modelo preasignada (se reutiliza en cada predicción)
+        self.model_input = np.empty((MODEL_FRAMES, NUM_FEATURES), dtype=np.float32)
+
+        # Control de flujo continuo
+        self.last_prediction_time = 0
+        self.cooldown_seconds = 1.5  # Tiempo que se sigue mostrando la última seña
+        self.continuous_mode = True
+
+        # Constructor de oraciones propio de la sesión
+        self.sentence_builder = sentence_builder
+
+        # Grabación del stream de keypoints (opcional)
+        self.recorder = recorder
+        # Etiqueta pedida desde el event loop (append/popleft de deque son atómicos)
+        self._pending_label: Deque[Optional[str]] = deque(maxlen=1)
+
+        # Serializa el avance del estado si llegan frames desde varios workers
+        self.lock = threading.Lock()
+
+        # Actividad (para expulsar sesiones inactivas)
+        self.created_at = time.time()
+        self.last_activity = self.created_at
+
+        # True una vez expulsada o cerrada: la conexión debe terminar
+        self.closed = False
+
+    def touch(self):
+        """Marcar actividad en la sesión"""
+        self.last_activity = time.time()
+
+    def idle_seconds(self, now: Optional[float] = None) -> float:
+        """Segundos desde la última actividad"""
+        return (now or time.time()) - self.last_activity
+
+    def set_continuous_mode(self, enabled: bool):
+        """Habilitar/deshabilitar modo continuo"""
+        self.continuous_mode = enabled
+        if enabled:
+            self.cooldown_seconds = 1.5  # Más rápido
+            self.NUM_FRAMES = 8  # Menos frames para más velocidad
+            self.CONFIDENCE_THRESHOLD = self.base_threshold
+        else:
+            self.cooldown_seconds = 3.0  # Más lento pero preciso
+            self.NUM_FRAMES = 15
+            self.CONFIDENCE_THRESHOLD = min(0.95, self.base_threshold + PRECISE_THRESHOLD_DELTA)
+        self.decision.enter_threshold = self.CONFIDENCE_THRESHOLD
+        self.sequence.resize(self.NUM_FRAMES)
+        self.spotter.resize(self.NUM_FRAMES)
+
+    def reset(self):
+        """Volver al estado inicial sin tocar la configuración"""
+        self.state = "WAIT_HANDS"
+        self.sequence.clear()
+        self.spotter.flush()
+        self.spotter.clear()
+        self.frame_gate.reset()
+        self.vision.reset()
+        self.predicted_label = ""
+        self.predicted_confidence = 0.0
+        self.last_prediction_time = 0
+        if self.sentence_builder:
+            self.sentence_builder.clear_buffer()
+
+    def queue_label(self, label: Optional[str]):
+        """
+        Pedir una etiqueta de grabación nueva sin tomar el lock
+
+        Se aplica en el próximo frame (apply_pending_label), así el event loop
+        no espera a que termine el frame en curso.
+        """
+        self._pending_label.append(label or None)
+
+    def apply_pending_label(self):
+        """Aplicar la etiqueta pedida con queue_label (requiere self.lock)"""
+        try:
+            label = self._pending_label.popleft()
+        except IndexError:
+            return
+        if self.recorder is not None:
+            self.recorder.set_label(label)
+
+    def close(self):
+        """Liberar la sesión: guarda lo que quede grabado"""
+        self.closed = True
+        if self.recorder is not None:
+            with self.lock:
+                self.recorder.close()
+
+    def get_info(self) -> Dict:
+        """Resumen de la sesión para la API"""
+        info = {
+            "session_id": self.session_id,
+            "created_at": self.created_at,
+            "idle_seconds": round(self.idle_seconds(), 1),
+            "continuous_mode": self.continuous_mode,
+            "buffer_status": f"{len(self.sequence)}/{self.NUM_FRAMES} frames",
+            "signs_count": len(self.sentence_builder.signs_buffer) if self.sentence_builder else 0,
+            "spotter": self.spotter.get_stats(),
+            "frame_gate": self.frame_gate.get_stats(),
+            "vision": self.vision.get_stats()
+        }
+        if self.recorder is not None:
+            info["recording"] = self.recorder.get_stats()
+        return info
+
+
+class SessionManager:
+    """
+    Registro de sesiones activas con expulsión de las inactivas
+    """
+
+    def __init__(
+        self,
+        sentence_builder_factory: Optional[Callable[[], object]] = None,
+        idle_timeout: float = 300.0,
+        max_sessions: int = 100,
+        spotter_factory: Optional[Callable[[], SignSpotter]] = None,
+        frame_gate_factory: Optional[Callable[[], FrameGate]] = None,
+        vision_factory: Optional[Callable[[], AdaptiveVision]] = None,
+        recorder_factory: Optional[Callable[[str], object]] = None,
+        on_close: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Args:
+            sentence_builder_factory: Crea un SentenceBuilder por sesión (opcional)
+            idle_timeout: Segundos sin actividad antes de expulsar una sesión
+            max_sessions: Máximo de sesiones simultáneas
+            spotter_factory: Crea el SignSpotter de cada sesión (opcional)
+            frame_gate_factory: Crea el FrameGate de cada sesión (opcional)
+            vision_factory: Crea el AdaptiveVision de cada sesión (opcional)
+            recorder_factory: Crea el KeypointRecorder de una sesión a partir de su id (opcional)
+            on_close: Se llama con el id de cada sesión cerrada o expulsada (libera
+                recursos asociados fuera de la sesión, p. ej. la afinidad de MediaPipe)
+        """
+        self.sentence_builder_factory = sentence_builder_factory
+        self.spotter_factory = spotter_factory
+        self.frame_gate_factory = frame_gate_factory
+        self.vision_factory = vision_factory
+        self.recorder_factory = recorder_factory
+        self.on_close = on_close
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: Dict[str, DetectionSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self, session_id: Optional[str] = None) -> DetectionSession:
+        """
+        Crear y registrar una nueva sesión
+
+        Args:
+            session_id: Identificador a usar (se genera uno si no se pasa)
+
+        Returns:
+            La sesión creada
+        """
+        self.evict_idle()
+
+        sentence_builder = None
+        if self.sentence_builder_factory:
+            try:
+                sentence_builder = self.sentence_builder_factory()
+            except Exception as e:
+                print(f"⚠️ Error creando SentenceBuilder de sesión: {e}")
+
+        spotter = self.spotter_factory() if self.spotter_factory else None
+        frame_gate = self.frame_gate_factory() if self.frame_gate_factory else None
+        vision = self.vision_factory() if self.vision_factory else None
+        session_id = session_id or uuid.uuid4().hex
+        recorder = self.recorder_factory(session_id) if self.recorder_factory else None
+        session = DetectionSession(session_id, sentence_builder, spotter, frame_gate, vision, recorder)
+
+        with self._lock:
+            # Si se llegó al límite, expulsar la sesión menos reciente
+            if len(self._sessions) >= self.max_sessions:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_activity)
+                self._sessions.pop(oldest.session_id, None)
+                print(f"♻️ Sesión expulsada por límite: {oldest.session_id}")
+            else:
+                oldest = None
+            self._sessions[session.session_id] = session
+
+        if oldest is not None:
+            self._release(oldest)
+        return session
+
+    def get(self, session_id: Optional[str]) -> Optional[DetectionSession]:
+        """Obtener una sesión por id (None si no existe)"""
+        if not session_id:
+            return None
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def touch(self, session: DetectionSession):
+        """
+        Marcar actividad en la sesión
+
+        Una sesión expulsada no se vuelve a registrar: queda con closed=True
+        y su conexión debe terminar.
+        """
+        session.touch()
+
+    def close(self, session_id: str) -> bool:
+        """Eliminar una sesión del registro"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._release(session)
+        return True
+
+    def _release(self, session: DetectionSession):
+        """Cerrar una sesión ya quitada del registro"""
+        session.close()
+        if self.on_close is not None:
+            try:
+                self.on_close(session.session_id)
+            except Exception as e:
+                print(f"⚠️ Error liberando la sesión {session.session_id}: {e}")
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """
+        Expulsar las sesiones sin actividad durante más de idle_timeout
+
+        Returns:
+            Lista de ids expulsados
+        """
+        now = now or time.time()
+        with self._lock:
+            expired = [
+                sid for sid, session in self._sessions.items()
+                if session.idle_seconds(now) > self.idle_timeout
+            ]
+            evicted = [self._sessions.pop(sid) for sid in expired]
+
+        for session in evicted:
+            self._release(session)
+            print(f"♻️ Sesión inactiva expulsada: {session.session_id}")
+        return expired
+
+    async def run_eviction_loop(self, interval: float = 30.0):
+        """Barrido periódico de sesiones inactivas (tarea de fondo)"""
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def list_sessions(self) -> List[Dict]:
+        """Resumen de todas las sesiones activas"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [session.get_info() for session in sessions]
+
+    def close_all(self):
+        """Cerrar todas las sesiones (al apagar el servidor)"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._release(session)
+
+    def motion_stats(self) -> Dict:
+        """Trabajo ahorrado por las compuertas de movimiento de todas las sesiones activas"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        stats = {"frames": 0, "frames_skipped": 0, "windows_scored": 0, "windows_skipped": 0}
+        for session in sessions:
+            stats["frames"] += session.frame_gate.frames
+            stats["frames_skipped"] += session.frame_gate.skipped
+            stats["windows_scored"] += session.spotter.windows_scored
+            stats["windows_skipped"] += session.spotter.windows_skipped
+        return stats
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
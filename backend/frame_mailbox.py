@@ -0,0 +1,98 @@
+"""
+Buzón de un solo espacio para frames entrantes ("el último frame gana")
+Si el servidor va más lento que la cámara, los frames viejos se descartan
+en lugar de acumularse, así la latencia extremo a extremo queda acotada
+
+Los lotes de keypoints del cliente son la excepción: pesan poco y cada
+frame cuenta para la ventana del modelo y la energía de movimiento, así que
+los lotes pendientes se concatenan (hasta `max_keypoint_frames`, los más
+recientes) en lugar de reemplazarse.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from frame_protocol import KeypointBatch
+from metrics import FRAMES_DROPPED, FRAMES_RECEIVED
+from sequence_buffer import MODEL_FRAMES
+
+
+class MailboxClosed(Exception):
+    """El buzón se cerró (el cliente se desconectó)"""
+
+
+class LatestFrameMailbox:
+    """
+    Buzón con capacidad 1: put() reemplaza el frame pendiente si lo hay
+    """
+
+    def __init__(self, max_keypoint_frames: int = MODEL_FRAMES):
+        """
+        Args:
+            max_keypoint_frames: Frames de keypoints pendientes como máximo al juntar lotes
+        """
+        self.max_keypoint_frames = max(1, max_keypoint_frames)
+        self._item: Optional[Any] = None
+        self._has_item = asyncio.Event()
+        self._closed = False
+
+        # Contadores para informar al cliente
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.merged = 0
+
+    def put(self, item: Any):
+        """Depositar un frame, descartando el anterior si no se procesó"""
+        if self._closed:
+            return
+        self.received += 1
+        FRAMES_RECEIVED.inc()
+        if self._has_item.is_set():
+            pending = self._item
+            if isinstance(pending, KeypointBatch) and isinstance(item, KeypointBatch):
+                # Juntar los lotes: solo se pierden los frames más viejos que la ventana
+                keypoints = np.concatenate((pending.keypoints, item.keypoints))[-self.max_keypoint_frames:]
+                item = item._replace(keypoints=keypoints)
+                self.merged += 1
+            else:
+                self.dropped += 1
+                FRAMES_DROPPED.inc()
+        self._item = item
+        self._has_item.set()
+
+    async def get(self) -> Any:
+        """
+        Esperar y tomar el frame más reciente
+
+        Raises:
+            MailboxClosed: Si el buzón se cerró
+        """
+        await self._has_item.wait()
+        if self._closed:
+            raise MailboxClosed()
+        item = self._item
+        self._item = None
+        self._has_item.clear()
+        return item
+
+    def mark_processed(self):
+        """Registrar que un frame terminó de procesarse"""
+        self.processed += 1
+
+    def close(self):
+        """Cerrar el buzón y despertar al consumidor"""
+        self._closed = True
+        self._item = None
+        self._has_item.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Contadores de frames recibidos, procesados y descartados"""
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "merged": self.merged
+        }
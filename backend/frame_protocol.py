@@ -0,0 +1,194 @@
+"""
+Protocolo de mensajes para /ws/detect
+
+Mensajes binarios (recomendado):
+    Cabecera de 18 bytes little-endian seguida del payload crudo
+    | magic "CS" (2) | versión u8 | tipo u8 | formato u8 | relleno (1) | seq u32 | timestamp_ms f64 |
+
+    Tipo 1 (imagen): payload = JPEG/WebP/PNG
+    Tipo 2 (keypoints): payload = N frames x 135 float32 (pose 9 + mano izq 63 + mano der 63)
+
+Mensajes de texto JSON (compatibilidad):
+    {"type": "frame", "image": "data:image/jpeg;base64,..."}
+    {"type": "keypoints", "keypoints": [135 floats] o [[135 floats], ...]}
+"""
+
+import base64
+import struct
+from typing import NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+MAGIC = b"CS"
+PROTOCOL_VERSION = 1
+
+# Tipos de mensaje binario
+MSG_IMAGE = 1
+MSG_KEYPOINTS = 2
+
+# Formatos de imagen
+FORMAT_JPEG = 1
+FORMAT_WEBP = 2
+FORMAT_PNG = 3
+IMAGE_FORMATS = {FORMAT_JPEG: "jpeg", FORMAT_WEBP: "webp", FORMAT_PNG: "png"}
+
+# Layout de keypoints (igual que extract_keypoints): pose 3x3 + 2 manos 21x3
+POSE_FEATURES = 9
+NUM_KEYPOINT_FEATURES = 135
+KEYPOINT_DTYPE = np.dtype("<f4")
+
+HEADER = struct.Struct("<2sBBBxId")
+HEADER_SIZE = HEADER.size
+
+
+class FrameProtocolError(ValueError):
+    """Mensaje binario mal formado"""
+
+
+class BinaryFrame(NamedTuple):
+    """Mensaje binario ya separado en cabecera y payload"""
+    msg_type: int
+    format: int
+    seq: int
+    timestamp: float
+    payload: memoryview
+
+
+class KeypointBatch(NamedTuple):
+    """Keypoints del cliente ya decodificados (binario o JSON), con los datos del último frame"""
+    keypoints: np.ndarray
+    seq: Optional[int]
+    timestamp: Optional[float]
+
+
+def parse_binary_message(data: bytes) -> BinaryFrame:
+    """
+    Separar cabecera y payload sin copiar los bytes de la imagen
+
+    Args:
+        data: Mensaje binario recibido por el WebSocket
+
+    Returns:
+        BinaryFrame con un memoryview sobre el payload
+
+    Raises:
+        FrameProtocolError: Si la cabecera no es válida
+    """
+    if len(data) < HEADER_SIZE:
+        raise FrameProtocolError(f"Mensaje binario demasiado corto ({len(data)} bytes)")
+
+    magic, version, msg_type, fmt, seq, timestamp = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise FrameProtocolError("Cabecera binaria inválida (magic)")
+    if version != PROTOCOL_VERSION:
+        raise FrameProtocolError(f"Versión de protocolo no soportada: {version}")
+
+    return BinaryFrame(msg_type, fmt, seq, timestamp, memoryview(data)[HEADER_SIZE:])
+
+
+def pack_binary_message(msg_type: int, payload: bytes, seq: int = 0,
+                        timestamp: float = 0.0, fmt: int = 0) -> bytes:
+    """
+    Construir un mensaje binario (lo usan clientes de prueba y benchmarks)
+
+    Args:
+        msg_type: Tipo de mensaje (MSG_IMAGE, ...)
+        payload: Bytes del contenido
+        seq: Número de secuencia del frame
+        timestamp: Marca de tiempo del cliente en milisegundos
+        fmt: Formato del payload (FORMAT_JPEG, ...)
+    """
+    return HEADER.pack(MAGIC, PROTOCOL_VERSION, msg_type, fmt, seq & 0xFFFFFFFF, timestamp) + bytes(payload)
+
+
+def decode_image(payload) -> Optional[np.ndarray]:
+    """
+    Decodificar JPEG/WebP/PNG directamente desde el buffer (sin copias intermedias)
+
+    Args:
+        payload: bytes o memoryview con la imagen comprimida
+
+    Returns:
+        Frame BGR o None si no se pudo decodificar
+    """
+    nparr = np.frombuffer(payload, np.uint8)
+    if nparr.size == 0:
+        return None
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+def decode_data_url(image: str) -> Optional[np.ndarray]:
+    """
+    Decodificar una imagen en base64 (con o sin prefijo data URL) del protocolo JSON
+
+    Args:
+        image: Texto "data:image/jpeg;base64,..." o base64 crudo
+
+    Returns:
+        Frame BGR o None si no se pudo decodificar
+    """
+    image_data = image.split(",", 1)[1] if "," in image else image
+    return decode_image(base64.b64decode(image_data))
+
+
+def decode_keypoints(payload) -> np.ndarray:
+    """
+    Interpretar un payload binario de keypoints sin copiarlo
+
+    Args:
+        payload: bytes o memoryview con N x 135 float32 little-endian
+
+    Returns:
+        Array (N, 135) de solo lectura, sin las filas con NaN o infinito
+
+    Raises:
+        FrameProtocolError: Si el tamaño no es múltiplo de un frame o ninguna fila es válida
+    """
+    frame_bytes = NUM_KEYPOINT_FEATURES * KEYPOINT_DTYPE.itemsize
+    if len(payload) == 0 or len(payload) % frame_bytes != 0:
+        raise FrameProtocolError(
+            f"Payload de keypoints inválido: {len(payload)} bytes (se esperan múltiplos de {frame_bytes})"
+        )
+    return _finite_rows(np.frombuffer(payload, dtype=KEYPOINT_DTYPE).reshape(-1, NUM_KEYPOINT_FEATURES))
+
+
+def keypoints_from_json(value) -> np.ndarray:
+    """
+    Convertir keypoints del protocolo JSON a un array (N, 135) float32
+
+    Raises:
+        FrameProtocolError: Si la forma no es (135,) ni (N, 135) o ninguna fila es válida
+    """
+    try:
+        keypoints = np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError):
+        raise FrameProtocolError("Keypoints JSON no numéricos")
+
+    keypoints = np.atleast_2d(keypoints)
+    if keypoints.ndim != 2 or keypoints.shape[1] != NUM_KEYPOINT_FEATURES or keypoints.shape[0] == 0:
+        raise FrameProtocolError(f"Forma de keypoints inválida: {keypoints.shape}")
+    return _finite_rows(keypoints)
+
+
+def _finite_rows(keypoints: np.ndarray) -> np.ndarray:
+    """Descartar los frames con NaN o infinito (romperían la ventana del modelo)"""
+    finite = np.isfinite(keypoints).all(axis=1)
+    if finite.all():
+        return keypoints
+    if not finite.any():
+        raise FrameProtocolError("Keypoints con NaN o infinito")
+    return keypoints[finite]
+
+
+def keypoints_have_hands(keypoints: np.ndarray) -> np.ndarray:
+    """
+    Detectar manos en keypoints ya extraídos (las manos ausentes van rellenas con ceros)
+
+    Args:
+        keypoints: Array (N, 135)
+
+    Returns:
+        Array booleano (N,)
+    """
+    return np.any(keypoints[:, POSE_FEATURES:] != 0, axis=1)
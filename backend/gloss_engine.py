@@ -0,0 +1,435 @@
+"""
+Motor local de glosas -> español
+Traduce secuencias del vocabulario de Traine/labels.json con una gramática
+pequeña (sujeto + querer + verbo + complemento, preguntas con "donde" e
+interjecciones), sin red y de forma determinista.
+
+Cada resultado trae una confianza: las frases que encajan en la gramática
+salen con confianza alta y se responden al instante; las que necesitan
+inferencias o no encajan bajan de confianza y se escalan al LLM.
+
+text_to_glosses() hace el camino inverso (español -> glosas) con el mismo
+léxico, para el modo texto a señas del avatar.
+
+El análisis avanza seña por seña sobre un estado inmutable (ParseState),
+así que la traducción de un prefijo se puede extender con la seña siguiente
+sin reprocesar la secuencia completa.
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# ====== LÉXICO ======
+# Personas: 0 = yo, 1 = tú, 2 = él
+PRONOUNS = {"yo": 0, "tu": 1, "el": 2}
+PRONOUN_TEXT = ("yo", "tú", "él")
+PRONOUN_SIGNS = ("yo", "tu", "el")
+
+# Conjugación en presente (yo, tú, él)
+CONJUGATIONS = {
+    "querer": ("quiero", "quieres", "quiere"),
+    "beber": ("bebo", "bebes", "bebe"),
+    "comer": ("como", "comes", "come"),
+    "ir": ("voy", "vas", "va"),
+    "venir": ("vengo", "vienes", "viene"),
+    "esperar": ("espero", "esperas", "espera"),
+    "necesitar": ("necesito", "necesitas", "necesita"),
+    "tener": ("tengo", "tienes", "tiene"),
+    "estar": ("estoy", "estás", "está"),
+}
+
+# Seña -> infinitivo
+VERBS = {"beber": "beber", "comer": "comer", "ir": "ir", "venir": "venir", "espera": "esperar"}
+MOTION_VERBS = ("ir", "venir")
+CONSUMPTION_VERBS = ("beber", "comer")
+
+# Lugares: (destino, con artículo, ubicación)
+PLACES = {
+    "casa": ("a casa", "la casa", "en casa"),
+    "baño": ("al baño", "el baño", "en el baño"),
+}
+
+# Sustantivos y el verbo que los acompaña si no hay otro
+NOUNS = {"dolor": "tener", "ayuda": "necesitar"}
+
+INTERJECTIONS = {"hola": "hola", "adios": "adiós", "gracias": "gracias", "porfavor": "por favor"}
+
+MODAL = "querer"
+QUESTION = "donde"
+
+VOCABULARY = frozenset(
+    list(PRONOUNS) + list(VERBS) + list(PLACES) + list(NOUNS) + list(INTERJECTIONS) + [MODAL, QUESTION]
+)
+
+# Penalizaciones de confianza
+SPLIT_PENALTY = 0.85      # La secuencia no entra en una sola cláusula
+INFERENCE_PENALTY = 0.9   # Se infiere un verbo que no se señó
+WEAK_PENALTY = 0.6        # Cláusula incompleta o poco natural
+
+
+# ====== ESPAÑOL -> GLOSAS ======
+# Palabras sin seña propia que se omiten al pasar de texto a glosas
+STOPWORDS = frozenset((
+    "a", "al", "el", "la", "los", "las", "lo", "de", "del", "en", "un", "una", "unos", "unas",
+    "y", "o", "que", "me", "te", "se", "le", "mi", "mis", "tus", "su", "sus", "con", "para", "por",
+    "muy", "ya", "no", "si"
+))
+
+# Locuciones de varias palabras que son una sola seña
+PHRASES = {("por", "favor"): "porfavor"}
+
+
+def _build_text_lexicon() -> Dict[str, Tuple[str, Optional[int]]]:
+    """Formas en español (conjugaciones, acentos, infinitivos) -> (seña, persona del verbo o None)"""
+    lexicon = {"yo": "yo", "tú": "tu", "tu": "tu", "él": "el", "dónde": "donde", "donde": "donde",
+               "adónde": "donde", "adonde": "donde", "adiós": "adios", "ayudar": "ayuda",
+               "ayúdame": "ayuda", "duele": "dolor", "espérame": "espera"}
+    lexicon = {word: (sign, None) for word, sign in lexicon.items()}
+    for sign, verb in list(VERBS.items()) + [(MODAL, MODAL)]:
+        lexicon[verb] = (sign, None)
+        for person, form in enumerate(CONJUGATIONS.get(verb, ())):
+            lexicon.setdefault(form, (sign, person))
+    for sign in list(PLACES) + list(NOUNS) + list(INTERJECTIONS):
+        lexicon.setdefault(sign, (sign, None))
+    return lexicon
+
+
+TEXT_LEXICON = _build_text_lexicon()
+
+# Verbos que la gramática infiere (no se señan): forma -> persona (None = infinitivo).
+# El verbo se omite, pero su sujeto omitido sí se señala ("tengo dolor" -> yo dolor)
+INFERRED_FORMS = {
+    form: person
+    for verb in set(CONJUGATIONS) - set(VERBS.values()) - {MODAL}
+    for form, person in list(zip(CONJUGATIONS[verb], range(3))) + [(verb, None)]
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def text_to_glosses(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Pasar una oración en español a la secuencia de señas del vocabulario
+
+    El sujeto omitido de "quiero"/"vienes" se señala con su pronombre (yo/tú),
+    como en las frases de entrenamiento. También el de los verbos que no
+    tienen seña y la gramática infiere ("tengo dolor" -> yo dolor). La
+    tercera persona no se agrega porque "espera" también es la seña en
+    imperativo.
+
+    Args:
+        text: Oración en español ("Hola, ¿dónde está el baño?")
+
+    Returns:
+        Tupla de (glosas en orden, palabras sin seña que no son de relleno)
+    """
+    words = _WORD_RE.findall(unicodedata.normalize("NFC", text.lower()))
+    glosses, unknown = [], []
+    subject = None  # Pronombre explícito de la cláusula actual
+    i = 0
+    while i < len(words):
+        phrase = PHRASES.get(tuple(words[i:i + 2]))
+        if phrase:
+            glosses.append(phrase)
+            i += 2
+            continue
+        word = words[i]
+        i += 1
+        entry = TEXT_LEXICON.get(word)
+        if entry is None:
+            if word in INFERRED_FORMS:
+                subject = _add_subject(glosses, subject, INFERRED_FORMS[word])
+            elif word not in STOPWORDS:
+                unknown.append(word)
+            continue
+
+        sign, person = entry
+        if sign in PRONOUNS:
+            subject = sign
+        elif sign in INTERJECTIONS:
+            subject = None
+        else:
+            subject = _add_subject(glosses, subject, person)
+        glosses.append(sign)
+    return glosses, unknown
+
+
+def _add_subject(glosses: List[str], subject: Optional[str], person: Optional[int]) -> Optional[str]:
+    """Agregar el pronombre (yo/tú) de un sujeto omitido si cambia; devuelve el sujeto vigente"""
+    if person is None or person >= 2:
+        return subject
+    pronoun = PRONOUN_SIGNS[person]
+    if subject != pronoun:
+        glosses.append(pronoun)
+    return pronoun
+
+
+class Clause(NamedTuple):
+    """Cláusula en construcción"""
+    subject: Optional[int] = None
+    modal: bool = False
+    verb: Optional[str] = None
+    complement: Optional[str] = None
+    question: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return self == Clause()
+
+
+class Segment(NamedTuple):
+    """Parte ya cerrada de la oración: una cláusula o una interjección"""
+    clause: Optional[Clause] = None
+    interjection: Optional[str] = None
+
+
+class ParseState(NamedTuple):
+    """Estado del análisis después de un prefijo de señas"""
+    segments: Tuple[Segment, ...] = ()
+    clause: Clause = Clause()
+    penalty: float = 1.0
+    unknown: Tuple[str, ...] = ()
+    signs: Tuple[str, ...] = ()
+
+
+class GlossResult(NamedTuple):
+    """Oración generada y confianza (0-1)"""
+    sentence: str
+    confidence: float
+
+
+def _close(state: ParseState, penalty: float = 1.0) -> ParseState:
+    """Cerrar la cláusula actual (si tiene algo) y empezar una nueva"""
+    if state.clause.empty:
+        return state
+    return state._replace(
+        segments=state.segments + (Segment(clause=state.clause),),
+        clause=Clause(),
+        penalty=state.penalty * penalty
+    )
+
+
+def _split(state: ParseState) -> ParseState:
+    """Cerrar la cláusula porque la seña nueva no encaja en ella"""
+    return _close(state, SPLIT_PENALTY)
+
+
+def _capitalize(text: str) -> str:
+    """Mayúscula inicial respetando ¿ y ¡"""
+    for i, char in enumerate(text):
+        if char.isalpha():
+            return text[:i] + char.upper() + text[i + 1:]
+    return text
+
+
+class GlossEngine:
+    """
+    Traductor determinista de glosas a español
+    """
+
+    def __init__(self, threshold: float = 0.75):
+        """
+        Args:
+            threshold: Confianza mínima para usar la traducción local sin consultar al LLM
+        """
+        self.threshold = threshold
+
+    def start(self) -> ParseState:
+        """Estado inicial (secuencia vacía)"""
+        return ParseState()
+
+    def feed(self, state: ParseState, sign: str) -> ParseState:
+        """
+        Avanzar el análisis con una seña
+
+        Args:
+            state: Estado del prefijo anterior (no se modifica)
+            sign: Seña nueva
+
+        Returns:
+            Estado del prefijo extendido
+        """
+        sign = sign.strip().lower()
+        state = state._replace(signs=state.signs + (sign,))
+        clause = state.clause
+
+        if sign in INTERJECTIONS:
+            state = _close(state)
+            return state._replace(segments=state.segments + (Segment(interjection=INTERJECTIONS[sign]),))
+
+        if sign in PRONOUNS:
+            if clause.subject is not None or clause.verb is not None or (clause.modal and not clause.question):
+                state = _split(state)
+            return state._replace(clause=state.clause._replace(subject=PRONOUNS[sign]))
+
+        if sign == MODAL:
+            if clause.modal or clause.verb is not None or clause.complement is not None:
+                state = _split(state)
+            return state._replace(clause=state.clause._replace(modal=True))
+
+        if sign in VERBS:
+            if clause.verb is not None or (clause.complement in NOUNS):
+                state = _split(state)
+            return state._replace(clause=state.clause._replace(verb=VERBS[sign]))
+
+        if sign in PLACES or sign in NOUNS:
+            if clause.complement is not None:
+                state = _split(state)
+            return state._replace(clause=state.clause._replace(complement=sign))
+
+        if sign == QUESTION:
+            if not clause.empty:
+                state = _split(state)
+            return state._replace(clause=state.clause._replace(question=True))
+
+        return state._replace(unknown=state.unknown + (sign,))
+
+    def _render_question(self, clause: Clause) -> Tuple[str, float]:
+        """Preguntas con "donde\""""
+        if clause.complement in PLACES and clause.verb is None and not clause.modal:
+            return f"¿dónde está {PLACES[clause.complement][1]}?", 1.0
+        if clause.verb is None and not clause.modal and clause.complement is None:
+            if clause.subject is None:
+                return "¿dónde?", WEAK_PENALTY
+            verb = CONJUGATIONS["estar"][clause.subject]
+            return (f"¿dónde {verb} él?" if clause.subject == 2 else f"¿dónde {verb}?"), 1.0
+
+        # "donde" + verbo: se pregunta por el lugar de la acción (interpretación débil)
+        predicate, confidence = self._render_predicate(clause._replace(question=False), question=True)
+        return f"¿dónde {predicate}?", confidence * WEAK_PENALTY
+
+    def _render_predicate(self, clause: Clause, question: bool = False) -> Tuple[str, float]:
+        """Sujeto + verbo + complemento en minúsculas, con su confianza"""
+        person = clause.subject if clause.subject is not None else 0
+        confidence = 1.0
+        words = []
+
+        # Pronombre explícito para tú y él (yo se omite, como en el habla cotidiana)
+        if clause.subject in (1, 2) and not question:
+            words.append(PRONOUN_TEXT[clause.subject])
+
+        verb = clause.verb
+        complement = clause.complement
+
+        if verb is None and not clause.modal:
+            if complement in NOUNS:
+                verb_form = CONJUGATIONS[NOUNS[complement]][person]
+                return " ".join(words + [verb_form, complement]), confidence
+            if complement in PLACES:
+                # "yo casa" -> "voy a casa"
+                verb_form = CONJUGATIONS["ir"][person]
+                return " ".join(words + [verb_form, PLACES[complement][0]]), INFERENCE_PENALTY
+            return " ".join(words) or PRONOUN_TEXT[person], WEAK_PENALTY * WEAK_PENALTY
+
+        if verb == "esperar" and clause.subject is None and not clause.modal and complement is None:
+            # "espera" sola es una orden
+            return "espera", 1.0
+
+        if clause.modal:
+            words.append(CONJUGATIONS[MODAL][person])
+            if verb is None:
+                if complement in PLACES:
+                    words += ["ir", PLACES[complement][0]]
+                    return " ".join(words), INFERENCE_PENALTY
+                if complement == "ayuda":
+                    words.append(complement)
+                    return " ".join(words), 1.0
+                return " ".join(words + ([complement] if complement else [])), WEAK_PENALTY
+            words.append(verb)
+        elif verb in CONSUMPTION_VERBS and person == 0 and not question:
+            # "yo beber" -> "quiero beber"
+            words += [CONJUGATIONS[MODAL][0], verb]
+            confidence *= INFERENCE_PENALTY
+        else:
+            words.append(CONJUGATIONS[verb][person])
+
+        if complement in PLACES:
+            words.append(PLACES[complement][0] if verb in MOTION_VERBS else PLACES[complement][2])
+        elif complement in NOUNS:
+            words.append(complement)
+            confidence *= WEAK_PENALTY
+        elif verb in MOTION_VERBS and not clause.modal:
+            confidence *= INFERENCE_PENALTY
+
+        return " ".join(words), confidence
+
+    def render(self, state: ParseState) -> GlossResult:
+        """
+        Generar la oración del estado actual
+
+        Returns:
+            GlossResult con confianza 0 si hay señas fuera del vocabulario
+        """
+        if state.unknown or not state.signs:
+            return GlossResult(" ".join(state.signs).capitalize(), 0.0)
+
+        segments = state.segments + ((Segment(clause=state.clause),) if not state.clause.empty else ())
+        confidence = state.penalty
+        sentence = ""
+        previous = None
+        previous_is_interjection = False
+
+        for segment in segments:
+            if segment.clause is not None:
+                if segment.clause.question:
+                    text, part_confidence = self._render_question(segment.clause)
+                else:
+                    text, part_confidence = self._render_predicate(segment.clause)
+                confidence *= part_confidence
+            else:
+                text = segment.interjection
+
+            if previous is None:
+                sentence = _capitalize(text)
+            elif previous.endswith("?"):
+                sentence += " " + _capitalize(text)
+            elif segment.interjection is not None or previous_is_interjection:
+                sentence += ", " + text
+            else:
+                sentence += ". " + _capitalize(text)
+
+            previous = text
+            previous_is_interjection = segment.interjection is not None
+
+        if not sentence.endswith("?"):
+            sentence += "."
+
+        return GlossResult(sentence, round(confidence, 4))
+
+    def translate(self, signs: Iterable[str]) -> GlossResult:
+        """Traducir una secuencia completa de señas"""
+        state = self.start()
+        for sign in signs:
+            state = self.feed(state, sign)
+        return self.render(state)
+
+    def accepts(self, result: GlossResult) -> bool:
+        """True si la traducción local es suficiente (no hace falta el LLM)"""
+        return result.confidence >= self.threshold
+
+
+if __name__ == "__main__":
+    engine = GlossEngine()
+    examples = [
+        ["hola", "yo", "beber"],
+        ["yo", "casa", "ir"],
+        ["hola", "yo", "querer", "comer"],
+        ["donde", "baño"],
+        ["yo", "dolor", "ayuda", "porfavor"],
+        ["tu", "venir", "casa"],
+        ["el", "querer", "ir", "baño"],
+        ["gracias", "adios"],
+        ["espera", "porfavor"],
+    ]
+    for signs in examples:
+        result = engine.translate(signs)
+        print(f"{' '.join(signs):30} -> {result.sentence} ({result.confidence:.2f})")
+        glosses, _ = text_to_glosses(result.sentence)
+        print(f"{'':30}    {' '.join(glosses)}")
+
+    # Regresión: el sujeto de un verbo inferido no se pierde
+    assert text_to_glosses("Tengo dolor") == (["yo", "dolor"], [])
+    assert text_to_glosses("¿Necesitas ayuda?") == (["tu", "ayuda"], [])
+    assert text_to_glosses("Yo tengo dolor") == (["yo", "dolor"], [])
+    assert text_to_glosses("¿Dónde está el baño?") == (["donde", "baño"], [])
@@ -0,0 +1,282 @@
+"""
+Backends de inferencia para el clasificador de señas
+
+- keras:       model.predict (comportamiento original, el más lento por llamada)
+- tf_function: model(x, training=False) compilado con tf.function
+- tflite:      modelo convertido a TensorFlow Lite (tflite_runtime si está instalado)
+- onnx:        modelo exportado a ONNX y ejecutado con ONNX Runtime
+
+Los modelos convertidos se guardan junto a modelo_senas.keras y se regeneran
+si el .keras es más reciente. Tras cada conversión se verifica la paridad
+con el modelo de Keras sobre las clases de labels.json.
+"""
+
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+NUM_FRAMES = 30
+NUM_FEATURES = 135
+BACKENDS = ("keras", "tf_function", "tflite", "onnx")
+
+
+class BackendParityError(RuntimeError):
+    """El modelo convertido no reproduce las predicciones del original"""
+
+
+class InferenceBackend:
+    """
+    Interfaz común: predict_batch((B, 30, 135)) -> (B, clases)
+    """
+
+    name = "base"
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def num_classes(self) -> int:
+        raise NotImplementedError
+
+    def close(self):
+        """Liberar recursos del backend"""
+
+
+def _load_keras_model(model_path: str):
+    """Cargar el modelo completo de Keras"""
+    import tensorflow as tf
+    return tf.keras.models.load_model(model_path)
+
+
+class KerasPredictBackend(InferenceBackend):
+    """model.predict: arma un pipeline de datos en cada llamada"""
+
+    name = "keras"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        return self.model.predict(batch, verbose=0)
+
+    @property
+    def num_classes(self) -> int:
+        return int(self.model.output_shape[-1])
+
+
+class TFFunctionBackend(InferenceBackend):
+    """Llamada directa al modelo compilada con tf.function (batch dinámico, sin retracing)"""
+
+    name = "tf_function"
+
+    def __init__(self, model):
+        import tensorflow as tf
+
+        self.model = model
+        self._tf = tf
+        self._fn = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([None, NUM_FRAMES, NUM_FEATURES], tf.float32)]
+        )
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        x = self._tf.convert_to_tensor(batch, dtype=self._tf.float32)
+        return self._fn(x).numpy()
+
+    @property
+    def num_classes(self) -> int:
+        return int(self.model.output_shape[-1])
+
+
+class TFLiteBackend(InferenceBackend):
+    """Intérprete de TensorFlow Lite (no es thread-safe, se protege con un lock)"""
+
+    name = "tflite"
+
+    def __init__(self, tflite_path: str):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.path = tflite_path
+        self._interpreter = Interpreter(model_path=tflite_path)
+        self._input_index = self._interpreter.get_input_details()[0]["index"]
+        self._output_index = self._interpreter.get_output_details()[0]["index"]
+        self._batch_size = None
+        self._lock = threading.Lock()
+        self._resize(1)
+
+    def _resize(self, batch_size: int):
+        """Ajustar el tensor de entrada al tamaño de batch"""
+        if batch_size != self._batch_size:
+            self._interpreter.resize_tensor_input(
+                self._input_index, [batch_size, NUM_FRAMES, NUM_FEATURES]
+            )
+            self._interpreter.allocate_tensors()
+            self._batch_size = batch_size
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        with self._lock:
+            self._resize(len(batch))
+            self._interpreter.set_tensor(self._input_index, batch.astype(np.float32, copy=False))
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output_index).copy()
+
+    @property
+    def num_classes(self) -> int:
+        return int(self._interpreter.get_output_details()[0]["shape"][-1])
+
+
+class OnnxBackend(InferenceBackend):
+    """ONNX Runtime en CPU (InferenceSession.run es thread-safe)"""
+
+    name = "onnx"
+
+    def __init__(self, onnx_path: str):
+        import onnxruntime as ort
+
+        self.path = onnx_path
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            onnx_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_name = self._session.get_inputs()[0].name
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        return self._session.run(None, {self._input_name: batch.astype(np.float32, copy=False)})[0]
+
+    @property
+    def num_classes(self) -> int:
+        return int(self._session.get_outputs()[0].shape[-1])
+
+
+def _is_stale(converted_path: str, model_path: str) -> bool:
+    """True si el archivo convertido no existe o es más viejo que el .keras"""
+    if not os.path.exists(converted_path):
+        return True
+    if not os.path.exists(model_path):
+        return False
+    return os.path.getmtime(converted_path) < os.path.getmtime(model_path)
+
+
+def export_tflite(model, output_path: str) -> str:
+    """
+    Convertir el modelo de Keras a TensorFlow Lite
+
+    Las capas recurrentes pueden necesitar ops de TF, así que se habilitan
+    SELECT_TF_OPS como respaldo de las builtins.
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+        tf.lite.OpsSet.SELECT_TF_OPS
+    ]
+    converter._experimental_lower_tensor_list_ops = False
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"📦 Modelo TFLite exportado a {output_path}")
+    return output_path
+
+
+def export_onnx(model, output_path: str) -> str:
+    """Exportar el modelo de Keras a ONNX con batch dinámico"""
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec([None, NUM_FRAMES, NUM_FEATURES], tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=output_path)
+    print(f"📦 Modelo ONNX exportado a {output_path}")
+    return output_path
+
+
+def check_parity(
+    candidate: InferenceBackend,
+    reference: InferenceBackend,
+    labels: List[str],
+    samples: int = 32,
+    atol: float = 1e-3,
+    seed: int = 0
+) -> float:
+    """
+    Verificar que un backend convertido reproduce al original
+
+    Compara el número de clases con labels.json, la clase ganadora y las
+    probabilidades sobre secuencias aleatorias en el rango de MediaPipe.
+
+    Returns:
+        Máxima diferencia absoluta de probabilidades
+
+    Raises:
+        BackendParityError: Si las clases o las predicciones no coinciden
+    """
+    if labels and candidate.num_classes != len(labels):
+        raise BackendParityError(
+            f"{candidate.name}: {candidate.num_classes} clases, labels.json tiene {len(labels)}"
+        )
+
+    rng = np.random.default_rng(seed)
+    batch = rng.uniform(-0.5, 1.0, size=(samples, NUM_FRAMES, NUM_FEATURES)).astype(np.float32)
+
+    expected = reference.predict_batch(batch)
+    got = candidate.predict_batch(batch)
+
+    max_diff = float(np.max(np.abs(expected - got)))
+    mismatches = int(np.sum(np.argmax(expected, axis=1) != np.argmax(got, axis=1)))
+    if mismatches or max_diff > atol:
+        raise BackendParityError(
+            f"{candidate.name}: {mismatches}/{samples} clases distintas, diferencia máxima {max_diff:.2e}"
+        )
+
+    print(f"✅ Paridad {candidate.name} vs {reference.name}: {samples} muestras, diferencia máxima {max_diff:.2e}")
+    return max_diff
+
+
+def create_backend(name: str, model_path: str, labels: Optional[List[str]] = None) -> InferenceBackend:
+    """
+    Crear el backend pedido, convirtiendo el modelo si hace falta
+
+    Si la conversión o la verificación de paridad fallan, se usa tf_function.
+
+    Args:
+        name: Uno de BACKENDS
+        model_path: Ruta a modelo_senas.keras
+        labels: Clases de labels.json para la verificación de paridad
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de inferencia desconocido: {name} (opciones: {', '.join(BACKENDS)})")
+
+    if name in ("keras", "tf_function"):
+        model = _load_keras_model(model_path)
+        return KerasPredictBackend(model) if name == "keras" else TFFunctionBackend(model)
+
+    base_path = os.path.splitext(model_path)[0]
+    converted_path = f"{base_path}.{name}" if name == "onnx" else f"{base_path}.tflite"
+    backend_cls, export = (OnnxBackend, export_onnx) if name == "onnx" else (TFLiteBackend, export_tflite)
+
+    model = None
+    try:
+        # Solo se carga Keras si hay que (re)convertir: así se evita TF completo en memoria
+        if _is_stale(converted_path, model_path):
+            model = _load_keras_model(model_path)
+            export(model, converted_path)
+            backend = backend_cls(converted_path)
+            check_parity(backend, TFFunctionBackend(model), labels or [])
+        else:
+            backend = backend_cls(converted_path)
+            if labels and backend.num_classes != len(labels):
+                raise BackendParityError(
+                    f"{name}: {backend.num_classes} clases, labels.json tiene {len(labels)}"
+                )
+        return backend
+    except Exception as e:
+        print(f"⚠️ Backend {name} no disponible ({e}), usando tf_function")
+        if os.path.exists(converted_path) and isinstance(e, BackendParityError):
+            os.remove(converted_path)
+        return TFFunctionBackend(model or _load_keras_model(model_path))
@@ -0,0 +1,208 @@
+"""
+Motor de ejecución para procesar frames fuera del event loop de asyncio
+Soporta un pool de hilos (MediaPipe por worker vía ResourcePool) o un pool
+de procesos (cada proceso con sus propias instancias de MediaPipe Holistic)
+"""
+
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from detection_session import DetectionSession
+from metrics import FRAMES_GATED, FRAMES_PROCESSED, observe_stage, stage_timer
+
+# Pipeline de visión de cada proceso worker (una instancia por model_complexity)
+_worker_pipeline = "holistic"
+_worker_holistics = {}
+# Última sesión que usó cada pipeline del proceso (por id de instancia) (para reiniciar el tracking al cambiar)
+_worker_owners = {}
+
+
+def _init_process_worker(pipeline: str = "holistic"):
+    """Inicializador de cada proceso: crea su propio pipeline de MediaPipe"""
+    global _worker_pipeline
+    from sign_detector import HOLISTIC_CONFIG
+
+    _worker_pipeline = pipeline
+    _worker_holistic(HOLISTIC_CONFIG["model_complexity"])
+
+
+def _worker_holistic(complexity: int):
+    """Pipeline del proceso con un model_complexity dado (se crea la primera vez)"""
+    from vision_pipelines import clamp_complexity
+
+    complexity = clamp_complexity(_worker_pipeline, complexity)
+    holistic = _worker_holistics.get(complexity)
+    if holistic is None:
+        from sign_detector import HOLISTIC_CONFIG
+        from vision_pipelines import create_pipeline
+
+        holistic = create_pipeline(_worker_pipeline, HOLISTIC_CONFIG, complexity)
+        _worker_holistics[complexity] = holistic
+    return holistic
+
+
+def _process_frame_in_worker(
+    frame: np.ndarray,
+    roi=None,
+    complexity: int = 1,
+    target_size: int = 0,
+    owner: Optional[str] = None
+) -> Tuple[Optional[np.ndarray], bool, bool, float, List[Tuple[str, float]]]:
+    """
+    Etapa de visión dentro de un proceso worker
+
+    Las métricas de este proceso no llegan a /metrics, así que las duraciones
+    de cada etapa se devuelven para registrarlas en el proceso principal.
+
+    Returns:
+        Tupla de (keypoints o None, hay_manos, se repitió sin recorte, ms de visión,
+        lista de (etapa, segundos))
+    """
+    from vision_stage import run_vision
+
+    start = time.perf_counter()
+    timings: List[Tuple[str, float]] = []
+    holistic = _worker_holistic(complexity)
+    key = id(holistic)
+    if key in _worker_owners and _worker_owners[key] != owner:
+        # El frame es de otra sesión: no arrastrar el tracking de la anterior
+        holistic.reset()
+    _worker_owners[key] = owner
+    kp, have_hands = run_vision(holistic, frame, roi, target_size, timings=timings)
+    fell_back = roi is not None and not have_hands
+    if fell_back:
+        kp, have_hands = run_vision(holistic, frame, None, target_size, timings=timings)
+    return kp, have_hands, fell_back, (time.perf_counter() - start) * 1000, timings
+
+
+class InferenceEngine:
+    """
+    Ejecuta detect_sign en un pool acotado de workers con backpressure
+    """
+
+    def __init__(self, detector, mode: str = "thread", workers: int = 2, max_pending: int = 8):
+        """
+        Args:
+            detector: SignLanguageDetector compartido
+            mode: "thread" (visión y modelo en hilos) o "process" (visión en procesos)
+            workers: Número de workers del pool
+            max_pending: Frames en vuelo como máximo antes de aplicar backpressure
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Modo de ejecución no soportado: {mode}")
+
+        self.detector = detector
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.pending = 0
+        self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        # Los hilos corren el modelo (y la visión en modo "thread")
+        self._thread_pool = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="inference"
+        )
+        self._process_pool = None
+        if mode == "process":
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_process_worker,
+                initargs=(detector.vision_pipeline,)
+            )
+
+        print(f"✅ Motor de inferencia listo (modo={mode}, workers={self.workers}, max_pending={self.max_pending})")
+
+    @property
+    def saturated(self) -> bool:
+        """True si todos los cupos de frames en vuelo están ocupados"""
+        return self.pending >= self.max_pending
+
+    async def detect(self, frame: np.ndarray, session: DetectionSession) -> Dict:
+        """
+        Procesar un frame sin bloquear el event loop
+
+        Espera a que haya un cupo libre si ya hay max_pending frames en vuelo,
+        de modo que los clientes rápidos no acumulen trabajo sin límite.
+        """
+        loop = asyncio.get_running_loop()
+
+        async with self._semaphore:
+            self.pending += 1
+            try:
+                if self._process_pool is not None:
+                    return await loop.run_in_executor(self._thread_pool, self._detect_in_process, frame, session)
+
+                return await loop.run_in_executor(
+                    self._thread_pool, self.detector.detect_sign, frame, session
+                )
+            finally:
+                self.pending -= 1
+
+    def _detect_in_process(self, frame: np.ndarray, session: DetectionSession) -> Dict:
+        """
+        detect_sign con la visión en un proceso worker (corre en el pool de hilos)
+
+        La compuerta de movimiento y el estado de la sesión quedan en este
+        proceso; solo MediaPipe va al worker, que devuelve los tiempos de
+        cada etapa para registrarlos aquí.
+        """
+        FRAMES_PROCESSED.inc(source="image")
+        with stage_timer("detect"):
+            cached = session.frame_gate.lookup(frame)
+            if cached is not None:
+                FRAMES_GATED.inc()
+                kp, have_hands = cached
+            else:
+                vision = session.vision
+                kp, have_hands, fell_back, elapsed_ms, timings = self._process_pool.submit(
+                    _process_frame_in_worker, frame, vision.roi, vision.complexity, vision.target_size,
+                    session.session_id
+                ).result()
+                for stage, seconds in timings:
+                    observe_stage(stage, seconds)
+                observe_stage("vision", elapsed_ms / 1000)
+                vision.observe(kp, have_hands, elapsed_ms, fell_back)
+                session.frame_gate.store(kp, have_hands)
+            return self.detector.update_session(session, kp, have_hands, reused=cached is not None)
+
+    async def detect_keypoints(self, keypoints: np.ndarray, session: DetectionSession) -> Dict:
+        """
+        Avanzar una sesión con keypoints del cliente (sin etapa de visión)
+
+        Solo corre el modelo, así que siempre va al pool de hilos.
+        """
+        loop = asyncio.get_running_loop()
+
+        async with self._semaphore:
+            self.pending += 1
+            try:
+                return await loop.run_in_executor(
+                    self._thread_pool, self.detector.detect_keypoints, keypoints, session
+                )
+            finally:
+                self.pending -= 1
+
+    async def run(self, func, *args):
+        """Ejecutar cualquier llamada bloqueante del detector en el pool de hilos"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread_pool, func, *args)
+
+    def get_status(self) -> Dict:
+        """Estado del motor para /health"""
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending
+        }
+
+    def close(self):
+        """Detener los pools de workers"""
+        self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,230 @@
+"""
+Grabación del stream de keypoints de cada sesión en formato .kps
+El detector llama a append() con cada frame (ya sea de la imagen o de
+keypoints del cliente). Los frames se acumulan en un buffer preasignado y
+se cortan en segmentos:
+
+- Un segmento termina tras `gap_frames` frames seguidos sin manos o al
+  llegar a `chunk_frames`. Las pausas más cortas quedan dentro del segmento
+  (en ceros) y la del final se recorta
+- Los frames sin manos fuera de un segmento no se guardan
+- Los segmentos con menos de `min_frames` frames con manos se descartan
+
+Cada segmento se escribe desde un hilo de fondo (RecordingSink) como
+<directorio>/<sesión>/<inicio>-<parte>.kps, con los timestamps de cada frame y
+las glosas que el segmentador cerró mientras duraba.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from keypoint_sequences import EXTENSION, LAYOUT_KEYPOINTS, write_sequence
+from keypoints import NUM_FEATURES
+from sequence_buffer import MODEL_FRAMES
+from structured_logging import get_logger, log_event
+
+
+class RecordingSink:
+    """
+    Escribe los segmentos grabados en disco desde un hilo de fondo
+
+    submit() nunca bloquea: si la cola está llena el segmento se descarta.
+    """
+
+    def __init__(self, directory: str, dtype: str = "float16", max_queue: int = 64):
+        """
+        Args:
+            directory: Carpeta raíz de las grabaciones
+            dtype: float16 (la mitad de espacio) o float32
+            max_queue: Segmentos pendientes de escritura como máximo
+        """
+        self.directory = directory
+        self.dtype = dtype
+        self.written = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._logger = get_logger("recorder")
+        self._thread = threading.Thread(target=self._run, name="keypoint-recorder", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, keypoints: np.ndarray, timestamps: np.ndarray, meta: Dict) -> bool:
+        """Encolar un segmento (los arrays pasan a ser del sink)"""
+        try:
+            self._queue.put_nowait((path, keypoints, timestamps, meta))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        """Hilo escritor"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, keypoints, timestamps, meta = item
+                try:
+                    write_sequence(path, keypoints, dtype=self.dtype, timestamps=timestamps, **meta)
+                    self.written += 1
+                    self.bytes_written += os.path.getsize(path)
+                    log_event(self._logger, logging.DEBUG, "Segmento grabado", path=path, frames=len(keypoints))
+                except Exception as e:
+                    log_event(self._logger, logging.WARNING, "Error guardando segmento", path=path, error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Esperar a que se escriban los segmentos encolados"""
+        self._queue.join()
+
+    def close(self):
+        """Escribir lo pendiente y detener el hilo"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def get_stats(self) -> Dict:
+        return {
+            "directory": self.directory,
+            "dtype": self.dtype,
+            "segments_written": self.written,
+            "segments_dropped": self.dropped,
+            "bytes_written": self.bytes_written,
+            "pending": self._queue.qsize()
+        }
+
+
+class KeypointRecorder:
+    """
+    Grabador del stream de keypoints de una sesión
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        sink: RecordingSink,
+        chunk_frames: int = 900,
+        gap_frames: int = 15,
+        min_frames: int = MODEL_FRAMES,
+        fps: float = 30.0
+    ):
+        """
+        Args:
+            session_id: Sesión grabada (subcarpeta de las grabaciones)
+            sink: Escritor compartido
+            chunk_frames: Frames por segmento como máximo
+            gap_frames: Frames seguidos sin manos que cierran un segmento
+            min_frames: Frames con manos mínimos para guardar un segmento
+            fps: Frames por segundo nominales (el encabezado guarda el medido)
+        """
+        self.session_id = session_id
+        self.sink = sink
+        self.chunk_frames = max(1, chunk_frames)
+        self.gap_frames = max(0, gap_frames)
+        self.min_frames = max(1, min_frames)
+        self.fps = fps
+        self.label: Optional[str] = None
+
+        self._keypoints = np.zeros((self.chunk_frames, NUM_FEATURES), dtype=np.float32)
+        self._times = np.zeros(self.chunk_frames, dtype=np.float64)
+        self._length = 0
+        self._hand_frames = 0
+        self._idle = 0
+        self._glosses: List[Dict] = []
+        self._part = 0
+        self._start_stamp = time.strftime("%Y%m%d-%H%M%S")
+
+        # Estadísticas
+        self.frames = 0
+        self.frames_recorded = 0
+        self.segments = 0
+        self.segments_discarded = 0
+
+    def append(self, kp: Optional[np.ndarray], have_hands: bool, glosses: Optional[List[Dict]] = None,
+               now: Optional[float] = None):
+        """
+        Agregar un frame (lo llama el detector con el lock de la sesión tomado)
+
+        Args:
+            kp: Keypoints (135,) del frame (None si no hay manos)
+            have_hands: Si se detectaron manos
+            glosses: Glosas cerradas en este frame (para el encabezado)
+            now: Tiempo del frame (por defecto time.time())
+        """
+        self.frames += 1
+        if glosses and self._length:
+            self._glosses.extend(glosses)
+
+        if not have_hands or kp is None:
+            if not self._length:
+                return
+            if self._idle >= self.gap_frames:
+                self.flush()
+                return
+            self._idle += 1
+            self._keypoints[self._length] = 0.0
+        else:
+            self._idle = 0
+            self._hand_frames += 1
+            self._keypoints[self._length] = kp
+
+        self._times[self._length] = time.time() if now is None else now
+        self._length += 1
+        self.frames_recorded += 1
+        if self._length == self.chunk_frames:
+            self.flush()
+
+    def set_label(self, label: Optional[str]):
+        """Etiquetar lo que se grabe desde ahora (cierra el segmento actual)"""
+        self.flush()
+        self.label = label or None
+
+    def flush(self):
+        """Cerrar el segmento actual y mandarlo a escribir"""
+        length = self._length - self._idle  # Sin la pausa del final
+        if length > 0 and self._hand_frames >= self.min_frames:
+            times = self._times[:length]
+            elapsed = float(times[-1] - times[0])
+            meta = {
+                "fps": round((length - 1) / elapsed, 2) if elapsed > 0 else self.fps,
+                "layout": LAYOUT_KEYPOINTS,
+                "label": self.label,
+                "session_id": self.session_id,
+                "start_time": float(times[0]),
+                "hand_frames": self._hand_frames,
+                "glosses": self._glosses
+            }
+            path = os.path.join(
+                self.sink.directory, self.session_id, f"{self._start_stamp}-{self._part:04d}{EXTENSION}"
+            )
+            self._part += 1
+            if self.sink.submit(path, self._keypoints[:length].copy(), (times - times[0]).astype(np.float32), meta):
+                self.segments += 1
+        elif self._length:
+            self.segments_discarded += 1
+
+        self._length = 0
+        self._hand_frames = 0
+        self._idle = 0
+        self._glosses = []
+
+    def close(self):
+        """Guardar el último segmento (al cerrar o expulsar la sesión)"""
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        return {
+            "label": self.label,
+            "frames": self.frames,
+            "frames_recorded": self.frames_recorded,
+            "buffered": self._length,
+            "segments": self.segments,
+            "segments_discarded": self.segments_discarded
+        }
@@ -0,0 +1,339 @@
+"""
+Formato binario compacto para secuencias de keypoints (.kps)
+Pensado para guardar miles de sesiones y recorrerlas sin cargarlas enteras:
+el encabezado se lee por separado y los frames se mapean en memoria.
+
+Estructura del archivo (little-endian):
+
+    0   4 bytes  magic b"KPSQ"
+    4   1 byte   versión (1)
+    5   1 byte   dtype de los frames (1 = float16, 2 = float32)
+    6   2 bytes  reservado
+    8   4 bytes  largo del encabezado JSON (N)
+    12  4 bytes  offset de los datos (múltiplo de 64)
+    16  N bytes  encabezado JSON: layout, features, frames, fps, label, ...
+    ... relleno hasta el offset de los datos
+    datos: frames x features del dtype indicado
+    (opcional) timestamps: frames x float32, segundos desde el primer frame
+
+Los layouts conocidos son "keypoints135" (pose 9 + mano izq 63 + mano der 63,
+igual que extract_keypoints) y "avatar153" (clips del avatar: 9 puntos de
+pose + 2 manos, como espera Avatar3D.jsx), pero el
+formato sirve para cualquier cantidad de features por frame. También se
+leen .npy de (N, features), como los que usan los benchmarks.
+"""
+
+import json
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from frame_protocol import keypoints_have_hands
+from keypoints import NUM_FEATURES
+from sequence_buffer import MODEL_FRAMES, resample_indices
+
+MAGIC = b"KPSQ"
+VERSION = 1
+EXTENSION = ".kps"
+LAYOUT_KEYPOINTS = "keypoints135"
+LAYOUT_AVATAR = "avatar153"
+
+_PREFIX = struct.Struct("<4sBBHII")
+_ALIGNMENT = 64
+_DTYPES = {1: np.dtype("<f2"), 2: np.dtype("<f4")}
+_DTYPE_CODES = {"float16": 1, "float32": 2}
+
+
+class SequenceFormatError(ValueError):
+    """Archivo que no es una secuencia .kps válida"""
+
+
+def _dtype_code(dtype) -> int:
+    code = _DTYPE_CODES.get(np.dtype(dtype).name)
+    if code is None:
+        raise ValueError(f"dtype no soportado: {dtype} (usar float16 o float32)")
+    return code
+
+
+def encode_sequence(
+    keypoints: np.ndarray,
+    fps: float = 30.0,
+    layout: str = LAYOUT_KEYPOINTS,
+    label: Optional[str] = None,
+    dtype: str = "float16",
+    timestamps: Optional[np.ndarray] = None,
+    **meta
+) -> bytes:
+    """
+    Serializar una secuencia en formato .kps
+
+    Args:
+        keypoints: Array (frames, features)
+        fps: Frames por segundo de la grabación
+        layout: Qué representa cada fila (LAYOUT_KEYPOINTS por defecto)
+        label: Seña o clip al que corresponde (opcional)
+        dtype: float16 (la mitad de espacio) o float32
+        timestamps: Segundos desde el primer frame, uno por frame (opcional)
+        **meta: Campos extra del encabezado (session_id, glosses, ...)
+
+    Returns:
+        Contenido del archivo
+    """
+    keypoints = np.asarray(keypoints)
+    if keypoints.ndim != 2:
+        raise ValueError(f"Se espera un array (frames, features), no {keypoints.shape}")
+    if timestamps is not None and len(timestamps) != len(keypoints):
+        raise ValueError("timestamps debe tener un valor por frame")
+
+    code = _dtype_code(dtype)
+    header = {
+        "layout": layout,
+        "features": int(keypoints.shape[1]),
+        "frames": int(keypoints.shape[0]),
+        "fps": float(fps),
+        "label": label,
+        "dtype": _DTYPES[code].name,
+        "timestamps": timestamps is not None,
+        **meta
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    data_offset = -(-(_PREFIX.size + len(header_bytes)) // _ALIGNMENT) * _ALIGNMENT
+
+    parts = [
+        _PREFIX.pack(MAGIC, VERSION, code, 0, len(header_bytes), data_offset),
+        header_bytes,
+        b"\0" * (data_offset - _PREFIX.size - len(header_bytes)),
+        np.ascontiguousarray(keypoints, dtype=_DTYPES[code]).tobytes()
+    ]
+    if timestamps is not None:
+        parts.append(np.ascontiguousarray(timestamps, dtype="<f4").tobytes())
+    return b"".join(parts)
+
+
+def write_sequence(path: str, keypoints: np.ndarray, **options) -> str:
+    """
+    Guardar una secuencia en formato .kps (escritura atómica)
+
+    Args:
+        path: Archivo de destino
+        keypoints: Array (frames, features)
+        **options: Los de encode_sequence (fps, layout, label, dtype, timestamps y campos extra)
+
+    Returns:
+        La ruta escrita
+    """
+    data = encode_sequence(keypoints, **options)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _read_prefix(f, path: str) -> Tuple[Dict, int, np.dtype]:
+    prefix = f.read(_PREFIX.size)
+    if len(prefix) < _PREFIX.size:
+        raise SequenceFormatError(f"Archivo truncado: {path}")
+    magic, version, code, _, header_len, data_offset = _PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise SequenceFormatError(f"No es una secuencia .kps: {path}")
+    if version > VERSION or code not in _DTYPES:
+        raise SequenceFormatError(f"Versión {version} o dtype {code} no soportados: {path}")
+    try:
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise SequenceFormatError(f"Encabezado inválido en {path}: {e}")
+    return header, data_offset, _DTYPES[code]
+
+
+def read_header(path: str) -> Dict:
+    """
+    Leer solo el encabezado de una secuencia (sin tocar los frames)
+
+    Sirve para filtrar miles de archivos por label, layout o duración.
+    """
+    if path.endswith(".npy"):
+        return _npy_sequence(path, mmap=True).meta
+    with open(path, "rb") as f:
+        header, _, _ = _read_prefix(f, path)
+    return header
+
+
+class KeypointSequence:
+    """
+    Secuencia leída de disco: encabezado, frames y timestamps
+    """
+
+    def __init__(self, meta: Dict, keypoints: np.ndarray, timestamps: Optional[np.ndarray] = None,
+                 path: Optional[str] = None):
+        """
+        Args:
+            meta: Encabezado (layout, features, frames, fps, label, ...)
+            keypoints: Array (frames, features), normalmente un memmap de solo lectura
+            timestamps: Segundos desde el primer frame (opcional)
+            path: Archivo de origen
+        """
+        self.meta = meta
+        self.keypoints = keypoints
+        self.timestamps = timestamps
+        self.path = path
+
+    @property
+    def label(self) -> Optional[str]:
+        return self.meta.get("label")
+
+    @property
+    def fps(self) -> float:
+        return float(self.meta.get("fps") or 30.0)
+
+    @property
+    def layout(self) -> str:
+        return self.meta.get("layout", LAYOUT_KEYPOINTS)
+
+    def __len__(self) -> int:
+        return len(self.keypoints)
+
+    def as_float32(self) -> np.ndarray:
+        """Frames en float32 (copia solo si el archivo está en float16)"""
+        return np.asarray(self.keypoints, dtype=np.float32)
+
+    def have_hands(self) -> np.ndarray:
+        """Frames con alguna mano detectada (solo para el layout de 135 keypoints)"""
+        if self.layout != LAYOUT_KEYPOINTS:
+            raise ValueError(f"have_hands no aplica al layout {self.layout}")
+        return keypoints_have_hands(self.keypoints)
+
+    def frame_times(self) -> np.ndarray:
+        """Tiempo de cada frame en segundos (de los timestamps o del fps)"""
+        if self.timestamps is not None:
+            return np.asarray(self.timestamps, dtype=np.float64)
+        return np.arange(len(self)) / self.fps
+
+
+def _npy_sequence(path: str, mmap: bool) -> KeypointSequence:
+    keypoints = np.load(path, mmap_mode="r" if mmap else None)
+    if keypoints.ndim != 2:
+        raise SequenceFormatError(f"Se espera un .npy (frames, features): {path} es {keypoints.shape}")
+    layout = LAYOUT_KEYPOINTS if keypoints.shape[1] == NUM_FEATURES else "unknown"
+    meta = {
+        "layout": layout,
+        "features": int(keypoints.shape[1]),
+        "frames": int(keypoints.shape[0]),
+        "fps": 30.0,
+        "label": None,
+        "dtype": keypoints.dtype.name,
+        "timestamps": False
+    }
+    return KeypointSequence(meta, keypoints, path=path)
+
+
+def read_sequence(path: str, mmap: bool = True) -> KeypointSequence:
+    """
+    Abrir una secuencia .kps (o .npy)
+
+    Args:
+        path: Archivo a leer
+        mmap: Mapear los frames en memoria (solo lectura) en lugar de cargarlos
+
+    Returns:
+        KeypointSequence con los frames en el dtype del archivo
+
+    Raises:
+        SequenceFormatError: Si el archivo no es una secuencia válida
+    """
+    if path.endswith(".npy"):
+        return _npy_sequence(path, mmap)
+
+    with open(path, "rb") as f:
+        header, data_offset, dtype = _read_prefix(f, path)
+    frames, features = int(header["frames"]), int(header["features"])
+    shape = (frames, features)
+    data_bytes = frames * features * dtype.itemsize
+    expected = data_offset + data_bytes + (4 * frames if header.get("timestamps") else 0)
+    if os.path.getsize(path) < expected:
+        raise SequenceFormatError(f"Archivo truncado: {path}")
+
+    timestamps = None
+    if not frames:
+        keypoints = np.zeros(shape, dtype=dtype)
+    elif mmap:
+        keypoints = np.memmap(path, dtype=dtype, mode="r", offset=data_offset, shape=shape)
+        if header.get("timestamps"):
+            timestamps = np.memmap(path, dtype="<f4", mode="r", offset=data_offset + data_bytes, shape=(frames,))
+    else:
+        with open(path, "rb") as f:
+            f.seek(data_offset)
+            keypoints = np.frombuffer(f.read(data_bytes), dtype=dtype).reshape(shape)
+            if header.get("timestamps"):
+                timestamps = np.frombuffer(f.read(4 * frames), dtype="<f4")
+    return KeypointSequence(header, keypoints, timestamps, path)
+
+
+def list_sequences(directory: str) -> List[str]:
+    """Archivos .kps bajo un directorio (recursivo, en orden de nombre)"""
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith(EXTENSION))
+    return sorted(paths)
+
+
+def iter_sequences(
+    directory: str,
+    label: Optional[str] = None,
+    layout: Optional[str] = None,
+    min_frames: int = 0
+) -> Iterator[KeypointSequence]:
+    """
+    Recorrer las secuencias de un directorio, filtrando por el encabezado
+
+    Los frames de las que pasan el filtro se mapean en memoria; las demás
+    solo se leen hasta el encabezado. Los archivos inválidos se saltean.
+    """
+    for path in list_sequences(directory):
+        try:
+            header = read_header(path)
+            if label is not None and header.get("label") != label:
+                continue
+            if layout is not None and header.get("layout") != layout:
+                continue
+            if header.get("frames", 0) < min_frames:
+                continue
+            yield read_sequence(path)
+        except (OSError, SequenceFormatError) as e:
+            print(f"⚠️ Secuencia ignorada {path}: {e}")
+
+
+def load_labelled(
+    directory: str,
+    labels: Sequence[str],
+    frames: int = MODEL_FRAMES,
+    window: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dataset para entrenar: cada secuencia con label conocido llevada a `frames` frames
+
+    Args:
+        directory: Carpeta con secuencias .kps
+        labels: Clases en el orden del modelo (labels.json)
+        frames: Frames por muestra (30, como espera el modelo)
+        window: Si se indica, primero se ajusta a window frames como fix_sequence
+
+    Returns:
+        Tupla de (X (N, frames, 135) float32, y (N,) índices de clase)
+    """
+    index = {label: i for i, label in enumerate(labels)}
+    xs, ys = [], []
+    for sequence in iter_sequences(directory, layout=LAYOUT_KEYPOINTS, min_frames=1):
+        if sequence.label not in index:
+            continue
+        idxs = resample_indices(len(sequence), frames, window=window)
+        xs.append(np.asarray(sequence.keypoints[idxs], dtype=np.float32))
+        ys.append(index[sequence.label])
+    if not xs:
+        return np.zeros((0, frames, NUM_FEATURES), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    return np.stack(xs), np.asarray(ys, dtype=np.int64)
@@ -0,0 +1,139 @@
+"""
+Extracción vectorizada de keypoints desde resultados de MediaPipe
+Implementación compartida por el backend (sign_detector.py) y el
+entrenamiento/pruebas en tiempo real (Traine/Senia.py, backend/test1.py)
+
+Layout de 135 features (igual que el modelo entrenado):
+- Pose básica: hombro izquierdo (11), hombro derecho (12), nariz (0) -> 9
+- Mano izquierda: 21 landmarks x (x, y, z) -> 63
+- Mano derecha: 21 landmarks x (x, y, z) -> 63
+Las partes no detectadas se rellenan con ceros.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+POSE_INDICES = (11, 12, 0)  # left_shoulder, right_shoulder, nose
+NUM_HAND_LANDMARKS = 21
+
+POSE_FEATURES = 3 * len(POSE_INDICES)
+HAND_FEATURES = 3 * NUM_HAND_LANDMARKS
+NUM_FEATURES = POSE_FEATURES + 2 * HAND_FEATURES
+
+POSE_SLICE = slice(0, POSE_FEATURES)
+LEFT_HAND_SLICE = slice(POSE_FEATURES, POSE_FEATURES + HAND_FEATURES)
+RIGHT_HAND_SLICE = slice(POSE_FEATURES + HAND_FEATURES, NUM_FEATURES)
+
+def _write_hand(landmarks, out: np.ndarray):
+    """
+    Copiar 21 landmarks de mano a out (63 floats)
+
+    Se leen los campos x, y, z de cada landmark con np.fromiter, sin listas
+    intermedias y sin depender de cómo protobuf serializa el mensaje.
+    """
+    out[:] = np.fromiter(
+        (c for lm in landmarks.landmark for c in (lm.x, lm.y, lm.z)), dtype=np.float32, count=HAND_FEATURES
+    )
+
+
+def extract_keypoints(results, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Extraer el vector de 135 keypoints de un resultado de MediaPipe Holistic
+
+    Args:
+        results: Resultado de holistic.process() (o un objeto con la misma forma)
+        out: Buffer float32 de 135 elementos donde escribir (p. ej. una fila de
+             un buffer de secuencia preasignado). Si es None se crea uno nuevo.
+
+    Returns:
+        El buffer out con los keypoints
+    """
+    if out is None:
+        out = np.empty(NUM_FEATURES, dtype=np.float32)
+
+    # Pose básica (solo 3 puntos clave)
+    if results.pose_landmarks:
+        pose = results.pose_landmarks.landmark
+        out[POSE_SLICE] = [c for idx in POSE_INDICES for c in (pose[idx].x, pose[idx].y, pose[idx].z)]
+    else:
+        out[POSE_SLICE] = 0.0
+
+    # Mano izquierda
+    if results.left_hand_landmarks:
+        _write_hand(results.left_hand_landmarks, out[LEFT_HAND_SLICE])
+    else:
+        out[LEFT_HAND_SLICE] = 0.0
+
+    # Mano derecha
+    if results.right_hand_landmarks:
+        _write_hand(results.right_hand_landmarks, out[RIGHT_HAND_SLICE])
+    else:
+        out[RIGHT_HAND_SLICE] = 0.0
+
+    return out
+
+
+def extract_keypoints_reference(results) -> np.ndarray:
+    """
+    Implementación original (lista de Python landmark por landmark)
+    Se conserva para el micro-benchmark y las pruebas de paridad
+    """
+    out = []
+    pose_map = {"left_shoulder": 11, "right_shoulder": 12, "nose": 0}
+
+    # Pose básica
+    if results.pose_landmarks:
+        for name in pose_map:
+            lm = results.pose_landmarks.landmark[pose_map[name]]
+            out.extend([lm.x, lm.y, lm.z])
+    else:
+        out.extend([0.0] * 9)
+
+    # Mano izquierda
+    if results.left_hand_landmarks:
+        for lm in results.left_hand_landmarks.landmark:
+            out.extend([lm.x, lm.y, lm.z])
+    else:
+        out.extend([0.0] * 63)
+
+    # Mano derecha
+    if results.right_hand_landmarks:
+        for lm in results.right_hand_landmarks.landmark:
+            out.extend([lm.x, lm.y, lm.z])
+    else:
+        out.extend([0.0] * 63)
+
+    return np.array(out, dtype=np.float32)
+
+
+def hand_motion_energy(prev: np.ndarray, curr: np.ndarray) -> float:
+    """
+    Energía de movimiento de las manos entre dos frames consecutivos
+
+    Desplazamiento medio en (x, y) de los 21 landmarks de cada mano presente
+    en ambos frames (z es ruidoso y se ignora). Las manos ausentes, que vienen
+    en ceros, no cuentan.
+
+    Args:
+        prev: Keypoints (135,) del frame anterior
+        curr: Keypoints (135,) del frame actual
+
+    Returns:
+        Desplazamiento medio en coordenadas normalizadas (0 si no hay manos en común)
+    """
+    a = prev[POSE_FEATURES:].reshape(2, NUM_HAND_LANDMARKS, 3)
+    b = curr[POSE_FEATURES:].reshape(2, NUM_HAND_LANDMARKS, 3)
+    present = a.any(axis=(1, 2)) & b.any(axis=(1, 2))
+    if not present.any():
+        return 0.0
+    delta = b[present, :, :2] - a[present, :, :2]
+    return float(np.sqrt((delta * delta).sum(axis=2)).mean())
+
+
+def hands_present(results) -> bool:
+    """Verificar si hay manos presentes"""
+    return (
+        results.left_hand_landmarks is not None or
+        results.right_hand_landmarks is not None
+    )
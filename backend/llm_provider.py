@@ -0,0 +1,295 @@
+"""
+Proveedores de LLM para SentenceBuilder y src/Traductor_Natural.py
+
+- groq:   SDK oficial de Groq (un cliente compartido, con timeout y reintentos del SDK)
+- openai: cualquier API compatible con OpenAI (/chat/completions) vía httpx,
+          con pool de conexiones keep-alive, timeouts y reintentos con backoff.
+          Sirve para Groq (https://api.groq.com/openai/v1), servidores locales
+          o el servidor simulado mock_llm_server.py
+- none:   sin LLM (solo caché y motor local)
+
+Todos exponen chat() y stream_chat() con mensajes en formato OpenAI.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+PROVIDERS = ("groq", "openai", "none")
+
+# Códigos HTTP que vale la pena reintentar
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+class LLMError(RuntimeError):
+    """La llamada al LLM falló (después de los reintentos)"""
+
+
+class LLMProvider:
+    """
+    Interfaz común de los proveedores de chat
+    """
+
+    name = "base"
+
+    def __init__(self, model: str = DEFAULT_MODEL):
+        self.model = model
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency = 0.0
+
+    def chat(self, messages: List[Dict], temperature: float = 0.1, max_tokens: int = 60) -> str:
+        """
+        Respuesta completa del modelo
+
+        Raises:
+            LLMError: Si la llamada falla
+        """
+        raise NotImplementedError
+
+    def stream_chat(self, messages: List[Dict], temperature: float = 0.1, max_tokens: int = 60) -> Iterator[str]:
+        """
+        Respuesta en fragmentos de texto. Cerrar el generador (close()) corta la
+        conexión en curso.
+
+        Raises:
+            LLMError: Si la llamada falla antes del primer fragmento
+        """
+        raise NotImplementedError
+
+    def _record(self, started: float, error: bool = False):
+        """Acumular estadísticas de una llamada"""
+        with self._stats_lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.total_latency += time.perf_counter() - started
+
+    def get_stats(self) -> Dict:
+        """Llamadas, errores, reintentos y latencia media"""
+        return {
+            "provider": self.name,
+            "model": self.model,
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_latency_ms": round(1000 * self.total_latency / self.requests, 1) if self.requests else 0.0
+        }
+
+    def close(self):
+        """Liberar conexiones"""
+
+
+class GroqProvider(LLMProvider):
+    """SDK de Groq; el cliente mantiene su propio pool de conexiones"""
+
+    name = "groq"
+
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, base_url: Optional[str] = None,
+                 timeout: float = 10.0, max_retries: int = 2):
+        super().__init__(model)
+        from groq import Groq
+
+        kwargs = {"api_key": api_key, "timeout": timeout, "max_retries": max_retries}
+        if base_url:
+            kwargs["base_url"] = base_url
+        self.client = Groq(**kwargs)
+
+    def chat(self, messages: List[Dict], temperature: float = 0.1, max_tokens: int = 60) -> str:
+        started = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model, messages=messages, temperature=temperature, max_tokens=max_tokens
+            )
+            content = response.choices[0].message.content
+        except (AttributeError, IndexError, TypeError) as e:
+            self._record(started, error=True)
+            raise LLMError(f"Respuesta inválida: {e}") from e
+        except Exception as e:
+            self._record(started, error=True)
+            raise LLMError(str(e)) from e
+        self._record(started)
+        return content or ""
+
+    def stream_chat(self, messages: List[Dict], temperature: float = 0.1, max_tokens: int = 60) -> Iterator[str]:
+        started = time.perf_counter()
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model, messages=messages, temperature=temperature,
+                max_tokens=max_tokens, stream=True
+            )
+        except Exception as e:
+            self._record(started, error=True)
+            raise LLMError(str(e)) from e
+
+        try:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            self._record(started)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    API compatible con OpenAI sobre httpx
+
+    Un único httpx.Client por proveedor: las conexiones TLS se reutilizan
+    entre sesiones y llamadas (keep-alive) en lugar de abrir una por oración.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, model: str = DEFAULT_MODEL,
+                 timeout: float = 10.0, max_retries: int = 2, max_connections: int = 10,
+                 backoff: float = 0.25):
+        """
+        Args:
+            base_url: URL base de la API (p. ej. http://127.0.0.1:8100/v1)
+            api_key: Token Bearer (opcional para servidores locales)
+            model: Modelo a pedir
+            timeout: Timeout de lectura en segundos (la conexión tiene su propio límite corto)
+            max_retries: Reintentos ante errores de red, 429 y 5xx
+            max_connections: Tamaño del pool de conexiones
+            backoff: Espera base entre reintentos (se duplica en cada intento)
+        """
+        super().__init__(model)
+        import httpx
+
+        self._httpx = httpx
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 3.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    def _payload(self, messages: List[Dict], temperature: float, max_tokens: int, stream: bool) -> Dict:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream
+        }
+
+    def _send(self, payload: Dict, stream: bool):
+        """POST /chat/completions con reintentos; devuelve la respuesta abierta"""
+        httpx = self._httpx
+        for attempt in range(self.max_retries + 1):
+            try:
+                request = self.client.build_request("POST", "/chat/completions", json=payload)
+                response = self.client.send(request, stream=stream)
+                if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                    if response.status_code >= 400:
+                        response.read()
+                        response.close()
+                        raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}")
+                    return response
+                response.close()
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                if attempt == self.max_retries:
+                    raise LLMError(f"{type(e).__name__}: {e}") from e
+
+            with self._stats_lock:
+                self.retries += 1
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def chat(self, messages: List[Dict], temperature: float = 0.1, max_tokens: int = 60) -> str:
+        started = time.perf_counter()
+        try:
+            response = self._send(self._payload(messages, temperature, max_tokens, False), stream=False)
+            content = response.json()["choices"][0]["message"]["content"]
+        except LLMError:
+            self._record(started, error=True)
+            raise
+        except (KeyError, IndexError, ValueError) as e:
+            self._record(started, error=True)
+            raise LLMError(f"Respuesta inválida: {e}") from e
+        self._record(started)
+        return content or ""
+
+    def stream_chat(self, messages: List[Dict], temperature: float = 0.1, max_tokens: int = 60) -> Iterator[str]:
+        started = time.perf_counter()
+        try:
+            response = self._send(self._payload(messages, temperature, max_tokens, True), stream=True)
+        except LLMError:
+            self._record(started, error=True)
+            raise
+
+        # Server-Sent Events: "data: {...}" por fragmento y "data: [DONE]" al final
+        try:
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+        finally:
+            response.close()
+            self._record(started)
+
+    def close(self):
+        self.client.close()
+
+
+def create_provider(
+    name: str = "groq",
+    model: str = DEFAULT_MODEL,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: float = 10.0,
+    max_retries: int = 2,
+    max_connections: int = 10
+) -> Optional[LLMProvider]:
+    """
+    Crear el proveedor pedido
+
+    Args:
+        name: Uno de PROVIDERS
+        api_key: API key (por defecto GROQ_API_KEY del entorno)
+        base_url: URL base (obligatoria para "openai")
+
+    Returns:
+        El proveedor, o None si no hay LLM disponible (falta la dependencia o la key)
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Proveedor de LLM desconocido: {name} (opciones: {', '.join(PROVIDERS)})")
+    if name == "none":
+        return None
+
+    api_key = api_key or os.environ.get("GROQ_API_KEY")
+    try:
+        if name == "groq":
+            if not api_key:
+                print("⚠️ No se encontró GROQ_API_KEY")
+                return None
+            provider = GroqProvider(api_key, model, base_url, timeout, max_retries)
+        else:
+            if not base_url:
+                raise ValueError("LLM_BASE_URL es obligatorio con el proveedor openai")
+            provider = OpenAICompatibleProvider(base_url, api_key, model, timeout, max_retries, max_connections)
+    except ImportError as e:
+        print(f"❌ Proveedor {name} no disponible ({e})")
+        return None
+    except Exception as e:
+        print(f"❌ Error inicializando el proveedor {name}: {e}")
+        return None
+
+    print(f"✅ Proveedor LLM {name} listo (modelo={model}{', ' + base_url if base_url else ''})")
+    return provider
@@ -0,0 +1,245 @@
+"""
+Métricas estilo Prometheus para el pipeline de detección
+Contadores, gauges e histogramas en memoria, expuestos en /metrics con el
+formato de texto de Prometheus (0.0.4). Sin dependencias externas.
+
+Registrar una muestra cuesta un lock y unas sumas (el histograma busca su
+bucket con bisect), así que se puede dejar encendido en producción. El
+texto se arma solo cuando alguien consulta /metrics.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import config
+
+# Buckets de latencia en segundos (de 1 ms a 10 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base: valores por combinación de etiquetas"""
+
+    kind = "untyped"
+
+    def __init__(self, registry: "Registry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return lines + self._samples()
+
+
+class Counter(_Metric):
+    """Valor que solo crece"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja, o que se lee de una función al consultar /metrics"""
+
+    kind = "gauge"
+
+    def __init__(self, registry, name, documentation, labelnames=(), callback: Optional[Callable[[], float]] = None):
+        super().__init__(registry, name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> List[str]:
+        if self.callback is not None:
+            try:
+                return [f"{self.name} {_format_value(float(self.callback()))}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Distribución en buckets acumulativos, con suma y cantidad"""
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [cuentas por bucket (el último es +Inf), suma]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Medir en segundos la duración del bloque"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas del proceso"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              callback: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(enabled=config.METRICS_ENABLED)
+
+# ====== Métricas del pipeline ======
+STAGE_SECONDS = REGISTRY.histogram(
+    "connectsigns_stage_seconds",
+    "Duración de cada etapa del pipeline (decode, vision, holistic, keypoints, predict, session, detect, send, sentence, llm)",
+    ["stage"]
+)
+FRAMES_RECEIVED = REGISTRY.counter("connectsigns_frames_received_total", "Frames recibidos por /ws/detect")
+FRAMES_DROPPED = REGISTRY.counter(
+    "connectsigns_frames_dropped_total", "Frames descartados porque llegó uno más nuevo antes de procesarlos"
+)
+FRAMES_PROCESSED = REGISTRY.counter(
+    "connectsigns_frames_processed_total", "Frames procesados por tipo de entrada", ["source"]
+)
+FRAMES_GATED = REGISTRY.counter(
+    "connectsigns_frames_gated_total", "Frames que reutilizaron la salida de MediaPipe del frame anterior"
+)
+PREDICTIONS = REGISTRY.counter("connectsigns_predictions_total", "Llamadas al clasificador")
+WINDOWS_SKIPPED = REGISTRY.counter(
+    "connectsigns_windows_skipped_total", "Ventanas saltadas por la compuerta de movimiento"
+)
+SIGNS = REGISTRY.counter("connectsigns_signs_total", "Señas nuevas confirmadas")
+SENTENCES = REGISTRY.counter(
+    "connectsigns_sentences_total", "Oraciones generadas por origen (cache, local, llm, fallback)", ["source"]
+)
+SENTENCE_CACHE_LOOKUPS = REGISTRY.counter(
+    "connectsigns_sentence_cache_lookups_total", "Búsquedas en la caché de oraciones (hit o miss)", ["result"]
+)
+WS_CONNECTIONS = REGISTRY.gauge("connectsigns_websocket_connections", "Conexiones WebSocket abiertas")
+
+
+def observe_stage(stage: str, seconds: float):
+    """Registrar la duración de una etapa medida por fuera (p. ej. en un proceso worker)"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def stage_timer(stage: str):
+    """Context manager que mide una etapa del pipeline"""
+    return STAGE_SECONDS.time(stage=stage)
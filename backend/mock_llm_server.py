@@ -0,0 +1,136 @@
+"""
+Servidor LLM simulado compatible con OpenAI (/v1/chat/completions)
+Permite probar y medir bajo carga el camino de oraciones (SentenceBuilder) y
+el chat de src/Traductor_Natural.py sin red ni costo de API.
+
+Las peticiones de traducción de señas ("Señas: [...]") se responden con el
+motor local de glosas; el resto con un texto fijo. La latencia hasta el
+primer token, el tiempo por token y una tasa de errores 503 son configurables.
+
+Uso:
+    python mock_llm_server.py --port 8100 --latency-ms 300 --token-ms 20
+    LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:8100/v1 python app.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from gloss_engine import GlossEngine
+
+app = FastAPI(title="ConnectSigns Mock LLM")
+
+# Configuración (variables de entorno o argumentos de la línea de comandos)
+settings = {
+    "latency_ms": float(os.environ.get("MOCK_LLM_LATENCY_MS", 250)),
+    "token_ms": float(os.environ.get("MOCK_LLM_TOKEN_MS", 15)),
+    "error_rate": float(os.environ.get("MOCK_LLM_ERROR_RATE", 0)),
+}
+
+gloss_engine = GlossEngine()
+stats = {"requests": 0, "streams": 0, "errors": 0}
+
+_SIGNS_PATTERN = re.compile(r"Señas:\s*\[([^\]]*)\]")
+
+
+def generate_reply(messages) -> str:
+    """Respuesta determinista para los mensajes del chat"""
+    prompt = messages[-1].get("content", "") if messages else ""
+    match = _SIGNS_PATTERN.search(prompt)
+    if match:
+        signs = [s.strip() for s in match.group(1).split(",") if s.strip()]
+        return gloss_engine.translate(signs).sentence
+    return "Respuesta simulada del asistente. ¿Quieres saber algo más?"
+
+
+def tokenize(text: str):
+    """Separar en "tokens" (palabras con su espacio) para el streaming"""
+    return re.findall(r"\S+\s*", text)
+
+
+def _completion_id() -> str:
+    return f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "connectsigns"}]}
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, **settings}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+
+    if settings["error_rate"] and random.random() < settings["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse(status_code=503, content={"error": {"message": "Error simulado"}})
+
+    model = body.get("model", "mock")
+    reply = generate_reply(body.get("messages", []))
+    tokens = tokenize(reply)
+    created = int(time.time())
+    completion_id = _completion_id()
+
+    await asyncio.sleep(settings["latency_ms"] / 1000.0)
+
+    if not body.get("stream"):
+        await asyncio.sleep(len(tokens) * settings["token_ms"] / 1000.0)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+        }
+
+    stats["streams"] += 1
+
+    async def events():
+        def chunk(delta, finish_reason=None):
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }, ensure_ascii=False) + "\n\n"
+
+        yield chunk({"role": "assistant"})
+        for token in tokens:
+            yield chunk({"content": token})
+            await asyncio.sleep(settings["token_ms"] / 1000.0)
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Servidor LLM simulado compatible con OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=settings["latency_ms"], help="Latencia hasta el primer token")
+    parser.add_argument("--token-ms", type=float, default=settings["token_ms"], help="Tiempo por token")
+    parser.add_argument("--error-rate", type=float, default=settings["error_rate"], help="Fracción de respuestas 503")
+    args = parser.parse_args()
+
+    settings.update(latency_ms=args.latency_ms, token_ms=args.token_ms, error_rate=args.error_rate)
+    print(f"🤖 LLM simulado en http://{args.host}:{args.port}/v1 ({settings})")
+    uvicorn.run(app, host=args.host, port=args.port)
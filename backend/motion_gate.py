@@ -0,0 +1,115 @@
+"""
+Compuerta de movimiento para la etapa de visión
+Si la imagen casi no cambió respecto del último frame procesado, se
+reutilizan sus keypoints y no se llama a MediaPipe Holistic. Con un usuario
+conectado pero quieto (o sin nadie frente a la cámara) ahorra la mayor
+parte del costo por frame.
+
+La comparación se hace sobre una miniatura en escala de grises (diferencia
+absoluta media, 0-255), así que cuesta mucho menos que Holistic. Cada
+`max_skips` frames saltados se procesa uno igual, para que los keypoints
+reutilizados no queden desactualizados.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FrameGate:
+    """
+    Caché de la última salida de visión de una sesión
+    """
+
+    def __init__(self, threshold: float = 2.0, max_skips: int = 5, size: Tuple[int, int] = (32, 24)):
+        """
+        Args:
+            threshold: Diferencia media (0-255) bajo la cual el frame se considera igual (0 = desactivada)
+            max_skips: Frames seguidos que se pueden reutilizar antes de procesar uno
+            size: Tamaño (ancho, alto) de la miniatura que se compara
+        """
+        self.threshold = max(0.0, threshold)
+        self.max_skips = max(0, max_skips)
+        self.size = size
+
+        self._thumb: Optional[np.ndarray] = None
+        self._kp: Optional[np.ndarray] = None
+        self._have_hands = False
+        self._cached = False
+        self._skips = 0
+        self._lock = threading.Lock()
+
+        # Estadísticas
+        self.frames = 0
+        self.skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0 and self.max_skips > 0
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def lookup(self, frame: np.ndarray) -> Optional[Tuple[Optional[np.ndarray], bool]]:
+        """
+        Buscar la salida de visión reutilizable para un frame
+
+        Args:
+            frame: Frame BGR de la cámara
+
+        Returns:
+            Tupla de (keypoints o None, hay_manos) del último frame procesado si
+            la imagen no cambió; None si hay que procesarlo (llamar a store después)
+        """
+        with self._lock:
+            self.frames += 1
+            if not self.enabled:
+                return None
+
+            thumb = self._thumbnail(frame)
+            if (self._cached and self._skips < self.max_skips and
+                    self._thumb is not None and self._thumb.shape == thumb.shape and
+                    float(np.abs(thumb - self._thumb).mean()) < self.threshold):
+                self._skips += 1
+                self.skipped += 1
+                return self._kp, self._have_hands
+
+            # Se compara siempre contra el último frame procesado, así los
+            # cambios lentos se acumulan y terminan disparando el proceso
+            self._thumb = thumb
+            self._cached = False
+            return None
+
+    def store(self, kp: Optional[np.ndarray], have_hands: bool):
+        """Guardar la salida de visión del frame que se acaba de procesar"""
+        with self._lock:
+            if not self.enabled:
+                return
+            if kp is None:
+                self._kp = None
+            elif self._kp is None:
+                self._kp = kp.copy()
+            else:
+                self._kp[:] = kp  # kp suele ser un buffer del hilo de inferencia
+            self._have_hands = have_hands
+            self._cached = True
+            self._skips = 0
+
+    def reset(self):
+        """Olvidar el último frame procesado"""
+        with self._lock:
+            self._thumb = None
+            self._cached = False
+            self._skips = 0
+
+    def get_stats(self) -> Dict:
+        """Configuración y contadores"""
+        return {
+            "threshold": self.threshold,
+            "max_skips": self.max_skips,
+            "frames": self.frames,
+            "skipped": self.skipped
+        }
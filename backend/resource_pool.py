@@ -0,0 +1,133 @@
+"""
+Pool genérico de recursos pesados (MediaPipe, modelos, etc.)
+Permite compartir un número fijo de instancias entre muchas sesiones
+
+Con `owner` (p. ej. el id de la sesión) cada dueño vuelve a la instancia
+que usó la vez anterior si está libre. Si una instancia pasa a otro dueño,
+se llama a `reset` antes de entregarla, así el estado interno (el tracking
+de MediaPipe) de una sesión no se mezcla con el de otra.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Hashable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Dueño de una instancia que nunca se usó (no hace falta reset)
+_UNUSED = object()
+
+
+class ResourcePool(Generic[T]):
+    """
+    Pool de tamaño fijo: cada instancia la usa un solo hilo a la vez
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], T],
+        size: int = 1,
+        name: str = "recurso",
+        reset: Optional[Callable[[T], None]] = None
+    ):
+        """
+        Crear el pool e instanciar todos los recursos
+
+        Args:
+            factory: Función que crea una instancia del recurso
+            size: Número de instancias a mantener
+            name: Nombre para los mensajes de log
+            reset: Limpia el estado de una instancia al cambiar de dueño (opcional)
+        """
+        self.name = name
+        self.size = max(1, size)
+        self.reset = reset
+        self._resources: List[T] = []
+        self._free: List[T] = []
+        self._cond = threading.Condition()
+
+        # Afinidad: último dueño de cada instancia y última instancia de cada dueño
+        self._owners: Dict[int, object] = {}
+        self._leases: Dict[Hashable, T] = {}
+
+        # Estadísticas
+        self.handoffs = 0
+
+        for _ in range(self.size):
+            resource = factory()
+            self._resources.append(resource)
+            self._free.append(resource)
+            self._owners[id(resource)] = _UNUSED
+
+        print(f"✅ Pool de {name} listo ({self.size} instancias)")
+
+    def _take(self, owner: Optional[Hashable]) -> T:
+        """Elegir una instancia libre (requiere self._cond)"""
+        preferred = self._leases.get(owner) if owner is not None else None
+        for i, resource in enumerate(self._free):
+            if resource is preferred:
+                return self._free.pop(i)
+        # Si no, una que ningún dueño tenga reservada o la que lleva más tiempo libre
+        for i, resource in enumerate(self._free):
+            previous = self._owners[id(resource)]
+            if previous is _UNUSED or self._leases.get(previous) is not resource:
+                return self._free.pop(i)
+        return self._free.pop(0)
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None, owner: Optional[Hashable] = None) -> Iterator[T]:
+        """
+        Tomar prestada una instancia y devolverla al salir del bloque
+
+        Args:
+            timeout: Segundos máximos de espera (None = esperar siempre)
+            owner: Dueño del préstamo (p. ej. id de sesión) para mantener la afinidad
+
+        Raises:
+            TimeoutError: Si no hay instancias libres dentro del timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._free, timeout):
+                raise TimeoutError(f"No hay instancias libres de {self.name}")
+            resource = self._take(owner)
+            previous = self._owners[id(resource)]
+            needs_reset = previous is not _UNUSED and previous != owner
+            if previous != owner:
+                if self._leases.get(previous) is resource:
+                    del self._leases[previous]
+                self._owners[id(resource)] = owner
+                if owner is not None:
+                    self._leases[owner] = resource
+            if needs_reset:
+                self.handoffs += 1
+
+        try:
+            if needs_reset and self.reset is not None:
+                self.reset(resource)
+            yield resource
+        finally:
+            with self._cond:
+                self._free.append(resource)
+                self._cond.notify()
+
+    def release_owner(self, owner: Hashable):
+        """Olvidar la afinidad de un dueño (p. ej. al cerrar su sesión)"""
+        with self._cond:
+            self._leases.pop(owner, None)
+
+    @property
+    def available(self) -> int:
+        """Instancias libres en este momento"""
+        with self._cond:
+            return len(self._free)
+
+    def close(self):
+        """Liberar todas las instancias que tengan método close()"""
+        for resource in self._resources:
+            close = getattr(resource, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    print(f"⚠️ Error cerrando {self.name}: {e}")
+        self._resources = []
@@ -1,20 +1,26 @@
 """
 Módulo para construir oraciones naturales a partir de señas detectadas
-Usa Groq LLM para convertir secuencias de señas en español natural
+Usa un LLM (Groq u otro proveedor de llm_provider.py) para convertir
+secuencias de señas en español natural
 """
 
+import logging
 import os
+import threading
 import time
-from typing import List, Optional
+from concurrent.futures import Executor, Future
+from typing import Callable, List, Optional
 from collections import deque
 
-# Intentar importar Groq
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-    print("⚠️ Groq no instalado. Ejecuta: pip install groq")
+from llm_provider import LLMError, LLMProvider, create_provider
+from metrics import SENTENCES, stage_timer
+from structured_logging import get_logger, log_event
+
+# Versión del prompt: forma parte de la clave de la caché de oraciones junto
+# con el modelo. Incrementarla al cambiar el prompt o los parámetros de generación.
+PROMPT_VERSION = "v1"
+
+logger = get_logger("sentence")
 
 
 class SentenceBuilder:
@@ -22,21 +28,46 @@ class SentenceBuilder:
     Construye oraciones naturales a partir de señas detectadas usando LLM
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        provider: Optional[LLMProvider] = None,
+        executor: Optional[Executor] = None,
+        on_sentence: Optional[Callable[[dict], None]] = None,
+        cache=None,
+        gloss_engine=None,
+        on_partial: Optional[Callable[[dict], None]] = None,
+        incremental: bool = False
+    ):
         """
         Inicializar el constructor de oraciones
         
         Args:
-            api_key: API key de Groq (opcional, puede venir del entorno)
+            api_key: API key de Groq para crear un proveedor propio (si no se pasa provider)
+            provider: Proveedor LLM compartido entre sesiones (sin proveedor: caché y motor local)
+            executor: Executor donde generar las oraciones en segundo plano.
+                      Sin executor, check_and_build_sentence llama al LLM en el acto.
+            on_sentence: Callback con el estado cuando hay una oración nueva
+                         (se llama desde el hilo del executor)
+            cache: SentenceCache compartida entre sesiones (opcional)
+            gloss_engine: GlossEngine local que responde sin LLM las frases conocidas (opcional)
+            on_partial: Callback con la traducción parcial mientras se sigue señando
+            incremental: Traducir en cada seña nueva, sin esperar la pausa
         """
-        self.api_key = api_key or os.environ.get('GROQ_API_KEY')
-        self.client = None
+        self.provider = provider
+        self.executor = executor
+        self.on_sentence = on_sentence
+        self.cache = cache
+        self.gloss_engine = gloss_engine
+        self.on_partial = on_partial
+        self.incremental = incremental
         
         # Buffer de señas detectadas
         self.signs_buffer: deque = deque(maxlen=20)  # Máximo 20 señas
         
-        # Última oración generada
+        # Última oración generada y traducción parcial en curso
         self.current_sentence = ""
+        self.partial_sentence = ""
         self.last_raw_signs = ""
         
         # Control de tiempo
@@ -44,25 +75,25 @@ class SentenceBuilder:
         self.sentence_cooldown = 2.0  # Segundos sin señas para generar oración
         self.sentence_generated = False  # Flag para evitar repeticiones
         
-        # Inicializar cliente Groq
-        self._init_client()
+        # Generación en segundo plano: cada cambio del buffer incrementa la
+        # generación y los resultados de generaciones viejas se descartan
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._pending: Optional[Future] = None
+        self._finalize_pending = False  # La pausa llegó con la traducción parcial en camino
+        
+        # Estados del motor local para cada prefijo del buffer (se extienden seña a seña)
+        self._prefix_states: list = []
+        
+        # Crear un proveedor Groq propio solo si se pasó una API key
+        if self.provider is None and api_key:
+            self.provider = create_provider("groq", api_key=api_key)
     
-    def _init_client(self):
-        """Inicializar cliente Groq"""
-        if not GROQ_AVAILABLE:
-            print("❌ Groq no disponible")
-            return
-            
-        if not self.api_key:
-            print("⚠️ No se encontró GROQ_API_KEY")
-            return
-            
-        try:
-            self.client = Groq(api_key=self.api_key)
-            print("✅ Cliente Groq inicializado correctamente")
-        except Exception as e:
-            print(f"❌ Error inicializando Groq: {e}")
-            self.client = None
+    @property
+    def cache_version(self) -> str:
+        """Versión de las oraciones en la caché: prompt + modelo"""
+        model = self.provider.model if self.provider else "local"
+        return f"{PROMPT_VERSION}:{model}"
     
     def add_sign(self, sign: str) -> dict:
         """
@@ -75,22 +106,31 @@ class SentenceBuilder:
             Dict con el estado actual
         """
         current_time = time.time()
+        partials = []
         
-        # Evitar duplicados consecutivos
-        if len(self.signs_buffer) > 0 and self.signs_buffer[-1] == sign:
-            # Misma seña, solo actualizar tiempo
+        with self._lock:
+            # Evitar duplicados consecutivos
+            if len(self.signs_buffer) > 0 and self.signs_buffer[-1] == sign:
+                # Misma seña, solo actualizar tiempo
+                self.last_sign_time = current_time
+                return self._get_status()
+            
+            # Agregar nueva seña (la oración en curso ya no corresponde al buffer)
+            self.signs_buffer.append(sign)
             self.last_sign_time = current_time
-            return self._get_status()
-        
-        # Agregar nueva seña
-        self.signs_buffer.append(sign)
-        self.last_sign_time = current_time
-        self.sentence_generated = False  # Resetear flag al agregar seña
-        
-        # Actualizar la vista de señas crudas
-        self.last_raw_signs = " ".join(list(self.signs_buffer))
+            self.sentence_generated = False  # Resetear flag al agregar seña
+            self._supersede()
+            
+            # Actualizar la vista de señas crudas
+            self.last_raw_signs = " ".join(list(self.signs_buffer))
+            
+            if self.incremental:
+                partials = self._update_partial()
+            
+            status = self._get_status()
         
-        return self._get_status()
+        self._notify_partials(partials)
+        return status
     
     def check_and_build_sentence(self) -> dict:
         """
@@ -100,23 +140,171 @@ class SentenceBuilder:
             Dict con el estado y posible oración generada
         """
         current_time = time.time()
-        time_since_last = current_time - self.last_sign_time
         
-        # Si pasó el cooldown y hay señas en el buffer
-        if (time_since_last >= self.sentence_cooldown and 
-            len(self.signs_buffer) >= 2 and
-            self.last_sign_time > 0 and
-            not self.sentence_generated):  # Verificar que no se haya generado ya
+        with self._lock:
+            time_since_last = current_time - self.last_sign_time
             
-            # Generar oración
-            signs_list = list(self.signs_buffer)
-            self.current_sentence = self._generate_natural_sentence(signs_list)
-            self.sentence_generated = True  # Marcar como generado
-            
-            # Limpiar buffer después de generar
-            # self.signs_buffer.clear()  # Descomenta si quieres limpiar
-            
-        return self._get_status()
+            # Si pasó el cooldown y hay señas en el buffer
+            if (time_since_last >= self.sentence_cooldown and 
+                len(self.signs_buffer) >= 2 and
+                self.last_sign_time > 0 and
+                not self.sentence_generated):  # Verificar que no se haya generado ya
+                
+                self.sentence_generated = True  # Marcar como generado
+                signs_list = list(self.signs_buffer)
+                
+                if self.executor is None:
+                    # Generar oración en el acto
+                    self.current_sentence = self._generate_natural_sentence(signs_list)
+                elif self._pending is not None and not self._pending.done():
+                    # La traducción incremental de estas mismas señas sigue en
+                    # camino: su resultado será la oración final
+                    self._finalize_pending = True
+                else:
+                    # Generar en segundo plano; el resultado llega por on_sentence
+                    self._pending = self.executor.submit(
+                        self._run_generation, self._generation, signs_list
+                    )
+                
+                # Limpiar buffer después de generar
+                # self.signs_buffer.clear()  # Descomenta si quieres limpiar
+                
+            return self._get_status()
+    
+    def _supersede(self):
+        """Invalidar la generación en curso (requiere self._lock)"""
+        self._generation += 1
+        self._finalize_pending = False
+        if self._pending is not None:
+            # Si todavía no empezó se cancela; si ya está en el LLM, su resultado se descarta
+            self._pending.cancel()
+            self._pending = None
+    
+    def _run_generation(self, generation: int, signs: List[str]):
+        """Generar la oración en el executor y publicarla si sigue vigente"""
+        sentence = self._generate_natural_sentence(signs)
+        
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.current_sentence = sentence
+            self._pending = None
+            status = self._get_status()
+        
+        self._notify(self.on_sentence, status)
+    
+    def _notify(self, callback: Optional[Callable[[dict], None]], data: dict):
+        """Llamar a un callback de publicación sin dejar que sus errores se propaguen"""
+        if callback:
+            try:
+                callback(data)
+            except Exception as e:
+                log_event(logger, logging.WARNING, "Error publicando oración", error=str(e))
+    
+    def _notify_partials(self, partials: List[dict]):
+        """Publicar traducciones parciales (llamar sin self._lock)"""
+        for partial in partials:
+            self._notify(self.on_partial, partial)
+    
+    def _prefix_state(self):
+        """
+        Estado del motor local para el buffer actual (requiere self._lock)
+        
+        Reutiliza el estado del prefijo más largo que sigue vigente, así cada
+        seña nueva cuesta un solo paso del motor.
+        """
+        signs = list(self.signs_buffer)
+        states = self._prefix_states
+        while states and (len(states) > len(signs) or states[-1].signs != tuple(signs[:len(states)])):
+            states.pop()
+        
+        state = states[-1] if states else self.gloss_engine.start()
+        for sign in signs[len(states):]:
+            state = self.gloss_engine.feed(state, sign)
+            states.append(state)
+        return state
+    
+    def _set_partial(self, text: str, source: str, complete: bool, confidence: Optional[float] = None) -> dict:
+        """
+        Guardar la traducción parcial (requiere self._lock)
+        
+        Devuelve el mensaje a publicar; el callback se llama después de soltar
+        el lock para que un consumidor lento no frene a los demás hilos.
+        """
+        self.partial_sentence = text
+        return {
+            "text": text,
+            "signs": list(self.signs_buffer),
+            "source": source,
+            "complete": complete,
+            "confidence": confidence
+        }
+    
+    def _update_partial(self) -> List[dict]:
+        """
+        Traducir el buffer actual sin esperar la pausa (requiere self._lock)
+        
+        Caché y motor local responden en el acto; si el motor no alcanza la
+        confianza mínima, el LLM se consulta en streaming en segundo plano.
+        
+        Returns:
+            Traducciones parciales a publicar con _notify_partials
+        """
+        signs = list(self.signs_buffer)
+        if not signs:
+            self.partial_sentence = ""
+            return []
+        
+        # Consulta especulativa: no cuenta para la tasa de aciertos
+        cached = self.cache.get(signs, self.cache_version, record_stats=False) if self.cache is not None else None
+        if cached is not None:
+            return [self._set_partial(cached, "cache", True)]
+        
+        partials = []
+        local = self.gloss_engine.render(self._prefix_state()) if self.gloss_engine else None
+        accepted = local is not None and self.gloss_engine.accepts(local)
+        if local is not None and local.confidence > 0:
+            partials.append(self._set_partial(local.sentence, "local", accepted, local.confidence))
+        
+        if not accepted and self.provider and self.executor is not None:
+            self._pending = self.executor.submit(self._run_partial, self._generation, signs)
+        return partials
+    
+    def _run_partial(self, generation: int, signs: List[str]):
+        """Traducción en streaming con el LLM; se corta si llegan señas nuevas"""
+        def on_text(text: str) -> bool:
+            with self._lock:
+                if generation != self._generation:
+                    return False
+                partial = self._set_partial(text, "llm", False)
+            self._notify(self.on_partial, partial)
+            return True
+        
+        sentence = self._stream_llm(signs, on_text)
+        if sentence is not None:
+            SENTENCES.inc(source="llm")
+            if self.cache is not None:
+                self.cache.put(signs, sentence, self.cache_version)
+        
+        partial = None
+        status = None
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pending = None
+            if sentence is not None:
+                partial = self._set_partial(sentence, "llm", True)
+            if self._finalize_pending:
+                self._finalize_pending = False
+                if sentence is None:
+                    SENTENCES.inc(source="fallback")
+                self.current_sentence = sentence or self._fallback_sentence(signs)
+                status = self._get_status()
+        
+        if partial is not None:
+            self._notify(self.on_partial, partial)
+        if status is not None:
+            self._notify(self.on_sentence, status)
     
     def _generate_natural_sentence(self, signs: List[str]) -> str:
         """
@@ -128,10 +316,41 @@ class SentenceBuilder:
         Returns:
             Oración en español natural
         """
-        if not self.client:
-            # Sin LLM, simplemente concatenar
-            return " ".join(signs).capitalize()
-        
+        with stage_timer("sentence"):
+            # Frases repetidas: sin llamada al LLM
+            if self.cache is not None:
+                cached = self.cache.get(signs, self.cache_version)
+                if cached is not None:
+                    SENTENCES.inc(source="cache")
+                    return cached
+            
+            # Frases que encajan en la gramática local: respuesta instantánea
+            local = self.gloss_engine.translate(signs) if self.gloss_engine else None
+            if local is not None and self.gloss_engine.accepts(local):
+                SENTENCES.inc(source="local")
+                return local.sentence
+            
+            sentence = self._call_llm(signs)
+            if sentence is None:
+                # Sin LLM o con error (no se guarda en caché)
+                SENTENCES.inc(source="fallback")
+                return self._fallback_sentence(signs, local)
+            
+            SENTENCES.inc(source="llm")
+            if self.cache is not None:
+                self.cache.put(signs, sentence, self.cache_version)
+            return sentence
+    
+    def _fallback_sentence(self, signs: List[str], local=None) -> str:
+        """Oración sin LLM: traducción local si la hay, si no concatenar"""
+        if local is None and self.gloss_engine:
+            local = self.gloss_engine.translate(signs)
+        if local is not None and local.confidence > 0:
+            return local.sentence
+        return " ".join(signs).capitalize()
+    
+    def _build_messages(self, signs: List[str]) -> List[dict]:
+        """Mensajes del chat para traducir las señas"""
         signs_text = ", ".join(signs)
         
         prompt = f"""Actúa como un traductor directo de lenguaje de señas a español.
@@ -148,34 +367,80 @@ Reglas:
 
 Oración traducida:"""
 
+        return [
+            {
+                "role": "system", 
+                "content": "Eres un traductor conciso. Respondes únicamente con la oración traducida final."
+            },
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _stream_llm(self, signs: List[str], on_text: Callable[[str], bool]) -> Optional[str]:
+        """
+        Pedir la oración al LLM en streaming
+        
+        Args:
+            signs: Señas a traducir
+            on_text: Recibe el texto acumulado en cada fragmento; si devuelve
+                     False se corta el stream
+        
+        Returns:
+            Oración completa o None si no hay proveedor, falla o se cortó
+        """
+        if not self.provider:
+            return None
+        
+        stream = None
         try:
-            response = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Eres un traductor conciso. Respondes únicamente con la oración traducida final."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # Temperatura mínima para respuestas directas
-                max_tokens=60
-            )
+            with stage_timer("llm"):
+                stream = self.provider.stream_chat(self._build_messages(signs), temperature=0.1, max_tokens=60)
+                text = ""
+                for delta in stream:
+                    text += delta
+                    if not on_text(text.strip().strip('"\'')):
+                        # Señas nuevas: cerrar la conexión en lugar de esperar el resto
+                        return None
             
-            sentence = response.choices[0].message.content.strip()
+            sentence = text.strip().strip('"\'')
+            return sentence or None
+            
+        except Exception as e:
+            log_event(logger, logging.WARNING, "Error en LLM (streaming)", error=str(e))
+            return None
+        finally:
+            if stream is not None:
+                stream.close()
+    
+    def _call_llm(self, signs: List[str]) -> Optional[str]:
+        """
+        Pedir la oración al LLM
+        
+        Returns:
+            Oración generada o None si no hay proveedor o la llamada falla
+        """
+        if not self.provider:
+            return None
+        
+        signs_text = ", ".join(signs)
+
+        try:
+            with stage_timer("llm"):
+                sentence = self.provider.chat(
+                    self._build_messages(signs),
+                    temperature=0.1,  # Temperatura mínima para respuestas directas
+                    max_tokens=60
+                ).strip()
             
             # Limpiar posibles comillas o formatos
             sentence = sentence.strip('"\'')
             
-            print(f"🔄 Señas: {signs_text}")
-            print(f"📝 Oración: {sentence}")
+            log_event(logger, logging.DEBUG, "Oración generada", signs=signs_text, sentence=sentence)
             
             return sentence
             
-        except Exception as e:
-            print(f"❌ Error en LLM: {e}")
-            # Fallback: concatenar señas
-            return " ".join(signs).capitalize()
+        except LLMError as e:
+            log_event(logger, logging.WARNING, "Error en LLM", error=str(e))
+            return None
     
     def force_build_sentence(self) -> str:
         """
@@ -184,27 +449,50 @@ Oración traducida:"""
         Returns:
             Oración generada
         """
-        if len(self.signs_buffer) == 0:
-            return ""
+        with self._lock:
+            if len(self.signs_buffer) == 0:
+                return ""
             
-        signs_list = list(self.signs_buffer)
-        self.current_sentence = self._generate_natural_sentence(signs_list)
-        return self.current_sentence
+            # Reemplaza cualquier generación en segundo plano
+            self._supersede()
+            generation = self._generation
+            signs_list = list(self.signs_buffer)
+        
+        sentence = self._generate_natural_sentence(signs_list)
+        
+        with self._lock:
+            if generation == self._generation:
+                self.current_sentence = sentence
+                self.sentence_generated = True
+        return sentence
     
     def clear_buffer(self):
         """Limpiar el buffer de señas"""
-        self.signs_buffer.clear()
-        self.current_sentence = ""
-        self.last_raw_signs = ""
-        self.last_sign_time = 0
-        self.sentence_generated = False
+        with self._lock:
+            self._supersede()
+            self.signs_buffer.clear()
+            self.current_sentence = ""
+            self.partial_sentence = ""
+            self._prefix_states = []
+            self.last_raw_signs = ""
+            self.last_sign_time = 0
+            self.sentence_generated = False
     
     def remove_last_sign(self) -> dict:
         """Eliminar la última seña del buffer"""
-        if len(self.signs_buffer) > 0:
-            self.signs_buffer.pop()
-            self.last_raw_signs = " ".join(list(self.signs_buffer))
-        return self._get_status()
+        partials = []
+        with self._lock:
+            if len(self.signs_buffer) > 0:
+                self.signs_buffer.pop()
+                self.last_raw_signs = " ".join(list(self.signs_buffer))
+                self.sentence_generated = False
+                self._supersede()
+                if self.incremental:
+                    partials = self._update_partial()
+            status = self._get_status()
+        
+        self._notify_partials(partials)
+        return status
     
     def _get_status(self) -> dict:
         """Obtener estado actual del constructor"""
@@ -213,7 +501,9 @@ Oración traducida:"""
             "signs_count": len(self.signs_buffer),
             "raw_signs": self.last_raw_signs,
             "current_sentence": self.current_sentence,
-            "ready_to_build": len(self.signs_buffer) >= 2
+            "partial_sentence": self.partial_sentence,
+            "ready_to_build": len(self.signs_buffer) >= 2,
+            "generating": self._pending is not None and not self._pending.done()
         }
     
     def get_signs_as_text(self) -> str:
@@ -228,12 +518,12 @@ def translate_signs_to_sentence(signs: List[str], api_key: Optional[str] = None)
     
     Args:
         signs: Lista de señas
-        api_key: API key de Groq (opcional)
+        api_key: API key de Groq (opcional, por defecto GROQ_API_KEY)
         
     Returns:
         Oración en español natural
     """
-    builder = SentenceBuilder(api_key)
+    builder = SentenceBuilder(api_key or os.environ.get('GROQ_API_KEY'))
     for sign in signs:
         builder.add_sign(sign)
     return builder.force_build_sentence()
@@ -244,7 +534,7 @@ if __name__ == "__main__":
     print("=== Test de SentenceBuilder ===\n")
     
     # Crear instancia (necesita GROQ_API_KEY en el entorno)
-    builder = SentenceBuilder()
+    builder = SentenceBuilder(os.environ.get('GROQ_API_KEY'))
     
     # Simular detección de señas
     test_signs = ["hola", "yo", "querer", "comer"]
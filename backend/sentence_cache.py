@@ -0,0 +1,288 @@
+"""
+Caché de oraciones: secuencia de señas -> oración natural
+El vocabulario es chico (18 señas en Traine/labels.json) y las frases se
+repiten mucho, así que la mayoría de las oraciones salen de aquí sin llamar al LLM
+
+- LRU acotado en memoria con vencimiento (TTL)
+- Clave: (versión del prompt y modelo, tupla de señas normalizadas)
+- Persistencia opcional en SQLite para sobrevivir reinicios y precalentar.
+  La tabla se acota a max_entries (se borran las filas más viejas) y las
+  escrituras se confirman por lotes: cada `commit_every` oraciones, cada
+  `commit_interval` segundos o al cerrar
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from metrics import SENTENCE_CACHE_LOOKUPS
+
+CacheKey = Tuple[str, Tuple[str, ...]]
+
+
+def normalize_signs(signs: Iterable[str]) -> Tuple[str, ...]:
+    """Normalizar las señas (minúsculas, sin espacios, Unicode NFC) para usarlas como clave"""
+    return tuple(unicodedata.normalize("NFC", s.strip().lower()) for s in signs if s and s.strip())
+
+
+class SentenceCache:
+    """
+    Caché LRU + TTL de oraciones, segura entre hilos
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30 * 24 * 3600,
+                 path: Optional[str] = None, commit_every: int = 32, commit_interval: float = 5.0):
+        """
+        Args:
+            max_entries: Entradas como máximo (en memoria y en SQLite)
+            ttl_seconds: Vida de cada entrada (0 = sin vencimiento)
+            path: Archivo SQLite para persistir (None = solo memoria)
+            commit_every: Oraciones nuevas que disparan un commit
+            commit_interval: Segundos máximos entre commits con escrituras pendientes
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl = max(0.0, ttl_seconds)
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self.commit_interval = max(0.0, commit_interval)
+        self._entries: "OrderedDict[CacheKey, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+        # Estadísticas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if path:
+            self._open_db(path)
+            self.load()
+
+    def _open_db(self, path: str):
+        """Abrir (o crear) la base SQLite"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sentences ("
+                " version TEXT NOT NULL,"
+                " signs TEXT NOT NULL,"
+                " sentence TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (version, signs))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS sentences_created ON sentences (created_at)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Caché de oraciones sin persistencia ({e})")
+            self._db = None
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - created_at > self.ttl
+
+    def get(self, signs: Sequence[str], version: str, record_stats: bool = True) -> Optional[str]:
+        """
+        Buscar la oración de una secuencia de señas
+
+        Args:
+            signs: Secuencia de señas
+            version: Versión del prompt y modelo
+            record_stats: Contar el acierto o fallo (False para las consultas
+                especulativas de las traducciones parciales)
+
+        Returns:
+            La oración o None si no está (o venció)
+        """
+        key = (version, normalize_signs(signs))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[1], now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                if record_stats:
+                    self.misses += 1
+                    SENTENCE_CACHE_LOOKUPS.inc(result="miss")
+                return None
+            self._entries.move_to_end(key)
+            if record_stats:
+                self.hits += 1
+                SENTENCE_CACHE_LOOKUPS.inc(result="hit")
+            return entry[0]
+
+    def put(self, signs: Sequence[str], sentence: str, version: str):
+        """Guardar una oración (y persistirla si hay SQLite)"""
+        key = (version, normalize_signs(signs))
+        if not key[1] or not sentence:
+            return
+        now = time.time()
+        with self._lock:
+            self._store(key, sentence, now)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO sentences VALUES (?, ?, ?, ?)",
+                        (version, " ".join(key[1]), sentence, now)
+                    )
+                    self._uncommitted += 1
+                    if (self._uncommitted >= self.commit_every or
+                            time.monotonic() - self._last_commit >= self.commit_interval):
+                        self._commit()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Error persistiendo oración: {e}")
+
+    def _commit(self):
+        """Recortar la tabla a max_entries y confirmar (requiere self._lock y self._db)"""
+        self._db.execute(
+            "DELETE FROM sentences WHERE rowid IN ("
+            " SELECT rowid FROM sentences ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._db.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def flush(self):
+        """Confirmar las escrituras pendientes en SQLite"""
+        with self._lock:
+            if self._db is not None and self._uncommitted:
+                try:
+                    self._commit()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Error persistiendo oraciones: {e}")
+
+    def _store(self, key: CacheKey, sentence: str, created_at: float):
+        """Insertar en el LRU (requiere self._lock)"""
+        self._entries[key] = (sentence, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def load(self) -> int:
+        """
+        Cargar en memoria las entradas vigentes más recientes de SQLite
+
+        Returns:
+            Entradas cargadas
+        """
+        if self._db is None:
+            return 0
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT version, signs, sentence, created_at FROM sentences"
+                " ORDER BY created_at DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+            loaded = 0
+            # De la más vieja a la más nueva para que el orden LRU quede bien
+            for version, signs, sentence, created_at in reversed(rows):
+                if not self._expired(created_at, now):
+                    self._store((version, tuple(signs.split(" "))), sentence, created_at)
+                    loaded += 1
+        if loaded:
+            print(f"✅ Caché de oraciones: {loaded} entradas cargadas de {self.path}")
+        return loaded
+
+    def warm(self, phrases: Iterable[Sequence[str]], generate, version: str) -> int:
+        """
+        Precalentar la caché con frases frecuentes
+
+        Args:
+            phrases: Secuencias de señas
+            generate: Función señas -> oración (p. ej. la llamada al LLM)
+            version: Versión del prompt
+
+        Returns:
+            Oraciones generadas (las que ya estaban no se regeneran)
+        """
+        generated = 0
+        for signs in phrases:
+            if self.get(signs, version) is None:
+                sentence = generate(list(signs))
+                if sentence:
+                    self.put(signs, sentence, version)
+                    generated += 1
+        return generated
+
+    def clear(self):
+        """Vaciar la caché en memoria y en disco"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM sentences")
+                self._db.commit()
+                self._uncommitted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        """Contadores de aciertos/fallos y ocupación"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "persistent": self._db is not None
+        }
+
+    def close(self):
+        """Confirmar lo pendiente y cerrar la base SQLite"""
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def read_phrases(path: str) -> List[List[str]]:
+    """Leer frases de un archivo de texto (una secuencia de señas por línea, # comenta)"""
+    phrases = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                phrases.append(line.replace(",", " ").split())
+    return phrases
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import config
+    from llm_provider import create_provider
+    from sentence_builder import SentenceBuilder
+
+    parser = argparse.ArgumentParser(description="Administrar la caché de oraciones")
+    parser.add_argument("--warm", metavar="ARCHIVO", help="Precalentar con las frases del archivo (una por línea)")
+    parser.add_argument("--clear", action="store_true", help="Vaciar la caché")
+    args = parser.parse_args()
+
+    cache = SentenceCache(config.SENTENCE_CACHE_SIZE, config.SENTENCE_CACHE_TTL, config.SENTENCE_CACHE_PATH or None)
+    if args.clear:
+        cache.clear()
+    if args.warm:
+        provider = create_provider(
+            config.LLM_PROVIDER, model=config.LLM_MODEL, api_key=config.LLM_API_KEY or None,
+            base_url=config.LLM_BASE_URL or None, timeout=config.LLM_TIMEOUT, max_retries=config.LLM_MAX_RETRIES
+        )
+        builder = SentenceBuilder(provider=provider, cache=cache)
+        count = cache.warm(read_phrases(args.warm), builder._call_llm, builder.cache_version)
+        print(f"✨ {count} oraciones nuevas en la caché")
+    print(cache.get_stats())
+    cache.close()
@@ -0,0 +1,130 @@
+"""
+Buffer circular preasignado para secuencias de keypoints
+Reemplaza la lista con pop(0) + np.array + np.vstack del bucle de detección:
+append O(1), vista ordenada sin copias y un único remuestreo fusionado
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from keypoints import NUM_FEATURES
+
+# Frames que espera el modelo
+MODEL_FRAMES = 30
+
+
+@lru_cache(maxsize=256)
+def _fix_indices(length: int, target: int) -> np.ndarray:
+    """
+    Índices de fix_sequence: submuestreo uniforme si sobran frames,
+    relleno repitiendo el último si faltan
+    """
+    if length >= target:
+        return np.linspace(0, length - 1, target).astype(int)
+    return np.concatenate([np.arange(length), np.full(target - length, length - 1)])
+
+
+@lru_cache(maxsize=256)
+def resample_indices(length: int, target: int = MODEL_FRAMES, window: Optional[int] = None) -> np.ndarray:
+    """
+    Índices para llevar una secuencia de `length` frames a `target` frames
+
+    Equivale a encadenar fix_sequence (a `window` frames) y el ajuste a 30
+    frames de predict_sign, pero en un solo gather.
+
+    Args:
+        length: Frames disponibles
+        target: Frames de salida (los que espera el modelo)
+        window: Si se indica, primero se ajusta a window frames como fix_sequence
+
+    Returns:
+        Array de índices de solo lectura (se cachea)
+    """
+    if window is None:
+        idxs = np.linspace(0, length - 1, target).astype(int)
+    else:
+        idxs = _fix_indices(length, window)[np.linspace(0, window - 1, target).astype(int)]
+    idxs.setflags(write=False)
+    return idxs
+
+
+class KeypointRingBuffer:
+    """
+    Buffer circular de (capacidad, 135) float32
+
+    Cada frame se escribe dos veces (posición i e i + capacidad), así los
+    últimos N frames siempre forman un bloque contiguo y ordered() es una
+    vista sin copias.
+    """
+
+    def __init__(self, capacity: int, num_features: int = NUM_FEATURES):
+        """
+        Args:
+            capacity: Máximo de frames que se conservan
+            num_features: Features por frame
+        """
+        self.capacity = max(1, capacity)
+        self.num_features = num_features
+        self._data = np.zeros((2 * self.capacity, num_features), dtype=np.float32)
+        self._head = 0  # Próxima posición a escribir (0..capacity-1)
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def next_slot(self) -> np.ndarray:
+        """
+        Fila donde escribir el próximo frame (p. ej. con extract_keypoints(out=...))
+        Hay que llamar a commit() después de escribirla.
+        """
+        return self._data[self._head]
+
+    def commit(self):
+        """Confirmar el frame escrito en next_slot()"""
+        self._data[self._head + self.capacity] = self._data[self._head]
+        self._head = (self._head + 1) % self.capacity
+        self._len = min(self._len + 1, self.capacity)
+
+    def append(self, kp: np.ndarray):
+        """Agregar un frame en O(1), descartando el más antiguo si está lleno"""
+        self._data[self._head] = kp
+        self.commit()
+
+    def ordered(self) -> np.ndarray:
+        """Vista (len, features) del más antiguo al más reciente, sin copias"""
+        start = self._head + self.capacity - self._len
+        return self._data[start:start + self._len]
+
+    def resample(self, target: int = MODEL_FRAMES, window: Optional[int] = None,
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Remuestrear la secuencia a `target` frames en una sola operación
+
+        Args:
+            target: Frames de salida
+            window: Ajuste intermedio de fix_sequence (ver resample_indices)
+            out: Buffer (target, features) donde escribir el resultado
+
+        Returns:
+            Array (target, features)
+        """
+        if self._len == 0:
+            raise ValueError("No hay frames en el buffer")
+        return np.take(self.ordered(), resample_indices(self._len, target, window), axis=0, out=out)
+
+    def clear(self):
+        """Vaciar el buffer (no libera memoria)"""
+        self._head = 0
+        self._len = 0
+
+    def resize(self, capacity: int):
+        """Cambiar la capacidad conservando los frames más recientes"""
+        capacity = max(1, capacity)
+        if capacity == self.capacity:
+            return
+        recent = self.ordered()[-capacity:].copy()
+        self.__init__(capacity, self.num_features)
+        for kp in recent:
+            self.append(kp)
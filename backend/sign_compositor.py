@@ -0,0 +1,254 @@
+"""
+Composición de animaciones del avatar: glosas -> un stream de poses continuo
+En lugar de reproducir un clip por seña, los clips de una oración se unen
+en una sola secuencia lista para reproducir:
+
+- Remuestreo temporal: cada clip se lleva del fps en que se grabó al fps
+  pedido (y a la velocidad pedida) con interpolación lineal vectorizada
+- Transiciones: los últimos `blend_frames` frames de un clip se mezclan
+  con los primeros del siguiente con una curva suave (smoothstep), así el
+  avatar no salta de la pose final de una seña a la inicial de la otra
+- Puntos ausentes (en ceros, p. ej. una mano que no se detectó) no se
+  interpolan hacia el origen: se toma el valor del otro frame
+- Las composiciones se cachean por secuencia de glosas y velocidad; las
+  oraciones largas se pueden consumir por partes con stream()
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sentence_cache import normalize_signs
+
+POINT_DIMS = 3
+
+
+class CompositionChunk(NamedTuple):
+    """Parte de una composición: frames ya definitivos y las señas que empiezan en ella"""
+    index: int
+    offset: int                 # Frame de la composición donde empieza `frames`
+    frames: np.ndarray          # (n, features) float32
+    segments: List[Dict]        # Señas que empiezan en este chunk (vacío en el cierre)
+
+
+class Composition(NamedTuple):
+    """Secuencia completa de una oración"""
+    glosses: Tuple[str, ...]
+    frames: np.ndarray          # (N, features) float32
+    fps: float
+    segments: List[Dict]        # {"gloss", "start_frame", "end_frame", "start", "end"}
+
+
+def ease(count: int) -> np.ndarray:
+    """Pesos de la transición (smoothstep de 0 a 1, sin incluir los extremos)"""
+    t = np.arange(1, count + 1, dtype=np.float32) / (count + 1)
+    return t * t * (3 - 2 * t)
+
+
+def blend(a: np.ndarray, b: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Mezclar frame a frame dos bloques de poses
+
+    Args:
+        a: (n, features) frames de origen
+        b: (n, features) frames de destino
+        weights: (n,) peso de b en cada frame
+
+    Returns:
+        (n, features) float32. Un punto ausente (x, y, z en ceros) en uno de
+        los lados toma el valor del otro en vez de interpolar hacia el origen.
+    """
+    pa = a.reshape(len(a), -1, POINT_DIMS)
+    pb = b.reshape(len(b), -1, POINT_DIMS)
+    mixed = pa + (pb - pa) * weights[:, None, None]
+    mixed = np.where(~pa.any(axis=2, keepdims=True), pb, mixed)
+    mixed = np.where(~pb.any(axis=2, keepdims=True), pa, mixed)
+    return mixed.reshape(a.shape).astype(np.float32, copy=False)
+
+
+def resample_clip(frames: np.ndarray, source_fps: float, target_fps: float, speed: float = 1.0) -> np.ndarray:
+    """
+    Llevar un clip a otro fps (y velocidad) con interpolación lineal
+
+    Args:
+        frames: (n, features) poses del clip
+        source_fps: fps en que se grabó
+        target_fps: fps de salida
+        speed: 1.0 = velocidad original, 0.5 = el doble de lento
+
+    Returns:
+        (m, features) float32 con la misma duración / speed
+    """
+    n = len(frames)
+    if n < 2:
+        return np.array(frames, dtype=np.float32)
+    duration = (n - 1) / (source_fps * speed)
+    count = max(2, int(round(duration * target_fps)) + 1)
+    if count == n:
+        return np.array(frames, dtype=np.float32)
+
+    positions = np.linspace(0, n - 1, count, dtype=np.float32)
+    lower = np.minimum(positions.astype(np.intp), n - 2)
+    return blend(frames[lower], frames[lower + 1], positions - lower)
+
+
+class SignCompositor:
+    """
+    Une los clips de una secuencia de glosas en un stream continuo, con caché
+    """
+
+    def __init__(self, assets, fps: float = 30.0, blend_frames: int = 6, cache_size: int = 128):
+        """
+        Args:
+            assets: AvatarAssetStore con los clips de cada seña
+            fps: fps de salida por defecto
+            blend_frames: Frames de mezcla entre una seña y la siguiente
+            cache_size: Composiciones en memoria como máximo (LRU)
+        """
+        self.assets = assets
+        self.fps = fps
+        self.blend_frames = max(0, blend_frames)
+        self.cache_size = max(0, cache_size)
+        self._cache: "OrderedDict[Tuple, Composition]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Estadísticas
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, glosses: Iterable[str]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """
+        Separar las glosas con clip de las que no tienen
+
+        Returns:
+            Tupla de (glosas con clip en orden, glosas sin clip)
+        """
+        available, missing = [], []
+        for gloss in normalize_signs(glosses):
+            sequence = self.assets.sequence(gloss)
+            (available if sequence is not None and len(sequence) else missing).append(gloss)
+        return tuple(available), tuple(missing)
+
+    def _clip(self, gloss: str, fps: float, speed: float) -> np.ndarray:
+        sequence = self.assets.sequence(gloss)
+        return resample_clip(sequence.keypoints, sequence.fps, fps, speed)
+
+    def _key(self, glosses: Sequence[str], fps: float, speed: float) -> Tuple:
+        return tuple(glosses), round(fps, 3), round(speed, 3), self.blend_frames
+
+    def cached(self, glosses: Sequence[str], fps: Optional[float] = None, speed: float = 1.0) -> Optional[Composition]:
+        """Composición en caché (None si no está)"""
+        key = self._key(glosses, fps or self.fps, speed)
+        with self._lock:
+            composition = self._cache.get(key)
+            if composition is not None:
+                self._cache.move_to_end(key)
+            return composition
+
+    def _store(self, composition: Composition, speed: float):
+        if not self.cache_size:
+            return
+        key = self._key(composition.glosses, composition.fps, speed)
+        with self._lock:
+            self._cache[key] = composition
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stream(self, glosses: Sequence[str], fps: Optional[float] = None, speed: float = 1.0) -> Iterator[CompositionChunk]:
+        """
+        Componer por partes: un chunk por seña, apenas sus frames quedan definitivos
+
+        Los últimos frames de cada seña se retienen hasta conocer la siguiente
+        (para mezclarlos) y salen en el chunk siguiente o en el de cierre.
+        Si la composición está en caché, sale en un solo chunk.
+
+        Args:
+            glosses: Glosas con clip (ver resolve)
+            fps: fps de salida (por defecto el del compositor)
+            speed: Velocidad de reproducción
+        """
+        fps = fps or self.fps
+        glosses = tuple(glosses)
+        composition = self.cached(glosses, fps, speed)
+        if composition is not None:
+            self.hits += 1
+            yield CompositionChunk(0, 0, composition.frames, composition.segments)
+            return
+        self.misses += 1
+
+        parts: List[np.ndarray] = []
+        segments: List[Dict] = []
+        carry: Optional[np.ndarray] = None  # Cola de la seña anterior, todavía sin emitir
+        position = 0                        # Frame de la composición donde empieza carry
+        index = 0
+
+        for gloss in glosses:
+            clip = self._clip(gloss, fps, speed)
+            pieces = []
+            if carry is None:
+                overlap = 0
+                start = position
+            else:
+                overlap = min(len(carry), self.blend_frames, len(clip) - 1)
+                pieces.append(carry[:len(carry) - overlap])
+                if overlap:
+                    pieces.append(blend(carry[len(carry) - overlap:], clip[:overlap], ease(overlap)))
+                start = position + len(carry) - overlap
+
+            keep = min(self.blend_frames, len(clip) - overlap - 1)
+            pieces.append(clip[overlap:len(clip) - keep])
+            carry = clip[len(clip) - keep:] if keep > 0 else clip[:0]
+
+            frames = np.concatenate(pieces) if len(pieces) > 1 else pieces[0]
+            segment = {
+                "gloss": gloss,
+                "start_frame": start,
+                "end_frame": start + len(clip),
+                "start": round(start / fps, 3),
+                "end": round((start + len(clip)) / fps, 3)
+            }
+            segments.append(segment)
+            parts.append(frames)
+            yield CompositionChunk(index, position, frames, [segment])
+            position += len(frames)
+            index += 1
+
+        if carry is not None and len(carry):
+            parts.append(carry)
+            yield CompositionChunk(index, position, carry, [])
+
+        features = parts[0].shape[1] if parts else 0
+        frames = np.concatenate(parts) if parts else np.zeros((0, features), dtype=np.float32)
+        self._store(Composition(glosses, frames, fps, segments), speed)
+
+    def compose(self, glosses: Sequence[str], fps: Optional[float] = None, speed: float = 1.0) -> Composition:
+        """
+        Componer una secuencia completa (desde la caché si ya se compuso)
+
+        Args:
+            glosses: Glosas con clip (ver resolve)
+            fps: fps de salida (por defecto el del compositor)
+            speed: Velocidad de reproducción
+        """
+        fps = fps or self.fps
+        chunks = list(self.stream(glosses, fps, speed))
+        composition = self.cached(tuple(glosses), fps, speed)
+        if composition is not None:
+            return composition
+        # Caché desactivada: unir los chunks
+        frames = np.concatenate([c.frames for c in chunks]) if chunks else np.zeros((0, 0), dtype=np.float32)
+        return Composition(tuple(glosses), frames, fps, [s for c in chunks for s in c.segments])
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            entries = len(self._cache)
+        return {
+            "fps": self.fps,
+            "blend_frames": self.blend_frames,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -1,10 +1,29 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-from tensorflow import keras
 from typing import Dict, List, Optional, Tuple
 import json
+import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from batch_scheduler import PredictionBatcher
+from decision_engine import DecisionEngine
+from detection_session import DetectionSession
+from inference_backends import create_backend
+from keypoint_recorder import KeypointRecorder, RecordingSink
+from keypoints import NUM_FEATURES, extract_keypoints, hands_present
+from metrics import FRAMES_GATED, FRAMES_PROCESSED, PREDICTIONS, SIGNS, WINDOWS_SKIPPED, observe_stage, stage_timer
+from motion_gate import FrameGate
+from sequence_buffer import MODEL_FRAMES, resample_indices
+from frame_protocol import keypoints_have_hands
+from resource_pool import ResourcePool
+from sign_spotter import SignSpotter
+from structured_logging import get_logger, log_event
+from vision_pipelines import MAX_COMPLEXITY, clamp_complexity, create_pipeline
+from vision_stage import AdaptiveVision, run_vision
 
 # Importar el constructor de oraciones
 try:
@@ -15,64 +34,190 @@ except ImportError:
     print("⚠️ SentenceBuilder no disponible")
 
 
+logger = get_logger("detector")
+
+# Configuración de MediaPipe Holistic (optimizada como en Senia.py)
+# Con tracking entre frames: el pool da a cada sesión su propia instancia
+# mientras esté libre y la reinicia cuando pasa a otra sesión
+HOLISTIC_CONFIG = {
+    "static_image_mode": False,
+    "model_complexity": 1,
+    "smooth_landmarks": True,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5
+}
+
+
 class SignLanguageDetector:
     """
     Clase para detectar y traducir lenguaje de señas usando MediaPipe y un modelo de TensorFlow
     Implementación optimizada basada en Senia.py
     """
     
-    def __init__(self, model_path: str):
+    def __init__(
+        self,
+        model_path: str,
+        holistic_pool_size: int = 1,
+        vision_pipeline: str = "holistic",
+        inference_backend: str = "tf_function",
+        sentence_workers: int = 2,
+        sentence_cache=None,
+        gloss_engine=None,
+        incremental_sentences: bool = False,
+        llm_provider=None,
+        decision_options: Optional[Dict] = None,
+        spotter_options: Optional[Dict] = None,
+        frame_gate_options: Optional[Dict] = None,
+        vision_options: Optional[Dict] = None
+    ):
         """
         Inicializar el detector de lenguaje de señas
         
         Args:
             model_path: Ruta al archivo del modelo .keras
+            holistic_pool_size: Instancias de MediaPipe Holistic compartidas
+            vision_pipeline: holistic o hands (MediaPipe Hands + Pose lite)
+            inference_backend: keras, tf_function, tflite u onnx
+            sentence_workers: Hilos para generar oraciones con el LLM en segundo plano
+            sentence_cache: SentenceCache compartida por todas las sesiones (opcional)
+            gloss_engine: GlossEngine para traducir localmente antes del LLM (opcional)
+            incremental_sentences: Traducir en cada seña nueva (mensajes sentence_partial)
+            llm_provider: Proveedor LLM compartido por las sesiones (None = sin LLM)
+            decision_options: Argumentos del DecisionEngine de cada sesión (suavizado, umbrales, stride)
+            spotter_options: Argumentos del SignSpotter de cada sesión (umbrales de energía, compuerta)
+            frame_gate_options: Argumentos del FrameGate de cada sesión (umbral de diferencia de imagen)
+            vision_options: Argumentos del AdaptiveVision de cada sesión (ROI, reescalado, presupuesto)
         """
         self.model_path = model_path
         self.model = None
+        self.backend = None
+        self.inference_backend = inference_backend
         self.mp_holistic = mp.solutions.holistic
         self.mp_drawing = mp.solutions.drawing_utils
         
-        # Configuración de MediaPipe Holistic (optimizada como en Senia.py)
-        self.holistic = self.mp_holistic.Holistic(
-            static_image_mode=False,
-            model_complexity=1,
-            smooth_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
+        # Pool de MediaPipe Holistic compartido entre sesiones (optimizada como en Senia.py)
+        self.holistic_pool_size = holistic_pool_size
+        self.vision_pipeline = vision_pipeline
+        self.holistic_pool = ResourcePool(
+            self._create_holistic, holistic_pool_size, name=f"MediaPipe ({vision_pipeline})",
+            reset=self._reset_holistic
         )
         
+        # Pools por model_complexity (la etapa adaptativa crea los demás al usarlos)
+        self.holistic_pools = {HOLISTIC_CONFIG["model_complexity"]: self.holistic_pool}
+        self._pools_lock = threading.Lock()
+        
         # Cargar labels
         self.labels = self._load_labels()
         
         # Cargar el modelo
         self._load_model()
         
-        # Configuración del sistema (optimizada para flujo continuo)
-        self.NUM_FRAMES = 10  # Frames por secuencia (más rápido)
-        self.CONFIDENCE_THRESHOLD = 0.60  # Umbral más bajo para mejor flujo
-        self.SMOOTHING_WINDOW = 2  # Ventana muy pequeña para respuesta rápida
-        
-        # Estados del sistema
-        self.state = "WAIT_HANDS"
-        self.sequence = []
-        self.smooth_preds = []
-        self.predicted_label = ""
-        
-        # Control de flujo continuo
-        self.last_prediction_time = 0
-        self.cooldown_seconds = 1.5  # Tiempo entre predicciones
-        self.frames_since_last_pred = 0
-        self.continuous_mode = True
-        
-        # Constructor de oraciones con LLM
-        self.sentence_builder = None
-        if SENTENCE_BUILDER_AVAILABLE:
-            try:
-                self.sentence_builder = SentenceBuilder()
-                print("✅ SentenceBuilder inicializado")
-            except Exception as e:
-                print(f"⚠️ Error inicializando SentenceBuilder: {e}")
+        # Micro-batching entre sesiones (se activa con enable_batching)
+        self.batcher = None
+        
+        # Grabación de keypoints por sesión (se activa con enable_recording)
+        self.recording_sink = None
+        self.recording_options: Dict = {}
+        
+        # Buffers de trabajo por hilo de inferencia
+        self._thread_local = threading.local()
+        
+        # Proveedor LLM compartido por los constructores de oraciones de cada sesión
+        self.llm_provider = llm_provider
+        
+        self.sentence_cache = sentence_cache
+        self.gloss_engine = gloss_engine
+        self.incremental_sentences = incremental_sentences
+        
+        # Las llamadas al LLM no bloquean el procesamiento de frames
+        self.sentence_executor = ThreadPoolExecutor(
+            max_workers=max(1, sentence_workers), thread_name_prefix="sentence"
+        )
+        
+        self.decision_options = dict(decision_options or {})
+        self.spotter_options = dict(spotter_options or {})
+        self.frame_gate_options = dict(frame_gate_options or {})
+        self.vision_options = dict(vision_options or {})
+        
+        # Sesión por defecto para la API REST y usos sin conexión propia
+        self.default_session = DetectionSession(
+            "default", self.create_sentence_builder(), self.create_spotter(), self.create_frame_gate(),
+            self.create_vision()
+        )
+    
+    def _create_holistic(self, complexity: Optional[int] = None):
+        """Crear una instancia del pipeline de visión (Holistic o Hands + Pose lite)"""
+        return create_pipeline(self.vision_pipeline, HOLISTIC_CONFIG, complexity)
+    
+    @staticmethod
+    def _reset_holistic(holistic):
+        """Olvidar el tracking de la sesión anterior antes de usar la instancia en otra"""
+        holistic.reset()
+    
+    def release_session(self, session_id: str):
+        """Olvidar la afinidad de una sesión cerrada con las instancias de MediaPipe"""
+        for pool in list(self.holistic_pools.values()):
+            pool.release_owner(session_id)
+    
+    def holistic_pool_for(self, complexity: int) -> ResourcePool:
+        """Pool de Holistic con un model_complexity dado (se crea la primera vez)"""
+        # Complejidades que el pipeline no soporta comparten el pool del máximo
+        complexity = clamp_complexity(self.vision_pipeline, complexity)
+        pool = self.holistic_pools.get(complexity)
+        if pool is None:
+            with self._pools_lock:
+                pool = self.holistic_pools.get(complexity)
+                if pool is None:
+                    pool = ResourcePool(
+                        lambda: self._create_holistic(complexity), self.holistic_pool_size,
+                        name=f"MediaPipe ({self.vision_pipeline}, complexity={complexity})",
+                        reset=self._reset_holistic
+                    )
+                    self.holistic_pools[complexity] = pool
+        return pool
+    
+    def create_sentence_builder(self):
+        """Crear un constructor de oraciones que comparte el cliente LLM"""
+        if not SENTENCE_BUILDER_AVAILABLE:
+            return None
+        try:
+            return SentenceBuilder(
+                provider=self.llm_provider,
+                executor=self.sentence_executor,
+                cache=self.sentence_cache,
+                gloss_engine=self.gloss_engine,
+                incremental=self.incremental_sentences
+            )
+        except Exception as e:
+            print(f"⚠️ Error inicializando SentenceBuilder: {e}")
+            return None
+    
+    def create_decision_engine(self) -> DecisionEngine:
+        """Crear el motor de decisión de una sesión con la configuración del detector"""
+        return DecisionEngine(**self.decision_options)
+    
+    def create_spotter(self) -> SignSpotter:
+        """Crear el segmentador de una sesión (con su propio motor de decisión)"""
+        return SignSpotter(self.create_decision_engine(), self.labels, **self.spotter_options)
+    
+    def create_frame_gate(self) -> FrameGate:
+        """Crear la compuerta de movimiento de la etapa de visión de una sesión"""
+        return FrameGate(**self.frame_gate_options)
+    
+    def create_vision(self) -> AdaptiveVision:
+        """Crear el estado de la etapa de visión adaptativa de una sesión"""
+        options = {"complexity": HOLISTIC_CONFIG["model_complexity"], **self.vision_options}
+        # La etapa adaptativa no sube más allá de lo que soporta el pipeline
+        limit = MAX_COMPLEXITY[self.vision_pipeline]
+        options["max_complexity"] = min(options.get("max_complexity", limit), limit)
+        options["complexity"] = min(options["complexity"], limit)
+        return AdaptiveVision(**options)
+    
+    @property
+    def sentence_builder(self):
+        """Constructor de oraciones de la sesión por defecto"""
+        return self.default_session.sentence_builder
     
     def _load_labels(self):
         """Cargar labels desde el archivo JSON"""
@@ -88,15 +233,16 @@ class SignLanguageDetector:
 
         
     def _load_model(self):
-        """Cargar el modelo de TensorFlow"""
+        """Cargar el modelo con el backend de inferencia configurado"""
         try:
-            import tensorflow as tf
-            self.model = tf.keras.models.load_model(self.model_path)
-            print(f"Modelo cargado exitosamente desde {self.model_path}")
-            print(f"Input shape: {self.model.input_shape}")
-            print(f"Output shape: {self.model.output_shape}")
+            self.backend = create_backend(self.inference_backend, self.model_path, self.labels)
+            # Solo los backends de TensorFlow mantienen el modelo de Keras en memoria
+            self.model = getattr(self.backend, "model", None)
+            print(f"Modelo cargado exitosamente desde {self.model_path} (backend: {self.backend.name})")
+            print(f"Clases de salida: {self.backend.num_classes}")
         except Exception as e:
             print(f"Error cargando modelo: {str(e)}")
+            self.backend = None
             self.model = None
     
     def get_available_signs(self) -> List[str]:
@@ -108,119 +254,264 @@ class SignLanguageDetector:
         """
         return self.labels
     
-    def extract_keypoints(self, results) -> Optional[np.ndarray]:
+    @staticmethod
+    def extract_keypoints(results, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
         """
-        Extraer keypoints usando la misma lógica que Senia.py
+        Extraer keypoints usando la misma lógica que Senia.py (ver keypoints.py)
         El modelo espera 135 features:
         - Pose básica (3 puntos * 3 coords = 9 features)
         - Mano Izquierda (21*3=63)
         - Mano Derecha (21*3=63)
         Total: 135
         """
-        out = []
-        pose_map = {"left_shoulder": 11, "right_shoulder": 12, "nose": 0}
-
-        # Pose básica (solo 3 puntos clave)
-        if results.pose_landmarks:
-            for name in pose_map:
-                lm = results.pose_landmarks.landmark[pose_map[name]]
-                out.extend([lm.x, lm.y, lm.z])
-        else:
-            out.extend([0.0] * 9)
-
-        # Mano izquierda
-        if results.left_hand_landmarks:
-            for lm in results.left_hand_landmarks.landmark:
-                out.extend([lm.x, lm.y, lm.z])
-        else:
-            out.extend([0.0] * 63)
-
-        # Mano derecha
-        if results.right_hand_landmarks:
-            for lm in results.right_hand_landmarks.landmark:
-                out.extend([lm.x, lm.y, lm.z])
-        else:
-            out.extend([0.0] * 63)
-
-        return np.array(out, dtype=np.float32)
+        return extract_keypoints(results, out)
     
-    def hands_present(self, results) -> bool:
+    @staticmethod
+    def hands_present(results) -> bool:
         """Verificar si hay manos presentes"""
-        return (
-            results.left_hand_landmarks is not None or 
-            results.right_hand_landmarks is not None
-        )
+        return hands_present(results)
     
-    def fix_sequence(self, seq) -> np.ndarray:
-        """Ajustar secuencia a NUM_FRAMES frames"""
-        seq = np.array(seq)
-
-        if len(seq) >= self.NUM_FRAMES:
-            idxs = np.linspace(0, len(seq)-1, self.NUM_FRAMES).astype(int)
-            return seq[idxs]
-
-        last = seq[-1]
-        while len(seq) < self.NUM_FRAMES:
-            seq = np.vstack([seq, last])
-
-        return seq[:self.NUM_FRAMES]
+    def fix_sequence(self, seq, num_frames: int) -> np.ndarray:
+        """Ajustar secuencia a num_frames frames (submuestreo o relleno con el último)"""
+        seq = np.asarray(seq)
+        return seq[resample_indices(len(seq), num_frames, window=num_frames)]
     
 
     
-    def predict_sign(self, seq30) -> Tuple[str, float]:
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
         """
-        Predecir la seña usando la lógica de Senia.py
+        Pasada del modelo sobre un batch de secuencias
+        
+        Args:
+            batch: Array (B, 30, 135)
+            
+        Returns:
+            Array (B, clases) con las probabilidades
+        """
+        return self.backend.predict_batch(batch)
+    
+    def enable_batching(self, window_ms: float = 8.0, max_batch_size: int = 32):
+        """
+        Agrupar las predicciones de todas las sesiones en micro-batches
+        
+        Args:
+            window_ms: Espera máxima para completar un batch (0 desactiva el batching)
+            max_batch_size: Tamaño máximo de batch
+        """
+        if self.batcher is not None:
+            self.batcher.close()
+            self.batcher = None
+        if window_ms > 0 and self.backend is not None:
+            self.batcher = PredictionBatcher(self.predict_batch, window_ms, max_batch_size)
+    
+    def enable_recording(self, directory: str, dtype: str = "float16", **recorder_options):
+        """
+        Grabar el stream de keypoints de las sesiones nuevas en formato .kps
+        
+        Args:
+            directory: Carpeta de las grabaciones (una subcarpeta por sesión)
+            dtype: float16 o float32
+            **recorder_options: Argumentos de KeypointRecorder (chunk_frames, gap_frames, min_frames)
+        """
+        if self.recording_sink is not None:
+            self.recording_sink.close()
+        self.recording_sink = RecordingSink(directory, dtype)
+        self.recording_options = recorder_options
+    
+    def create_recorder(self, session_id: str) -> Optional[KeypointRecorder]:
+        """Crear el grabador de una sesión (None si la grabación está desactivada)"""
+        if self.recording_sink is None:
+            return None
+        return KeypointRecorder(session_id, self.recording_sink, **self.recording_options)
+    
+    def predict_proba(self, seq30) -> Optional[np.ndarray]:
+        """
+        Probabilidades de todas las clases para una secuencia
         
         Args:
             seq30: Secuencia de frames ajustada
             
         Returns:
-            Tupla de (nombre_de_seña, confianza)
+            Vector (clases,) con la salida softmax, o None si no hay modelo o falla
         """
-        if self.model is None:
-            return ("Modelo no cargado", 0.0)
+        if self.backend is None:
+            return None
         
         try:
             # El modelo espera 30 frames, así que ajustamos la secuencia
-            if len(seq30) < 30:
-                # Interpolar para llegar a 30 frames
-                indices = np.linspace(0, len(seq30)-1, 30).astype(int)
-                seq30 = seq30[indices]
-            elif len(seq30) > 30:
-                # Tomar submuestreo uniforme
-                indices = np.linspace(0, len(seq30)-1, 30).astype(int)
-                seq30 = seq30[indices]
+            if len(seq30) != MODEL_FRAMES:
+                seq30 = seq30[resample_indices(len(seq30), MODEL_FRAMES)]
             
-            # Expandir dimensiones para el modelo: (1, 30, 135)
-            seq30 = np.expand_dims(seq30, axis=0)
-
-            # Hacer predicción
-            pred = self.model.predict(seq30, verbose=0)[0]
-            idx = int(np.argmax(pred))
-            prob = float(pred[idx])
-
-            # Obtener el nombre de la seña
-            if idx < len(self.labels):
-                sign_name = self.labels[idx]
-            else:
-                sign_name = f"Clase_{idx}"
-            
-            return sign_name, prob
+            PREDICTIONS.inc()
+            with stage_timer("predict"):
+                # Hacer predicción (agrupada con otras sesiones si hay micro-batching)
+                if self.batcher is not None:
+                    return self.batcher.predict(seq30)
+                # Expandir dimensiones para el modelo: (1, 30, 135)
+                return self.predict_batch(np.expand_dims(seq30, axis=0))[0]
             
         except Exception as e:
-            print(f"Error en predicción: {str(e)}")
+            log_event(logger, logging.ERROR, "Error en predicción", error=str(e))
+            return None
+    
+    def label_name(self, idx: int) -> str:
+        """Nombre de la seña de un índice de clase"""
+        return self.labels[idx] if idx < len(self.labels) else f"Clase_{idx}"
+    
+    def predict_sign(self, seq30) -> Tuple[str, float]:
+        """
+        Predecir la seña usando la lógica de Senia.py
+        
+        Args:
+            seq30: Secuencia de frames ajustada
+            
+        Returns:
+            Tupla de (nombre_de_seña, confianza)
+        """
+        if self.backend is None:
+            return ("Modelo no cargado", 0.0)
+        
+        pred = self.predict_proba(seq30)
+        if pred is None:
             return ("Error", 0.0)
+        
+        idx = int(np.argmax(pred))
+        return self.label_name(idx), float(pred[idx])
     
-    def detect_sign(self, frame: np.ndarray) -> Dict:
+    def process_frame(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], bool]:
         """
-        Detectar seña con modo continuo mejorado para traducción fluida
-        Incluye construcción de oraciones con LLM
+        Etapa de visión: MediaPipe Holistic + extracción de keypoints
+        No toca el estado de ninguna sesión, así que puede correr en cualquier worker
+        
+        Args:
+            frame: Frame BGR de la cámara
+            
+        Returns:
+            Tupla de (keypoints o None, hay_manos)
         """
-        # Convertir BGR a RGB y procesar
+        # Convertir BGR a RGB y procesar con una instancia libre del pool
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.holistic.process(rgb)
+        with self.holistic_pool.acquire() as holistic:
+            results = holistic.process(rgb)
         have_hands = self.hands_present(results)
         
+        # Se escribe en un buffer del hilo: update_session copia el frame a su buffer circular
+        kp = self.extract_keypoints(results, out=self._scratch_row()) if have_hands else None
+        return kp, have_hands
+    
+    def process_frame_adaptive(
+        self, frame: np.ndarray, vision: AdaptiveVision, owner: Optional[str] = None
+    ) -> Tuple[Optional[np.ndarray], bool]:
+        """
+        Etapa de visión con la ROI, el reescalado y la complejidad de una sesión
+        
+        Args:
+            frame: Frame BGR de la cámara
+            vision: Estado de visión de la sesión (se actualiza con el resultado)
+            owner: Id de la sesión: vuelve a la misma instancia de MediaPipe y
+                conserva el tracking entre frames
+            
+        Returns:
+            Tupla de (keypoints en coordenadas del frame completo o None, hay_manos)
+        """
+        start = time.perf_counter()
+        roi = vision.roi
+        with self.holistic_pool_for(vision.complexity).acquire(owner=owner) as holistic:
+            kp, have_hands = run_vision(holistic, frame, roi, vision.target_size, out=self._scratch_row())
+            fell_back = roi is not None and not have_hands
+            if fell_back:
+                # Tracking perdido: repetir la detección sobre el frame completo
+                kp, have_hands = run_vision(holistic, frame, None, vision.target_size, out=self._scratch_row())
+        elapsed = time.perf_counter() - start
+        observe_stage("vision", elapsed)
+        vision.observe(kp, have_hands, elapsed * 1000, fell_back)
+        return kp, have_hands
+    
+    def _scratch_row(self) -> np.ndarray:
+        """Fila de keypoints reutilizable por hilo (evita una asignación por frame)"""
+        row = getattr(self._thread_local, "row", None)
+        if row is None:
+            row = self._thread_local.row = np.empty(NUM_FEATURES, dtype=np.float32)
+        return row
+    
+    def detect_sign(self, frame: np.ndarray, session: Optional[DetectionSession] = None) -> Dict:
+        """
+        Detectar seña con modo continuo mejorado para traducción fluida
+        Incluye construcción de oraciones con LLM
+        
+        Args:
+            frame: Frame BGR de la cámara
+            session: Estado del cliente (por defecto la sesión compartida de la API REST)
+        """
+        session = session or self.default_session
+        FRAMES_PROCESSED.inc(source="image")
+        
+        with stage_timer("detect"):
+            # Imagen sin cambios: se reutiliza la salida de MediaPipe del frame anterior
+            cached = session.frame_gate.lookup(frame)
+            if cached is not None:
+                FRAMES_GATED.inc()
+                kp, have_hands = cached
+            else:
+                kp, have_hands = self.process_frame_adaptive(frame, session.vision, session.session_id)
+                session.frame_gate.store(kp, have_hands)
+            return self.update_session(session, kp, have_hands, reused=cached is not None)
+    
+    def detect_keypoints(self, keypoints: np.ndarray, session: Optional[DetectionSession] = None) -> Dict:
+        """
+        Avanzar una sesión con keypoints calculados en el cliente (sin MediaPipe en el servidor)
+        
+        Args:
+            keypoints: Array (N, 135) con el mismo layout que extract_keypoints
+            session: Estado del cliente (por defecto la sesión compartida de la API REST)
+            
+        Returns:
+            Resultado de la detección tras el último frame (con las glosas de todo el lote)
+        """
+        session = session or self.default_session
+        FRAMES_PROCESSED.inc(len(keypoints), source="keypoints")
+        result = None
+        glosses = []
+        for kp, have_hands in zip(keypoints, keypoints_have_hands(keypoints)):
+            result = self.update_session(session, kp if have_hands else None, bool(have_hands))
+            glosses.extend(result["glosses"])
+        if result is not None:
+            # Las glosas cerradas en cualquier frame del lote
+            result["glosses"] = glosses
+        return result
+    
+    def update_session(
+        self, session: DetectionSession, kp: Optional[np.ndarray], have_hands: bool, reused: bool = False
+    ) -> Dict:
+        """
+        Avanzar la máquina de estados de una sesión con los keypoints de un frame
+        
+        Args:
+            session: Estado del cliente
+            kp: Vector de 135 keypoints (None si no hay manos)
+            have_hands: Si se detectaron manos en el frame
+            reused: Los keypoints son los del frame anterior (compuerta de movimiento):
+                no entran a la ventana del modelo ni al segmentador
+            
+        Returns:
+            Resultado de la detección para el cliente
+        """
+        # Con el lock tomado: el planificador de batches espera a este hilo solo
+        # mientras de verdad puede enviar una secuencia
+        batching = self.batcher.active() if self.batcher is not None else nullcontext()
+        with session.lock, stage_timer("session"), batching:
+            session.touch()
+            result = self._update_session_locked(session, kp, have_hands, reused)
+            # Una sesión expulsada ya guardó su grabación: no abrir un segmento nuevo
+            if session.recorder is not None and not session.closed:
+                session.apply_pending_label()
+                session.recorder.append(kp, have_hands, result["glosses"])
+            return result
+    
+    def _update_session_locked(
+        self, session: DetectionSession, kp: Optional[np.ndarray], have_hands: bool, reused: bool = False
+    ) -> Dict:
+        """Cuerpo de update_session (requiere session.lock)"""
         current_time = time.time()
         
         # Variables para la oración
@@ -228,74 +519,89 @@ class SignLanguageDetector:
             "signs_buffer": [],
             "raw_signs": "",
             "natural_sentence": "",
-            "signs_count": 0
+            "partial_sentence": "",
+            "signs_count": 0,
+            "generating": False
         }
         
+        # Glosas con tiempos que se cerraron en este frame
+        glosses = []
+        
         # Modo continuo mejorado
         if have_hands:
-            kp = self.extract_keypoints(results)
-            if kp is not None:
-                self.sequence.append(kp)
+            # Un frame reutilizado por la compuerta repetiría los keypoints del
+            # anterior: llenaría la ventana de frames idénticos y bajaría la
+            # energía de movimiento. Se mantiene la decisión anterior.
+            if kp is not None and not reused:
+                # Buffer circular: conserva solo los últimos NUM_FRAMES sin mover memoria
+                session.sequence.append(kp)
                 
-                # Mantener solo los últimos NUM_FRAMES
-                if len(self.sequence) > self.NUM_FRAMES:
-                    self.sequence.pop(0)
+                # Ventanas superpuestas: se puntúa la ventana actual cada
+                # `stride` frames y el segmentador decide dónde empieza y
+                # termina cada seña
+                spotter = session.spotter
+                glosses.extend(spotter.push(kp, current_time))
                 
-                # Predecir cada cierto número de frames Y después del cooldown
-                self.frames_since_last_pred += 1
-                
-                if (len(self.sequence) >= self.NUM_FRAMES and 
-                    self.frames_since_last_pred >= 5 and  # Cada 5 frames
-                    (current_time - self.last_prediction_time) >= self.cooldown_seconds):
-                    
-                    # Ajustar secuencia
-                    seq_for_model = self.fix_sequence(self.sequence)
+                if len(session.sequence) >= session.NUM_FRAMES and spotter.due and spotter.idle:
+                    # Manos quietas: se mantiene la decisión anterior sin llamar al modelo
+                    spotter.skip()
+                    WINDOWS_SKIPPED.inc()
+                elif len(session.sequence) >= session.NUM_FRAMES and spotter.due:
+                    # Ajustar secuencia a NUM_FRAMES y a los 30 del modelo en un solo paso
+                    seq_for_model = session.sequence.resample(
+                        MODEL_FRAMES, window=session.NUM_FRAMES, out=session.model_input
+                    )
                     
-                    # Hacer predicción
-                    sign_name, prob = self.predict_sign(seq_for_model)
-                    
-                    # Solo actualizar si la confianza es buena
-                    if prob >= self.CONFIDENCE_THRESHOLD:
-                        # Evitar repetir la misma seña inmediatamente
-                        if sign_name != self.predicted_label:
-                            self.predicted_label = sign_name
-                            self.last_prediction_time = current_time
-                            self.frames_since_last_pred = 0
-                            print(f"🎯 Nueva seña detectada: {sign_name} ({prob:.2%})")
+                    probs = self.predict_proba(seq_for_model)
+                    if probs is not None:
+                        result, closed = spotter.score(probs)
+                        glosses.extend(closed)
+                        if result.index is not None:
+                            session.predicted_label = self.label_name(result.index)
+                            session.predicted_confidence = result.confidence
+                            session.last_prediction_time = current_time
+                        
+                        if result.is_new:
+                            SIGNS.inc()
+                            log_event(logger, logging.INFO, "Nueva seña detectada",
+                                      session=session.session_id, sign=session.predicted_label,
+                                      confidence=round(result.confidence, 4))
                             
                             # Agregar al constructor de oraciones
-                            if self.sentence_builder:
-                                self.sentence_builder.add_sign(sign_name)
-                    
-                    # Reset del contador de frames
-                    self.frames_since_last_pred = 0
+                            if session.sentence_builder:
+                                session.sentence_builder.add_sign(session.predicted_label)
         else:
-            # Sin manos - limpiar secuencia gradualmente
-            if len(self.sequence) > 0:
-                self.sequence = []
+            # Sin manos - limpiar secuencia y cerrar la seña en curso
+            if len(session.sequence) > 0:
+                session.sequence.clear()
+                glosses.extend(session.spotter.flush(current_time))
             
             # Verificar si es momento de construir oración (pausa sin manos)
-            if self.sentence_builder:
-                self.sentence_builder.check_and_build_sentence()
+            if session.sentence_builder:
+                session.sentence_builder.check_and_build_sentence()
                 
-        # Limpiar predicción antigua después del cooldown
-        if (current_time - self.last_prediction_time) > (self.cooldown_seconds + 1):
-            self.predicted_label = ""
+        # Limpiar la seña mostrada un rato después de soltarla
+        if (session.decision.active is None and
+                (current_time - session.last_prediction_time) > (session.cooldown_seconds + 1)):
+            session.predicted_label = ""
+            session.predicted_confidence = 0.0
         
         # Obtener datos de la oración
-        if self.sentence_builder:
-            status = self.sentence_builder._get_status()
+        if session.sentence_builder:
+            status = session.sentence_builder._get_status()
             sentence_data = {
                 "signs_buffer": status["signs_buffer"],
                 "raw_signs": status["raw_signs"],
                 "natural_sentence": status["current_sentence"],
-                "signs_count": status["signs_count"]
+                "partial_sentence": status["partial_sentence"],
+                "signs_count": status["signs_count"],
+                "generating": status["generating"]
             }
         
         # Estado dinámico para UI
         if have_hands:
-            if len(self.sequence) < self.NUM_FRAMES:
-                state_msg = f"Capturando... {len(self.sequence)}/{self.NUM_FRAMES}"
+            if len(session.sequence) < session.NUM_FRAMES:
+                state_msg = f"Capturando... {len(session.sequence)}/{session.NUM_FRAMES}"
             else:
                 state_msg = "Analizando seña..."
         else:
@@ -304,29 +610,25 @@ class SignLanguageDetector:
         # Resultado final
         result = {
             "hand_detected": have_hands,
-            "sign": self.predicted_label if self.predicted_label else None,
-            "confidence": 0.8 if self.predicted_label else 0.0,
+            "sign": session.predicted_label if session.predicted_label else None,
+            "confidence": round(session.predicted_confidence, 4) if session.predicted_label else 0.0,
             "landmarks": None,
             "message": state_msg,
-            "buffer_status": f"{len(self.sequence)}/{self.NUM_FRAMES} frames",
+            "buffer_status": f"{len(session.sequence)}/{session.NUM_FRAMES} frames",
             "continuous_mode": True,
+            # Keypoints reutilizados del frame anterior (imagen sin cambios)
+            "frame_reused": reused,
             # Datos de construcción de oraciones
-            "sentence": sentence_data
+            "sentence": sentence_data,
+            # Stream de glosas: {label, confidence, start, end, duration}
+            "glosses": [gloss.to_dict() for gloss in glosses]
         }
         
         return result
     
-    def set_continuous_mode(self, enabled: bool):
-        """Habilitar/deshabilitar modo continuo"""
-        self.continuous_mode = enabled
-        if enabled:
-            self.cooldown_seconds = 1.5  # Más rápido
-            self.NUM_FRAMES = 8  # Menos frames para más velocidad
-            self.CONFIDENCE_THRESHOLD = 0.55  # Más permisivo
-        else:
-            self.cooldown_seconds = 3.0  # Más lento pero preciso
-            self.NUM_FRAMES = 15
-            self.CONFIDENCE_THRESHOLD = 0.70
+    def set_continuous_mode(self, enabled: bool, session: Optional[DetectionSession] = None):
+        """Habilitar/deshabilitar modo continuo en una sesión"""
+        (session or self.default_session).set_continuous_mode(enabled)
     
     def draw_landmarks(self, frame: np.ndarray, draw_skeleton: bool = True) -> np.ndarray:
         """
@@ -340,7 +642,8 @@ class SignLanguageDetector:
             Frame con landmarks dibujados
         """
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.holistic.process(frame_rgb)
+        with self.holistic_pool.acquire() as holistic:
+            results = holistic.process(frame_rgb)
         
         if draw_skeleton:
             # Dibujar Pose
@@ -379,5 +682,10 @@ class SignLanguageDetector:
         """Liberar recursos"""
         if hasattr(self, 'hands') and self.hands:
             self.hands.close()
-        if hasattr(self, 'holistic') and self.holistic:
-            self.holistic.close()
+        if hasattr(self, 'holistic_pools') and self.holistic_pools:
+            for pool in self.holistic_pools.values():
+                pool.close()
+        if hasattr(self, 'batcher') and self.batcher:
+            self.batcher.close()
+        if hasattr(self, 'sentence_executor') and self.sentence_executor:
+            self.sentence_executor.shutdown(wait=False, cancel_futures=True)
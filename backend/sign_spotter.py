@@ -0,0 +1,257 @@
+"""
+Segmentación de señas en flujo continuo
+Convierte el stream de frames de una sesión en un stream de glosas con
+tiempos (seña, confianza, inicio, fin), para señar de corrido sin pausas
+entre señas.
+
+- Ventanas superpuestas: la ventana de NUM_FRAMES de la sesión se puntúa cada
+  `stride` frames (los frames se comparten entre ventanas: el buffer circular
+  no se copia y el remuestreo a 30 frames usa índices cacheados), así que el
+  costo del clasificador queda acotado a una predicción cada `stride` frames
+- Picos de probabilidad: el DecisionEngine de la sesión confirma la seña y
+  el segmento guarda la probabilidad máxima alcanzada
+- Energía de movimiento de las manos: calculada una sola vez por frame
+  (keypoints.hand_motion_energy). Cuando las manos se detienen se cierra la
+  seña en curso sin esperar a que baje su probabilidad, y el arranque del
+  movimiento marca el inicio de la seña siguiente
+- Compuerta de movimiento: con las manos quietas no se llama al clasificador
+  (la decisión anterior sigue vigente). Cada `gate_max_skips` ventanas
+  saltadas se puntúa una igual, para no perder señas estáticas
+"""
+
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from decision_engine import Decision, DecisionEngine
+from keypoints import NUM_FEATURES, hand_motion_energy
+
+
+class GlossEvent(NamedTuple):
+    """Seña segmentada con sus tiempos (segundos del reloj del servidor)"""
+    label: str
+    confidence: float
+    start: float
+    end: float
+
+    def to_dict(self) -> Dict:
+        return {
+            "label": self.label,
+            "confidence": round(self.confidence, 4),
+            "start": round(self.start, 3),
+            "end": round(self.end, 3),
+            "duration": round(self.end - self.start, 3)
+        }
+
+
+class _Segment(NamedTuple):
+    """Seña en curso"""
+    index: int
+    start: float
+    end: float
+    peak: float
+
+
+class SignSpotter:
+    """
+    Programador de ventanas + segmentador de una sesión
+    """
+
+    def __init__(
+        self,
+        decision: DecisionEngine,
+        labels: Sequence[str] = (),
+        window: int = 10,
+        rest_energy: float = 0.004,
+        rest_frames: int = 3,
+        energy_alpha: float = 0.5,
+        history: int = 50,
+        motion_gate: bool = True,
+        gate_max_skips: int = 10
+    ):
+        """
+        Args:
+            decision: Motor de decisión de la sesión (su stride fija la cadencia de las ventanas)
+            labels: Nombres de las clases del modelo
+            window: Frames por ventana (NUM_FRAMES de la sesión)
+            rest_energy: Energía (desplazamiento medio por frame) bajo la cual las manos están quietas
+            rest_frames: Frames quietos seguidos que cierran la seña en curso
+            energy_alpha: Peso del frame nuevo en la media exponencial de la energía
+            history: Glosas recientes que se conservan
+            motion_gate: Saltar las ventanas con las manos quietas
+            gate_max_skips: Ventanas seguidas que se pueden saltar antes de puntuar una
+        """
+        self.decision = decision
+        self.labels = list(labels)
+        self.rest_energy = rest_energy
+        self.move_energy = 2 * rest_energy  # Histéresis: hace falta más energía para "moverse"
+        self.rest_frames = max(1, rest_frames)
+        self.energy_alpha = min(1.0, max(0.01, energy_alpha))
+        self.motion_gate = motion_gate
+        self.gate_max_skips = max(0, gate_max_skips)
+
+        self._times: deque = deque(maxlen=max(1, window))
+        self._prev = np.zeros(NUM_FEATURES, dtype=np.float32)
+        self._has_prev = False
+        self._frames_since_score = 0
+        self._skips = 0
+
+        self.energy = 0.0
+        self._rest_count = 0
+        self._rest_since: Optional[float] = None
+        self._motion_since: Optional[float] = None
+
+        self._segment: Optional[_Segment] = None
+        self.events: deque = deque(maxlen=max(1, history))
+
+        # Estadísticas
+        self.frames = 0
+        self.windows_scored = 0
+        self.windows_skipped = 0
+
+    def label_name(self, index: int) -> str:
+        return self.labels[index] if index < len(self.labels) else f"Clase_{index}"
+
+    def resize(self, window: int):
+        """Cambiar los frames por ventana (p. ej. al cambiar el modo continuo)"""
+        self._times = deque(self._times, maxlen=max(1, window))
+
+    @property
+    def due(self) -> bool:
+        """True si pasaron `stride` frames desde la última ventana puntuada"""
+        return self._frames_since_score >= self.decision.stride
+
+    @property
+    def idle(self) -> bool:
+        """True si la compuerta de movimiento permite saltar la ventana actual"""
+        return (self.motion_gate and self._rest_count >= self.rest_frames and
+                self._skips < self.gate_max_skips)
+
+    def skip(self):
+        """Dar por puntuada la ventana actual sin llamar al clasificador"""
+        self._frames_since_score = 0
+        self._skips += 1
+        self.windows_skipped += 1
+
+    def push(self, kp: np.ndarray, timestamp: float) -> List[GlossEvent]:
+        """
+        Registrar un frame con manos
+
+        Args:
+            kp: Keypoints (135,) del frame
+            timestamp: Instante del frame
+
+        Returns:
+            Glosas cerradas por este frame (las manos se detuvieron)
+        """
+        self.frames += 1
+        self._frames_since_score += 1
+        self._times.append(timestamp)
+
+        raw = hand_motion_energy(self._prev, kp) if self._has_prev else 0.0
+        self._prev[:] = kp
+        self._has_prev = True
+        self.energy += self.energy_alpha * (raw - self.energy)
+
+        events = []
+        if self.energy < self.rest_energy:
+            self._rest_count += 1
+            if self._rest_count == 1:
+                self._rest_since = timestamp
+            if self._rest_count == self.rest_frames and self._segment is not None:
+                # Manos quietas: la seña terminó cuando empezó la quietud
+                events.append(self._close(max(self._segment.start, self._rest_since)))
+                self.decision.release()
+        elif self.energy > self.move_energy:
+            if self._rest_count or self._motion_since is None:
+                self._motion_since = timestamp
+            self._rest_count = 0
+        return events
+
+    def score(self, probs: np.ndarray) -> Tuple[Decision, List[GlossEvent]]:
+        """
+        Incorporar las probabilidades de la ventana actual
+
+        Args:
+            probs: Salida softmax del clasificador para la ventana que termina en el último frame
+
+        Returns:
+            Tupla de (decisión, glosas cerradas por esta ventana)
+        """
+        self._frames_since_score = 0
+        self._skips = 0
+        self.windows_scored += 1
+        window_start, window_end = self._times[0], self._times[-1]
+
+        decision = self.decision.update(probs)
+        events = []
+
+        segment = self._segment
+        if segment is not None:
+            if decision.index == segment.index and not decision.is_new:
+                self._segment = segment._replace(end=window_end, peak=max(segment.peak, decision.confidence))
+            else:
+                # La probabilidad de la seña cayó: termina en la última ventana donde seguía activa
+                events.append(self._close(segment.end))
+
+        if decision.is_new:
+            # La seña empieza con el movimiento que la trajo, si ocurrió dentro de la ventana
+            start = window_start
+            if self._motion_since is not None and self._motion_since > window_start:
+                start = self._motion_since
+            self._segment = _Segment(decision.index, start, window_end, decision.confidence)
+
+        return decision, events
+
+    def flush(self, timestamp: Optional[float] = None) -> List[GlossEvent]:
+        """
+        Cerrar la seña en curso y olvidar el historial (las manos salieron de cuadro)
+
+        Returns:
+            Glosas cerradas
+        """
+        events = []
+        if self._segment is not None:
+            events.append(self._close(self._segment.end))
+        self.decision.reset()
+        self._times.clear()
+        self._has_prev = False
+        self._frames_since_score = 0
+        self._skips = 0
+        self.energy = 0.0
+        self._rest_count = 0
+        self._rest_since = None
+        self._motion_since = None
+        return events
+
+    def _close(self, end: float) -> GlossEvent:
+        """Emitir la glosa del segmento en curso"""
+        segment = self._segment
+        self._segment = None
+        event = GlossEvent(self.label_name(segment.index), segment.peak, segment.start, end)
+        self.events.append(event)
+        return event
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict]:
+        """Glosas recientes (la más nueva al final)"""
+        events = list(self.events)
+        if limit:
+            events = events[-limit:]
+        return [event.to_dict() for event in events]
+
+    def clear(self):
+        """Olvidar las glosas emitidas"""
+        self.events.clear()
+
+    def get_stats(self) -> Dict:
+        """Contadores y estado del segmentador"""
+        return {
+            "frames": self.frames,
+            "windows_scored": self.windows_scored,
+            "windows_skipped": self.windows_skipped,
+            "glosses": len(self.events),
+            "energy": round(self.energy, 5),
+            "in_sign": self._segment is not None,
+            "decision": self.decision.get_stats()
+        }
@@ -0,0 +1,199 @@
+"""
+Logging estructurado para el backend
+- Niveles y formato (texto o JSON) configurables por entorno
+- Escritura en un hilo de fondo (QueueHandler): el hot path no hace I/O
+- Muestreo con límite de frecuencia para logs por frame
+- Captura de frames de depuración en segundo plano
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+import config
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos extra de log_event"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible para desarrollo: mensaje seguido de clave=valor"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+
+def configure_logging():
+    """
+    Configurar el logging del proceso (idempotente)
+
+    Los registros pasan por una cola y un hilo de fondo los escribe en stdout,
+    así ninguna llamada de log bloquea el event loop ni los workers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    root = logging.getLogger("connectsigns")
+    root.setLevel(config.LOG_LEVEL.upper())
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+    _listener.start()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger hijo de "connectsigns" (configura el logging si hace falta)"""
+    configure_logging()
+    return logging.getLogger(f"connectsigns.{name}")
+
+
+def log_event(logger: logging.Logger, level: int, msg: str, **fields):
+    """
+    Registrar un evento con campos estructurados
+
+    No formatea nada si el nivel está deshabilitado (coste casi nulo en producción).
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, msg, extra={"fields": fields})
+
+
+class LogSampler:
+    """
+    Limita la frecuencia de logs repetitivos (p. ej. uno por frame)
+
+    Deja pasar como máximo `rate` registros por segundo por clave e informa
+    cuántos se suprimieron desde el último registro emitido.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        """
+        Args:
+            rate: Registros por segundo permitidos por clave (0 = ninguno)
+        """
+        self.interval = 1.0 / rate if rate > 0 else None
+        self._last: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def sample(self, key: str) -> Optional[int]:
+        """
+        Decidir si se registra este evento
+
+        Returns:
+            None si hay que omitirlo, o el número de eventos suprimidos antes de éste
+        """
+        if self.interval is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last.get(key, 0.0) < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return None
+            self._last[key] = now
+            return self._suppressed.pop(key, 0)
+
+    def forget(self, prefix: str):
+        """
+        Olvidar las claves de una sesión cerrada (la propia clave y las "prefix:...")
+
+        Las claves suelen llevar el id de sesión, así que sin esto crecerían
+        durante toda la vida del servidor.
+        """
+        with self._lock:
+            for table in (self._last, self._suppressed):
+                for key in [k for k in table if k == prefix or k.startswith(prefix + ":")]:
+                    del table[key]
+
+    def log(self, logger: logging.Logger, level: int, key: str, msg: str, **fields):
+        """Registrar con log_event si el muestreo lo permite"""
+        if not logger.isEnabledFor(level):
+            return
+        suppressed = self.sample(key)
+        if suppressed is not None:
+            log_event(logger, level, msg, suppressed=suppressed, **fields)
+
+
+class DebugFrameSink:
+    """
+    Guarda frames de muestra en disco desde un hilo de fondo
+
+    maybe_submit() nunca bloquea: si la cola está llena el frame se descarta.
+    """
+
+    def __init__(self, directory: str, every: int = 100, max_queue: int = 4):
+        """
+        Args:
+            directory: Carpeta de destino
+            every: Guardar uno de cada `every` frames (0 = desactivado)
+            max_queue: Frames pendientes de escritura como máximo
+        """
+        self.directory = directory
+        self.every = max(0, every)
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._logger = get_logger("debug_frames")
+        self._thread = None
+        if self.every:
+            self._thread = threading.Thread(target=self._run, name="debug-frame-sink", daemon=True)
+            self._thread.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.every > 0
+
+    def maybe_submit(self, frame, frame_number: int, prefix: str = "frame"):
+        """Encolar el frame si le toca según `every`"""
+        if not self.every or frame_number % self.every != 0:
+            return
+        try:
+            self._queue.put_nowait((frame, f"{prefix}_{frame_number}.jpg"))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        """Hilo escritor"""
+        import cv2
+
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            frame, name = self._queue.get()
+            path = os.path.join(self.directory, name)
+            try:
+                cv2.imwrite(path, frame)
+                log_event(self._logger, logging.DEBUG, "Frame de depuración guardado", path=path)
+            except Exception as e:
+                log_event(self._logger, logging.WARNING, "Error guardando frame de depuración", error=str(e))
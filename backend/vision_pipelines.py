@@ -0,0 +1,162 @@
+"""
+Pipelines de visión que producen landmarks para extract_keypoints
+
+- holistic: MediaPipe Holistic (pose completa, cara y manos; el original)
+- hands:    MediaPipe Hands + Pose lite. No calcula la malla de la cara y
+            usa el modelo de pose más liviano, del que solo se usan los
+            hombros, la nariz y las muñecas
+
+Los dos devuelven un objeto con pose_landmarks, left_hand_landmarks y
+right_hand_landmarks, así que extract_keypoints arma el mismo vector de
+135 features con cualquiera de ellos.
+"""
+
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+PIPELINES = ("holistic", "hands")
+
+# model_complexity máximo de cada pipeline (Hands solo tiene 0 y 1)
+MAX_COMPLEXITY = {"holistic": 2, "hands": 1}
+
+# Muñecas en los 33 landmarks de pose (izquierda y derecha de la persona)
+_POSE_LEFT_WRIST = 15
+_POSE_RIGHT_WRIST = 16
+
+
+class VisionPipeline:
+    """
+    Interfaz común: process(rgb) -> resultado con pose_landmarks,
+    left_hand_landmarks y right_hand_landmarks
+    """
+
+    name = "base"
+
+    def process(self, rgb: np.ndarray):
+        raise NotImplementedError
+
+    def reset(self):
+        """Olvidar el tracking entre frames (al pasar la instancia a otra sesión)"""
+
+    def close(self):
+        """Liberar los grafos de MediaPipe"""
+
+
+class HolisticPipeline(VisionPipeline):
+    """MediaPipe Holistic completo"""
+
+    name = "holistic"
+
+    def __init__(self, config: dict):
+        import mediapipe as mp
+        self._holistic = mp.solutions.holistic.Holistic(**config)
+
+    def process(self, rgb: np.ndarray):
+        return self._holistic.process(rgb)
+
+    def reset(self):
+        self._holistic.reset()
+
+    def close(self):
+        self._holistic.close()
+
+
+class HandsPosePipeline(VisionPipeline):
+    """
+    MediaPipe Hands (hasta 2 manos) + Pose lite para hombros y nariz
+
+    Cada mano se asigna a la muñeca de pose más cercana, igual que Holistic
+    (que recorta las manos a partir de las muñecas de la pose). Sin pose se
+    usa la lateralidad de Hands, que asume imagen espejada: "Left" en una
+    imagen sin espejar es la mano derecha de la persona.
+    """
+
+    name = "hands"
+
+    def __init__(self, config: dict, hands_complexity: int = 1):
+        """
+        Args:
+            config: Configuración de Holistic (se reusan static_image_mode y los umbrales)
+            hands_complexity: model_complexity de Hands (0 o 1)
+        """
+        import mediapipe as mp
+        tracking = {
+            "static_image_mode": config.get("static_image_mode", False),
+            "min_detection_confidence": config.get("min_detection_confidence", 0.5),
+            "min_tracking_confidence": config.get("min_tracking_confidence", 0.5)
+        }
+        self._hands = mp.solutions.hands.Hands(
+            max_num_hands=2, model_complexity=min(1, max(0, hands_complexity)), **tracking
+        )
+        # Pose lite: solo hacen falta 3 puntos y las muñecas
+        self._pose = mp.solutions.pose.Pose(
+            model_complexity=0, smooth_landmarks=config.get("smooth_landmarks", True), **tracking
+        )
+
+    def process(self, rgb: np.ndarray):
+        pose = self._pose.process(rgb).pose_landmarks
+        hands = self._hands.process(rgb)
+
+        left = right = None
+        for landmarks, handedness in zip(hands.multi_hand_landmarks or (), hands.multi_handedness or ()):
+            is_left = self._is_left(landmarks, handedness, pose)
+            if is_left and left is None:
+                left = landmarks
+            elif not is_left and right is None:
+                right = landmarks
+            elif left is None:
+                left = landmarks
+            else:
+                right = landmarks
+
+        return SimpleNamespace(pose_landmarks=pose, left_hand_landmarks=left, right_hand_landmarks=right)
+
+    @staticmethod
+    def _is_left(landmarks, handedness, pose) -> bool:
+        """Si la mano es la izquierda de la persona"""
+        if pose is not None:
+            wrist = landmarks.landmark[0]
+            lw = pose.landmark[_POSE_LEFT_WRIST]
+            rw = pose.landmark[_POSE_RIGHT_WRIST]
+            d_left = (wrist.x - lw.x) ** 2 + (wrist.y - lw.y) ** 2
+            d_right = (wrist.x - rw.x) ** 2 + (wrist.y - rw.y) ** 2
+            return d_left <= d_right
+        return handedness.classification[0].label == "Right"
+
+    def reset(self):
+        self._hands.reset()
+        self._pose.reset()
+
+    def close(self):
+        self._hands.close()
+        self._pose.close()
+
+
+def clamp_complexity(name: str, complexity: int) -> int:
+    """model_complexity dentro del rango que soporta el pipeline"""
+    return min(max(0, complexity), MAX_COMPLEXITY.get(name, 2))
+
+
+def create_pipeline(name: str, config: dict, complexity: Optional[int] = None) -> VisionPipeline:
+    """
+    Crear un pipeline de visión
+
+    Args:
+        name: Uno de PIPELINES
+        config: Configuración base de Holistic (HOLISTIC_CONFIG)
+        complexity: model_complexity a usar (None = el de config)
+
+    Returns:
+        Pipeline listo para process(rgb)
+    """
+    if name not in PIPELINES:
+        raise ValueError(f"Pipeline de visión desconocido: {name} (opciones: {', '.join(PIPELINES)})")
+
+    if complexity is None:
+        complexity = config.get("model_complexity", 1)
+    complexity = clamp_complexity(name, complexity)
+    if name == "hands":
+        return HandsPosePipeline(config, hands_complexity=complexity)
+    return HolisticPipeline({**config, "model_complexity": complexity})
@@ -0,0 +1,301 @@
+"""
+Etapa de visión adaptativa por sesión
+En lugar de pasar a MediaPipe Holistic el frame completo, a la resolución
+que mande el cliente y siempre con model_complexity=1:
+
+- ROI: se recorta una región alrededor de los hombros, la nariz y las manos
+  del frame anterior (con margen para el movimiento entre frames). Los
+  landmarks se devuelven a coordenadas del frame completo, así que el
+  modelo recibe lo mismo que sin recorte
+- Reescalado: la imagen que entra a Holistic se limita a `target_size`
+  píxeles de lado mayor
+- Complejidad: cada sesión mide su tiempo de visión y baja o sube
+  model_complexity (0/1/2) según su presupuesto de latencia
+- Si con el recorte no aparecen manos (tracking perdido) se repite la
+  detección sobre el frame completo
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from keypoints import NUM_HAND_LANDMARKS, POSE_INDICES, extract_keypoints, hands_present
+from metrics import stage_timer
+
+# Región de interés normalizada: (x0, y0, ancho, alto)
+ROI = Tuple[float, float, float, float]
+
+COMPLEXITIES = (0, 1, 2)
+
+# Filas de cada grupo en los keypoints vistos como (45, 3)
+_POSE_ROWS = slice(0, len(POSE_INDICES))
+_LEFT_ROWS = slice(_POSE_ROWS.stop, _POSE_ROWS.stop + NUM_HAND_LANDMARKS)
+_RIGHT_ROWS = slice(_LEFT_ROWS.stop, _LEFT_ROWS.stop + NUM_HAND_LANDMARKS)
+_GROUPS = (_POSE_ROWS, _LEFT_ROWS, _RIGHT_ROWS)
+
+
+def roi_from_keypoints(
+    kp: np.ndarray,
+    margin: float = 0.3,
+    min_size: float = 0.35,
+    max_area: float = 0.8
+) -> Optional[ROI]:
+    """
+    Región de interés alrededor de los hombros, la nariz y las manos
+
+    Args:
+        kp: Keypoints (135,) en coordenadas del frame completo
+        margin: Margen agregado a cada lado, como fracción del tamaño de la caja
+        min_size: Ancho/alto mínimo de la caja antes del margen (normalizado)
+        max_area: Si la región cubre más que esto del frame se usa el frame completo
+
+    Returns:
+        ROI normalizada, o None si no hay pose (no se sabe dónde recortar) o
+        la región es casi todo el frame
+    """
+    points = kp.reshape(-1, 3)
+    if not points[_POSE_ROWS].any():
+        return None
+    rows = [points[group, :2] for group in _GROUPS if points[group].any()]
+    xy = np.concatenate(rows)
+    (x0, y0), (x1, y1) = xy.min(axis=0), xy.max(axis=0)
+
+    w = max(float(x1 - x0), min_size) * (1 + 2 * margin)
+    h = max(float(y1 - y0), min_size) * (1 + 2 * margin)
+    cx, cy = float(x0 + x1) / 2, float(y0 + y1) / 2
+    x0, x1 = max(0.0, cx - w / 2), min(1.0, cx + w / 2)
+    y0, y1 = max(0.0, cy - h / 2), min(1.0, cy + h / 2)
+
+    if x1 <= x0 or y1 <= y0 or (x1 - x0) * (y1 - y0) >= max_area:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def prepare_image(frame: np.ndarray, roi: Optional[ROI] = None, target_size: int = 0) -> Tuple[np.ndarray, Optional[ROI]]:
+    """
+    Recortar, reescalar y pasar a RGB la imagen que entra a Holistic
+
+    Args:
+        frame: Frame BGR completo
+        roi: Región a recortar (None = frame completo)
+        target_size: Lado mayor máximo en píxeles (0 = sin reescalar)
+
+    Returns:
+        Tupla de (imagen RGB, ROI ajustada a píxeles enteros o None)
+    """
+    height, width = frame.shape[:2]
+    if roi is not None:
+        x0, y0, w, h = roi
+        px0, py0 = int(x0 * width), int(y0 * height)
+        px1 = max(px0 + 1, min(width, int(round((x0 + w) * width))))
+        py1 = max(py0 + 1, min(height, int(round((y0 + h) * height))))
+        frame = frame[py0:py1, px0:px1]
+        # La ROI exacta del recorte, para devolver los landmarks sin error
+        roi = (px0 / width, py0 / height, (px1 - px0) / width, (py1 - py0) / height)
+
+    longest = max(frame.shape[:2])
+    if target_size and longest > target_size:
+        scale = target_size / longest
+        size = (max(1, int(frame.shape[1] * scale)), max(1, int(frame.shape[0] * scale)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), roi
+
+
+def map_from_roi(kp: np.ndarray, roi: ROI) -> np.ndarray:
+    """
+    Llevar en el lugar los keypoints de un recorte a coordenadas del frame completo
+
+    z se escala como x (MediaPipe usa la misma escala para ambas). Los
+    grupos no detectados (en ceros) se dejan en ceros.
+    """
+    x0, y0, w, h = roi
+    points = kp.reshape(-1, 3)
+    for group in _GROUPS:
+        block = points[group]
+        if block.any():
+            block[:, 0] *= w
+            block[:, 0] += x0
+            block[:, 1] *= h
+            block[:, 1] += y0
+            block[:, 2] *= w
+    return kp
+
+
+@contextmanager
+def _timed(stage: str, timings: Optional[List[Tuple[str, float]]]):
+    """stage_timer, o acumular la duración en `timings` si se mide en otro proceso"""
+    if timings is None:
+        with stage_timer(stage):
+            yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((stage, time.perf_counter() - start))
+
+
+def run_vision(
+    holistic,
+    frame: np.ndarray,
+    roi: Optional[ROI] = None,
+    target_size: int = 0,
+    out: Optional[np.ndarray] = None,
+    timings: Optional[List[Tuple[str, float]]] = None
+) -> Tuple[Optional[np.ndarray], bool]:
+    """
+    Holistic + extracción de keypoints sobre el recorte/reescalado de un frame
+
+    Args:
+        holistic: Instancia de MediaPipe Holistic
+        frame: Frame BGR completo
+        roi: Región a recortar (None = frame completo)
+        target_size: Lado mayor máximo en píxeles (0 = sin reescalar)
+        out: Buffer (135,) donde escribir los keypoints (opcional)
+        timings: Lista donde anotar (etapa, segundos) en lugar de registrarlos
+            en las métricas de este proceso (para los workers de procesos)
+
+    Returns:
+        Tupla de (keypoints en coordenadas del frame completo o None, hay_manos)
+    """
+    rgb, roi = prepare_image(frame, roi, target_size)
+    with _timed("holistic", timings):
+        results = holistic.process(rgb)
+    have_hands = hands_present(results)
+    if not have_hands:
+        return None, False
+    with _timed("keypoints", timings):
+        kp = extract_keypoints(results, out)
+        if roi is not None:
+            map_from_roi(kp, roi)
+    return kp, True
+
+
+class AdaptiveVision:
+    """
+    Estado de la etapa de visión de una sesión (ROI y complejidad)
+    """
+
+    def __init__(
+        self,
+        budget_ms: float = 40.0,
+        complexity: int = 1,
+        min_complexity: int = 0,
+        max_complexity: int = 2,
+        target_size: int = 480,
+        use_roi: bool = True,
+        roi_margin: float = 0.3,
+        adapt_frames: int = 30,
+        retry_seconds: float = 60.0,
+        latency_alpha: float = 0.1
+    ):
+        """
+        Args:
+            budget_ms: Tiempo de visión objetivo por frame (0 = complejidad fija)
+            complexity: model_complexity inicial
+            min_complexity: Complejidad mínima a la que se puede bajar
+            max_complexity: Complejidad máxima a la que se puede subir
+            target_size: Lado mayor máximo de la imagen que entra a Holistic (0 = sin reescalar)
+            use_roi: Recortar alrededor de las manos del frame anterior
+            roi_margin: Margen del recorte como fracción del tamaño de la caja
+            adapt_frames: Frames medidos en una complejidad antes de cambiarla
+            retry_seconds: Tiempo sin volver a subir a una complejidad que excedió el presupuesto
+            latency_alpha: Peso del frame nuevo en la media exponencial de la latencia
+        """
+        self.min_complexity = min(max(min_complexity, COMPLEXITIES[0]), COMPLEXITIES[-1])
+        self.max_complexity = min(max(max_complexity, self.min_complexity), COMPLEXITIES[-1])
+        self.base_complexity = min(max(complexity, self.min_complexity), self.max_complexity)
+        self.complexity = self.base_complexity
+        self.budget_ms = max(0.0, budget_ms)
+        self.target_size = max(0, target_size)
+        self.use_roi = use_roi
+        self.roi_margin = max(0.0, roi_margin)
+        self.adapt_frames = max(1, adapt_frames)
+        self.retry_seconds = retry_seconds
+        self.latency_alpha = min(1.0, max(0.01, latency_alpha))
+
+        self.roi: Optional[ROI] = None
+        self.latency_ms: Optional[float] = None
+        self._frames_at_level = 0
+        self._ceiling = self.max_complexity
+        self._ceiling_until = 0.0
+
+        # Estadísticas
+        self.frames = 0
+        self.roi_frames = 0
+        self.fallbacks = 0
+        self.switches = 0
+
+    def observe(self, kp: Optional[np.ndarray], have_hands: bool, elapsed_ms: float, fell_back: bool = False):
+        """
+        Registrar el resultado de un frame: actualiza la ROI y ajusta la complejidad
+
+        Args:
+            kp: Keypoints del frame en coordenadas del frame completo (None si no hay manos)
+            have_hands: Si se detectaron manos
+            elapsed_ms: Tiempo de visión del frame (incluido el reintento sin recorte)
+            fell_back: Si se repitió la detección sobre el frame completo
+        """
+        self.frames += 1
+        if self.roi is not None:
+            self.roi_frames += 1
+        if fell_back:
+            self.fallbacks += 1
+
+        if self.use_roi and have_hands and kp is not None:
+            self.roi = roi_from_keypoints(kp, self.roi_margin)
+        else:
+            self.roi = None
+
+        if self.latency_ms is None:
+            self.latency_ms = elapsed_ms
+        else:
+            self.latency_ms += self.latency_alpha * (elapsed_ms - self.latency_ms)
+        self._adapt()
+
+    def _adapt(self):
+        """Bajar o subir model_complexity según el presupuesto de latencia"""
+        self._frames_at_level += 1
+        if not self.budget_ms or self._frames_at_level < self.adapt_frames:
+            return
+
+        now = time.time()
+        if now >= self._ceiling_until:
+            self._ceiling = self.max_complexity
+
+        level = self.complexity
+        if self.latency_ms > self.budget_ms and level > self.min_complexity:
+            level -= 1
+            # No volver a subir enseguida a la complejidad que no entró en el presupuesto
+            self._ceiling = level
+            self._ceiling_until = now + self.retry_seconds
+        elif self.latency_ms < 0.5 * self.budget_ms and level < self._ceiling:
+            level += 1
+
+        if level != self.complexity:
+            self.complexity = level
+            self.latency_ms = None
+            self.switches += 1
+        self._frames_at_level = 0
+
+    def reset(self):
+        """Olvidar la ROI (la próxima detección usa el frame completo)"""
+        self.roi = None
+
+    def get_stats(self) -> Dict:
+        """Configuración, estado y contadores"""
+        return {
+            "complexity": self.complexity,
+            "budget_ms": self.budget_ms,
+            "latency_ms": round(self.latency_ms, 2) if self.latency_ms is not None else None,
+            "target_size": self.target_size,
+            "roi": [round(v, 3) for v in self.roi] if self.roi else None,
+            "frames": self.frames,
+            "roi_frames": self.roi_frames,
+            "fallbacks": self.fallbacks,
+            "switches": self.switches
+        }
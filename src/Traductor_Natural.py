@@ -3,19 +3,44 @@ import speech_recognition as sr
 from groq import Groq
 from gtts import gTTS
 import os
+import sys
 import tempfile
 import time
 import re
 from apikey import groq_apikey
 
+# Proveedor LLM compartido con el backend (Groq o API compatible con OpenAI)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from llm_provider import DEFAULT_MODEL, LLMError, create_provider
+
 # Configurar API key de Groq
 os.environ['GROQ_API_KEY'] = groq_apikey
 
-# Inicializar cliente Groq
+# Inicializar cliente Groq (transcripción con Whisper)
 @st.cache_resource
 def init_groq_client():
     return Groq(api_key=groq_apikey)
 
+# Inicializar proveedor LLM para el chat
+# LLM_PROVIDER=openai y LLM_BASE_URL=http://127.0.0.1:8100/v1 usan el servidor simulado
+@st.cache_resource
+def init_llm_provider():
+    return create_provider(
+        os.environ.get("LLM_PROVIDER", "groq"),
+        model=os.environ.get("LLM_MODEL", DEFAULT_MODEL),
+        api_key=os.environ.get("LLM_API_KEY") or groq_apikey,
+        base_url=os.environ.get("LLM_BASE_URL") or None,
+        timeout=float(os.environ.get("LLM_TIMEOUT", 30)),
+        max_retries=int(os.environ.get("LLM_MAX_RETRIES", 2))
+    )
+
+def chat_completion(messages, temperature, max_tokens):
+    """Respuesta del LLM configurado"""
+    provider = init_llm_provider()
+    if provider is None:
+        raise LLMError("No hay proveedor LLM configurado")
+    return provider.chat(messages, temperature=temperature, max_tokens=max_tokens)
+
 # Inicializar reconocedor de voz
 @st.cache_resource
 def init_speech_recognizer():
@@ -55,8 +80,6 @@ def get_translation_response(text, direction):
     """
     Obtiene respuesta del LLM para traduccion de lenguaje de senas
     """
-    client = init_groq_client()
-    
     if direction == "texto_a_senas":
         prompt = f"""
         Eres un asistente de voz experto en lenguaje de señas. Traduce: "{text}".
@@ -76,8 +99,7 @@ def get_translation_response(text, direction):
         """
     
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        return chat_completion(
             messages=[
                 {"role": "system", "content": "Eres un experto en lenguaje de señas. Responde siempre en español de forma hablada, breve y natural."},
                 {"role": "user", "content": prompt}
@@ -85,7 +107,6 @@ def get_translation_response(text, direction):
             temperature=0.7,
             max_tokens=200
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error al obtener respuesta: {str(e)}"
 
@@ -93,8 +114,6 @@ def get_feedback_response(user_message):
     """
     Genera respuestas para capturar impresiones del usuario sobre la aplicacion
     """
-    client = init_groq_client()
-    
     prompt = f"""
     Eres un asistente amable recopilando opiniones sobre una app de señas.
     El usuario dice: "{user_message}"
@@ -104,8 +123,7 @@ def get_feedback_response(user_message):
     """
     
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        return chat_completion(
             messages=[
                 {"role": "system", "content": "Eres un asistente amable. Responde en español de forma breve y hablada."},
                 {"role": "user", "content": prompt}
@@ -113,7 +131,6 @@ def get_feedback_response(user_message):
             temperature=0.8,
             max_tokens=150
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error al obtener respuesta: {str(e)}"
 
@@ -121,8 +138,6 @@ def get_educational_chat_response(user_message):
     """
     Genera respuestas para el chat educativo sobre el uso de la aplicación y el avatar
     """
-    client = init_groq_client()
-    
     prompt = f"""
     Eres Sara, la asistente virtual de la aplicación "Traductor de Señas Pro".
     
@@ -142,8 +157,7 @@ def get_educational_chat_response(user_message):
     """
     
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        return chat_completion(
             messages=[
                 {"role": "system", "content": "Eres Sara, una asistente útil y conversadora. Responde en español plano, sin formato."},
                 {"role": "user", "content": prompt}
@@ -151,7 +165,6 @@ def get_educational_chat_response(user_message):
             temperature=0.7,
             max_tokens=200
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -13,6 +13,7 @@ import {
 } from "lucide-react";
 import { Button } from "./ui/button";
 import { Input } from "./ui/input";
+import { encodeCanvasFrame } from "./frameProtocol";
 
 interface TranslationModeProps {
   onBack: () => void;
@@ -28,6 +29,7 @@ export function TranslationMode({ onBack }: TranslationModeProps) {
   const isDetectingRef = useRef<boolean>(false);
   const detectionIntervalRef = useRef<NodeJS.Timeout | null>(null);
   const lastSpokenSentenceRef = useRef<string>(""); // Referencia para evitar repetir la misma frase
+  const frameSeqRef = useRef<number>(0); // Número de secuencia de los frames binarios
 
   // Estado para Seña a Voz/Texto (mitad superior)
   const [isCameraOn, setIsCameraOn] = useState(false);
@@ -113,6 +115,7 @@ export function TranslationMode({ onBack }: TranslationModeProps) {
     }
 
     const ws = new WebSocket(WS_URL);
+    ws.binaryType = "arraybuffer";
 
     ws.onopen = () => {
       console.log("✓ WebSocket conectado");
@@ -157,13 +160,28 @@ export function TranslationMode({ onBack }: TranslationModeProps) {
             }
             if (sentenceData.natural_sentence) {
               setNaturalSentence(sentenceData.natural_sentence);
-              setTranslatedText(sentenceData.natural_sentence);
             }
-            // Si hay señas pero no oración, mostrar las señas crudas
-            if (!sentenceData.natural_sentence && sentenceData.raw_signs) {
-              setTranslatedText(sentenceData.raw_signs);
+            // La traducción parcial sigue al buffer actual; si no hay, la
+            // última oración o las señas crudas
+            const text =
+              sentenceData.partial_sentence ||
+              sentenceData.natural_sentence ||
+              sentenceData.raw_signs;
+            if (text) {
+              setTranslatedText(text);
             }
           }
+        } else if (data.type === "sentence_partial") {
+          // Traducción parcial mientras se sigue señando
+          setTranslatedText(data.data.text);
+        } else if (data.type === "sentence") {
+          // Oración final generada en segundo plano
+          const sentenceData = data.data;
+          setSignsBuffer(sentenceData.signs_buffer);
+          if (sentenceData.current_sentence) {
+            setNaturalSentence(sentenceData.current_sentence);
+            setTranslatedText(sentenceData.current_sentence);
+          }
         }
       } catch (error) {
         console.error("❌ Error procesando mensaje:", error);
@@ -217,26 +235,25 @@ export function TranslationMode({ onBack }: TranslationModeProps) {
     canvas.height = video.videoHeight;
     context.drawImage(video, 0, 0);
 
-    // Convertir a base64
-    const imageData = canvas.toDataURL("image/jpeg", 0.8);
-    console.log("📸 Enviando frame:", {
-      width: canvas.width,
-      height: canvas.height,
-      dataSize: imageData.length,
-    });
-
-    // Enviar al servidor
-    try {
-      wsRef.current.send(
-        JSON.stringify({
-          type: "frame",
-          image: imageData,
-        })
-      );
-      console.log("✓ Frame enviado");
-    } catch (error) {
-      console.error("❌ Error enviando frame:", error);
-    }
+    // Enviar al servidor como JPEG binario (sin base64 ni JSON)
+    const ws = wsRef.current;
+    const seq = frameSeqRef.current++;
+    encodeCanvasFrame(canvas, seq, 0.8)
+      .then((message) => {
+        if (!message || ws.readyState !== WebSocket.OPEN) {
+          return;
+        }
+        ws.send(message);
+        console.log("✓ Frame enviado:", {
+          seq,
+          width: canvas.width,
+          height: canvas.height,
+          dataSize: message.byteLength,
+        });
+      })
+      .catch((error) => {
+        console.error("❌ Error enviando frame:", error);
+      });
   };
 
   // Loop de detección usando setInterval
@@ -1,48 +1,39 @@
-// AvatarAnimationPlayer.jsx — carga JSON desde /animaciones y reproduce
+// AvatarAnimationPlayer.jsx — carga el clip de la seña desde el backend y lo reproduce
 
 import { useEffect, useState } from "react";
 import Avatar3D from "./Avatar3D";
-
-// Cargar TODAS las animaciones JSON de la carpeta ./animaciones
-const modules = import.meta.glob("./animaciones/*.json", { eager: true });
-
-const anims = {};
-for (const path in modules) {
-  const mod = modules[path];
-  const data = mod.default ?? mod; // por si Vite envía {default: ...}
-  const name = path.split("/").pop().replace(".json", "");
-  anims[name] = data;
-}
+import { loadClip } from "./avatarClips";
 
 export default function AvatarAnimationPlayer({ sign }) {
   const [frame, setFrame] = useState(null);
 
   useEffect(() => {
-    if (!sign || !anims[sign]) {
-      setFrame(null);
-      return;
-    }
-
-    const anim = anims[sign];
-    const fps = anim.fps || 30;
-    const frames = anim.frames || [];
-
-    if (!frames.length) {
-      setFrame(null);
-      return;
-    }
-
-    let i = 0;
-    const speedMultiplier = 0.6; // 🔥 un poco más rápido que en crudo
-    const intervalMs = Math.max(1000 / (fps * speedMultiplier), 16);
-
-    const id = setInterval(() => {
-      const pose = frames[i].pose;
-      setFrame(pose);
-      i = (i + 1) % frames.length;
-    }, intervalMs);
-
-    return () => clearInterval(id);
+    setFrame(null);
+    if (!sign) return;
+
+    let cancelled = false;
+    let id = null;
+
+    // Solo se descarga el clip de la seña que se muestra
+    loadClip(sign)
+      .then((anim) => {
+        if (cancelled || !anim || !anim.frameCount) return;
+
+        let i = 0;
+        const speedMultiplier = 0.6; // 🔥 un poco más rápido que en crudo
+        const intervalMs = Math.max(1000 / (anim.fps * speedMultiplier), 16);
+
+        id = setInterval(() => {
+          setFrame(anim.frame(i));
+          i = (i + 1) % anim.frameCount;
+        }, intervalMs);
+      })
+      .catch((err) => console.warn(err));
+
+    return () => {
+      cancelled = true;
+      if (id !== null) clearInterval(id);
+    };
   }, [sign]);
 
   if (!frame) {
@@ -0,0 +1,123 @@
+// avatarClips.js — carga bajo demanda los clips del avatar (.kps) desde el backend
+
+const API_URL = "http://localhost:8000";
+
+// Encabezado fijo del formato .kps (ver backend/keypoint_sequences.py)
+const MAGIC = "KPSQ";
+const PREFIX_BYTES = 16;
+const DTYPE_FLOAT16 = 1;
+const DTYPE_FLOAT32 = 2;
+
+// Un fetch por seña: las promesas quedan en caché aunque se pidan a la vez
+const clips = new Map();
+
+function halfToFloat(h) {
+  const sign = h & 0x8000 ? -1 : 1;
+  const exponent = (h >> 10) & 0x1f;
+  const fraction = h & 0x3ff;
+  if (exponent === 0) return sign * fraction * 2 ** -24;
+  if (exponent === 31) return fraction ? NaN : sign * Infinity;
+  return sign * (1 + fraction / 1024) * 2 ** (exponent - 15);
+}
+
+// Interpretar un .kps: devuelve los frames como un único Float32Array
+export function parseClip(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== MAGIC) throw new Error("No es un clip .kps");
+
+  const dtype = view.getUint8(5);
+  const headerLength = view.getUint32(8, true);
+  const dataOffset = view.getUint32(12, true);
+  const header = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, PREFIX_BYTES, headerLength))
+  );
+
+  const count = header.frames * header.features;
+  let data;
+  if (dtype === DTYPE_FLOAT32) {
+    data = new Float32Array(buffer.slice(dataOffset, dataOffset + count * 4));
+  } else if (dtype === DTYPE_FLOAT16) {
+    const half = new Uint16Array(buffer, dataOffset, count);
+    data = new Float32Array(count);
+    for (let i = 0; i < count; i++) data[i] = halfToFloat(half[i]);
+  } else {
+    throw new Error(`dtype de clip no soportado: ${dtype}`);
+  }
+
+  const features = header.features;
+  return {
+    name: header.label,
+    fps: header.fps || 30,
+    features,
+    frameCount: header.frames,
+    header,
+    data,
+    // Vista sin copias de un frame (153 floats para Avatar3D)
+    frame: (i) => data.subarray(i * features, (i + 1) * features),
+  };
+}
+
+// Clip de una seña (null si el backend no lo tiene)
+export function loadClip(sign) {
+  if (!clips.has(sign)) {
+    const promise = fetch(`${API_URL}/api/avatar/clips/${encodeURIComponent(sign)}`)
+      .then((res) => {
+        if (res.status === 404) return null;
+        if (!res.ok) throw new Error(`Error ${res.status} cargando el clip ${sign}`);
+        return res.arrayBuffer();
+      })
+      .then((buffer) => (buffer ? parseClip(buffer) : null));
+    // Si falla la red, reintentar la próxima vez
+    promise.catch(() => clips.delete(sign));
+    clips.set(sign, promise);
+  }
+  return clips.get(sign);
+}
+
+function composeRequest(path, body) {
+  return fetch(`${API_URL}/api/avatar/compose${path}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  }).then((res) => {
+    if (res.status === 404) return null;
+    if (!res.ok) throw new Error(`Error ${res.status} componiendo la animación`);
+    return res;
+  });
+}
+
+// Animación continua de una oración (texto en español o { glosses: [...] })
+export function composeSentence(input, options = {}) {
+  const body = typeof input === "string" ? { text: input } : input;
+  return composeRequest("", { ...body, ...options })
+    .then((res) => (res ? res.arrayBuffer() : null))
+    .then((buffer) => (buffer ? parseClip(buffer) : null));
+}
+
+// Igual que composeSentence, pero llama a onChunk con cada parte apenas llega.
+// Cada parte es un .kps precedido por su largo (uint32 little-endian)
+export async function streamSentence(input, onChunk, options = {}) {
+  const body = typeof input === "string" ? { text: input } : input;
+  const res = await composeRequest("/stream", { ...body, ...options });
+  if (!res) return false;
+
+  const reader = res.body.getReader();
+  let pending = new Uint8Array(0);
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    const joined = new Uint8Array(pending.length + value.length);
+    joined.set(pending);
+    joined.set(value, pending.length);
+    pending = joined;
+
+    while (pending.length >= 4) {
+      const length = new DataView(pending.buffer, pending.byteOffset, 4).getUint32(0, true);
+      if (pending.length < 4 + length) break;
+      onChunk(parseClip(pending.slice(4, 4 + length).buffer));
+      pending = pending.subarray(4 + length);
+    }
+  }
+  return true;
+}
@@ -0,0 +1,65 @@
+// frameProtocol.ts — mensajes binarios para /ws/detect (ver backend/frame_protocol.py)
+//
+// Cabecera de 18 bytes little-endian seguida del payload crudo:
+// | "CS" (2) | versión u8 | tipo u8 | formato u8 | relleno (1) | seq u32 | timestamp_ms f64 |
+
+export const PROTOCOL_VERSION = 1;
+export const HEADER_SIZE = 18;
+
+export const MSG_IMAGE = 1;
+export const MSG_KEYPOINTS = 2;
+
+// Layout de keypoints: pose 3x3 + mano izquierda 21x3 + mano derecha 21x3
+export const NUM_KEYPOINT_FEATURES = 135;
+
+export const FORMAT_JPEG = 1;
+export const FORMAT_WEBP = 2;
+
+// Construir un mensaje binario listo para ws.send()
+export function packBinaryMessage(
+  msgType: number,
+  payload: ArrayBuffer,
+  seq: number,
+  format = 0,
+  timestamp = performance.now()
+): ArrayBuffer {
+  const buffer = new ArrayBuffer(HEADER_SIZE + payload.byteLength);
+  const view = new DataView(buffer);
+  view.setUint8(0, 0x43); // "C"
+  view.setUint8(1, 0x53); // "S"
+  view.setUint8(2, PROTOCOL_VERSION);
+  view.setUint8(3, msgType);
+  view.setUint8(4, format);
+  view.setUint32(6, seq >>> 0, true);
+  view.setFloat64(10, timestamp, true);
+  new Uint8Array(buffer, HEADER_SIZE).set(new Uint8Array(payload));
+  return buffer;
+}
+
+// Comprimir el canvas a JPEG y empaquetarlo como mensaje binario de imagen
+export async function encodeCanvasFrame(
+  canvas: HTMLCanvasElement,
+  seq: number,
+  quality = 0.8
+): Promise<ArrayBuffer | null> {
+  const blob = await new Promise<Blob | null>((resolve) =>
+    canvas.toBlob(resolve, "image/jpeg", quality)
+  );
+  if (!blob) {
+    return null;
+  }
+  return packBinaryMessage(MSG_IMAGE, await blob.arrayBuffer(), seq, FORMAT_JPEG);
+}
+
+// Empaquetar uno o más frames de keypoints (N x 135 float32) calculados en el navegador
+export function packKeypointsMessage(keypoints: Float32Array, seq: number): ArrayBuffer {
+  if (keypoints.length === 0 || keypoints.length % NUM_KEYPOINT_FEATURES !== 0) {
+    throw new Error(`Se esperan múltiplos de ${NUM_KEYPOINT_FEATURES} keypoints`);
+  }
+  // Float32Array usa el orden de bytes de la plataforma (little-endian en la práctica)
+  const payload = keypoints.buffer.slice(
+    keypoints.byteOffset,
+    keypoints.byteOffset + keypoints.byteLength
+  ) as ArrayBuffer;
+  return packBinaryMessage(MSG_KEYPOINTS, payload, seq);
+}